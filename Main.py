@@ -1,158 +1,389 @@
 import sys
 import os
-import subprocess
-import shutil
-import requests
-import zipfile
+import time
+from autozapret.startup import startup_timer
 import re
-from PySide6.QtCore import Qt, QThread, Signal, QTimer
+from PySide6.QtCore import (
+    Qt, QObject, QThread, Signal, QTimer, QAbstractListModel, QSortFilterProxyModel, QModelIndex, QSize
+)
+from PySide6.QtGui import QColor, QFont, QPainter, QPen
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QMessageBox, QScrollArea, QFrame, QSizePolicy, QDialog
+    QMessageBox, QSizePolicy, QDialog, QListView, QStyledItemDelegate, QStyle, QLineEdit, QListWidget,
+    QPlainTextEdit, QCheckBox
 )
+from autozapret import core
+from autozapret.core import EXTRACT_DIR, BENCHMARK_PATH, STRATEGY_INDEX_PATH
+from autozapret.service_status import StatusWatcher, default_backend, RUNNING, STOPPED, NOT_FOUND, UNKNOWN
+from autozapret.strategy_index import StrategyIndex
+from autozapret.supervisor import LOG_LINES
+from autozapret.telemetry import telemetry
 
-GITHUB_API_RELEASE = "https://api.github.com/repos/Flowseal/zapret-discord-youtube/releases/latest"
-EXTRACT_DIR = os.path.join(os.getcwd(), "ZAPRET")
-
-
-def get_latest_release_zip_url() -> str:
-    """Запрашивает GitHub API и возвращает ссылку на zip‑архив последнего релиза."""
-    resp = requests.get(GITHUB_API_RELEASE, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
-    for asset in data.get("assets", []):
-        if asset.get("name", "").lower().endswith(".zip"):
-            return asset.get("browser_download_url")
-    raise ValueError("Zip‑архив не найден в последнем релизе.")
+STATUS_TEXT = {
+    RUNNING: "Сервис запущен",
+    STOPPED: "Сервис остановлен",
+    NOT_FOUND: "Сервис не найден",
+    UNKNOWN: "Статус неизвестен",
+}
+BENCHMARK_TARGETS = ["discord.com", "gateway.discord.gg", "www.youtube.com", "i.ytimg.com"]
+HEALTH_TARGETS = BENCHMARK_TARGETS
+HEALTH_INTERVAL = 30
+FAILOVER_ACTIONS = {
+    "degraded": "деградация",
+    "recovered": "восстановлено",
+    "switch": "переключение",
+    "switched": "переключено",
+    "switch_failed": "ошибка переключения",
+}
 
 
 class DownloadThread(QThread):
     finished = Signal(bool, str)
+    progress = Signal(object, object, float)
 
-    def __init__(self, target_dir=None):
+    def __init__(self, target_dir=None, delta=True):
         super().__init__()
         self.target_dir = target_dir or EXTRACT_DIR
+        self.delta = delta
+        self.downloader = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Останавливает загрузку; если она ещё не началась, отменяет её при старте."""
+        self.cancelled = True
+        if self.downloader is not None:
+            self.downloader.cancel()
+
+    def on_progress(self, downloaded: int, total: int, speed: float):
+        self.progress.emit(downloaded, total, speed)
+
+    def set_downloader(self, downloader):
+        self.downloader = downloader
+        if self.cancelled:
+            downloader.cancel()
 
     def run(self):
+        from autozapret.downloader import DownloadCancelled
         try:
-            zip_url = get_latest_release_zip_url()
-            response = requests.get(zip_url, stream=True, timeout=30)
-            response.raise_for_status()
-            zip_path = os.path.join(os.getcwd(), "autozapret.zip")
-            with open(zip_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=1024):
-                    if chunk:
-                        f.write(chunk)
-            if os.path.exists(self.target_dir):
-                shutil.rmtree(self.target_dir)
-            os.makedirs(self.target_dir, exist_ok=True)
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(self.target_dir)
-            os.remove(zip_path)
-            self.finished.emit(True, "Файлы успешно загружены!")
+            stats = core.update(self.target_dir, delta=self.delta, progress=self.on_progress,
+                                on_downloader=self.set_downloader)
+            checksum = "совпадает с опубликованной" if stats["checksum"] else "не опубликована"
+            self.finished.emit(True, "Файлы успешно загружены!\n"
+                                     f"Новых: {stats['added']}, изменённых: {stats['changed']}, "
+                                     f"удалённых: {stats['removed']}, без изменений: {stats['unchanged']}.\n"
+                                     f"Контрольная сумма {checksum}; проверка заняла "
+                                     f"{stats['hash_seconds'] + stats['verify_seconds']:.2f} с.")
+        except DownloadCancelled:
+            self.finished.emit(False, "Загрузка отменена. При следующем запуске она продолжится с места остановки.")
         except Exception as e:
             self.finished.emit(False, f"Ошибка загрузки: {e}")
 
 
-class InstallServiceThread(QThread):
-    finished_install = Signal(str, str)
+class UpdateCheckThread(QThread):
+    available = Signal(str)
+
+    def run(self):
+        startup_timer.start("release_check")
+        try:
+            tag = core.check_update(EXTRACT_DIR)
+            if tag:
+                self.available.emit(tag)
+        except Exception:
+            pass
+        finally:
+            startup_timer.finish("release_check")
+
+
+class LocalStateThread(QThread):
+    loaded = Signal(object, object)
+
+    def __init__(self, strategy_index):
+        super().__init__()
+        self.strategy_index = strategy_index
+
+    def run(self):
+        from autozapret.delta_update import installed_release
+        startup_timer.start("local_state")
+        scores = core.load_scores()
+        self.strategy_index.refresh()
+        release = installed_release(EXTRACT_DIR)
+        startup_timer.finish("local_state")
+        self.loaded.emit(scores, release)
+
+
+class ListsLoadThread(QThread):
+    loaded = Signal(object, object)
+
+    def run(self):
+        self.loaded.emit(core.hostlist_index(), core.ipset_index())
+
 
-    def __init__(self, service_install_path: str, cwd: str):
+class RollbackThread(QThread):
+    finished_rollback = Signal(bool, str)
+
+    def __init__(self, sha256: str):
         super().__init__()
-        self.service_install_path = service_install_path
-        self.cwd = cwd
+        self.sha256 = sha256
 
     def run(self):
+        started = time.perf_counter()
         try:
-            proc = subprocess.Popen(
-                ["cmd.exe", "/c", self.service_install_path],
-                cwd=self.cwd,
-                shell=True
-            )
-            proc.wait()
-            self.finished_install.emit("Если вы всё правильно ввели, нажмите 'Обновить статус' и увидите, что всё работает.", "")
+            stats = core.rollback(self.sha256)
+            self.finished_rollback.emit(True, f"Установлена версия {stats['release']} за "
+                                              f"{time.perf_counter() - started:.1f} с.\n"
+                                              f"Скопировано: {stats['added'] + stats['changed']}, "
+                                              f"без изменений: {stats['unchanged']}.")
         except Exception as e:
-            self.finished_install.emit("", f"Ошибка установки: {e}")
+            self.finished_rollback.emit(False, f"Ошибка отката: {e}")
 
 
-class RemoveServiceThread(QThread):
-    finished_remove = Signal(str, str)
+class ScriptThread(QThread):
+    """Запускает service_install.bat или service_remove.bat через общий супервизор скриптов."""
+    line = Signal(str, str)
+    finished_script = Signal(object, str)
 
-    def __init__(self, service_remove_path: str, cwd: str):
+    def __init__(self, action):
         super().__init__()
-        self.service_remove_path = service_remove_path
-        self.cwd = cwd
+        self.action = action
+        self.job = None
+
+    def set_job(self, job):
+        self.job = job
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def send(self, text: str):
+        if self.job is not None:
+            self.job.send(text)
 
     def run(self):
         try:
-            proc = subprocess.Popen(
-                ["cmd.exe", "/c", self.service_remove_path],
-                cwd=self.cwd,
-                shell=True
-            )
-            proc.wait()
-            self.finished_remove.emit("Сервис успешно удалён.", "")
+            code = self.action(EXTRACT_DIR, on_line=self.line.emit, on_job=self.set_job)
+            self.finished_script.emit(code, "")
         except Exception as e:
-            self.finished_remove.emit("", f"Ошибка удаления сервиса: {e}")
+            self.finished_script.emit(None, str(e))
+
+
+class BenchmarkThread(QThread):
+    progress = Signal(int, int, str)
+    finished_bench = Signal(bool, str)
 
+    def __init__(self, variants, launcher=None, targets=None):
+        super().__init__()
+        from autozapret.strategy_bench import StrategyBenchmark, BatLauncher
+        self.variants = list(variants)
+        self.benchmark = StrategyBenchmark(launcher or BatLauncher(), targets or BENCHMARK_TARGETS)
+
+    def cancel(self):
+        self.benchmark.cancelled = True
 
-class ServiceStatusThread(QThread):
-    status = Signal(str)
+    def on_progress(self, index: int, total: int, score):
+        self.progress.emit(index, total, os.path.basename(score.variant))
 
     def run(self):
+        from autozapret.strategy_bench import save_scores
         try:
-            output = subprocess.check_output("sc query zapret", shell=True, text=True, encoding="cp866")
-            if "RUNNING" in output:
-                self.status.emit("Сервис запущен")
+            scores = self.benchmark.run(self.variants, progress=self.on_progress)
+            save_scores(BENCHMARK_PATH, scores)
+            if scores:
+                best = scores[0]
+                self.finished_bench.emit(True, f"Лучший вариант: {os.path.basename(best.variant)} "
+                                               f"(оценка {best.score}, успешных проверок {best.success_rate:.0%}).")
             else:
-                self.status.emit("Сервис остановлен")
-        except subprocess.CalledProcessError:
-            self.status.emit("Сервис не найден")
+                self.finished_bench.emit(False, "Подбор отменён.")
+        except Exception as e:
+            self.finished_bench.emit(False, f"Ошибка подбора: {e}")
 
 
-class FilePanel(QFrame):
-    clicked = Signal(str)
+class ServiceStatusWatcher(QObject):
+    """Передаёт события StatusWatcher в GUI через сигналы Qt."""
+    changed = Signal(str)
+    checked = Signal(str)
 
-    def __init__(self, file_path: str, variant_number: int, parent=None):
+    def __init__(self, backend=None, parent=None):
         super().__init__(parent)
-        self.file_path = file_path
-        self.variant_number = variant_number
-        self.setFrameShape(QFrame.StyledPanel)
-        self.setStyleSheet("""
-            QFrame {
-                background-color: #3e3e3e;
-                border: 2px solid #4caf50;
-                border-radius: 8px;
-                padding: 10px;
-            }
-            QLabel {
-                color: #ffffff;
-                font-size: 16px;
-            }
-            QFrame:hover {
-                background-color: #4a4a4a;
-            }
-        """)
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(10, 10, 10, 10)
-        fname = os.path.basename(file_path)
-        lower = fname.lower()
-        if "discord" in lower:
-            label_text = f"{self.variant_number}. Discord <span style='color:#00BCD4;'>(discord.bat)</span>"
+        self.watcher = StatusWatcher(backend or default_backend(),
+                                     on_change=self.changed.emit, on_checked=self.checked.emit)
+
+    def start(self):
+        self.watcher.start()
+
+    def stop(self):
+        self.watcher.stop()
+
+    def refresh(self):
+        self.watcher.start()
+        self.watcher.refresh()
+
+    def boost(self):
+        self.watcher.boost()
+
+
+class HealthMonitorBridge(QObject):
+    """Передаёт сводки HealthMonitor в GUI через сигнал Qt."""
+    updated = Signal(object)
+
+    def __init__(self, targets=None, interval=HEALTH_INTERVAL, on_results=None, parent=None):
+        super().__init__(parent)
+        from autozapret.health_monitor import HealthMonitor
+        self.monitor = HealthMonitor(targets or HEALTH_TARGETS, interval=interval, on_update=self.updated.emit,
+                                     on_results=on_results)
+
+    def start(self):
+        self.monitor.start()
+
+    def stop(self):
+        self.monitor.stop()
+
+
+class FailoverBridge(QObject):
+    """Передаёт решения FailoverScheduler в GUI; по умолчанию выключен."""
+    decided = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        from autozapret.failover import CoreSwitcher, FailoverScheduler
+        self.scheduler = FailoverScheduler(CoreSwitcher(EXTRACT_DIR), on_decision=self.decided.emit,
+                                           log_path=core.FAILOVER_LOG_PATH)
+        self.scheduler.enabled = False
+
+
+APP_THEME = """
+    QListView#strategyList {
+        background-color: transparent;
+        border: none;
+        outline: none;
+    }
+"""
+PANEL_COLORS = {
+    "background": "#3e3e3e",
+    "hover": "#4a4a4a",
+    "border": "#4caf50",
+    "text": "#ffffff",
+    "discord": "#00BCD4",
+    "alt": "#FFA500",
+    "file": "#8BC34A",
+    "mgts": "#FF5722",
+    "score": "#FFEB3B",
+    "details": "#9E9E9E",
+}
+InfoRole = Qt.UserRole + 1
+ScoreRole = Qt.UserRole + 2
+
+
+class StrategyListModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self.scores = {}
+
+    def set_items(self, items, scores):
+        self.beginResetModel()
+        self.items = list(items)
+        self.scores = scores
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        info = self.items[index.row()]
+        if role == Qt.DisplayRole:
+            return info["name"]
+        if role == InfoRole:
+            return info
+        if role == ScoreRole:
+            return self.scores.get(info["path"])
+        return None
+
+
+class StrategyFilterProxy(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mode = "all"
+
+    def set_mode(self, mode: str):
+        self.mode = mode
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.mode == "all":
+            return True
+        info = self.sourceModel().items[source_row]
+        return info["mgts"] if self.mode == "mgts" else not info["mgts"]
+
+
+class StrategyDelegate(QStyledItemDelegate):
+    """Рисует вариант в виде карточки без отдельного виджета на каждую строку."""
+
+    ROW_HEIGHT = 72
+    SPACING = 10
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_font = QFont()
+        self.title_font.setPixelSize(16)
+        self.details_font = QFont()
+        self.details_font.setPixelSize(12)
+        self.colors = {key: QColor(value) for key, value in PANEL_COLORS.items()}
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT + self.SPACING)
+
+    def title_parts(self, info: dict, number: int, score):
+        if info["discord"]:
+            parts = [(f"{number}. Discord", "text"), (" (discord.bat)", "discord")]
         else:
-            label_text = f"{self.variant_number}. Общая настройка"
-            if "alt" in lower:
-                label_text += f" <span style='color:#FFA500;'>(альтернативный вариант {self.variant_number})</span>"
-            label_text += f" <span style='color:#8BC34A;'>({fname})</span>"
-            if "mgts" in lower or "мгтс" in lower:
-                label_text += " <span style='color:#FF5722;'>[МГТС]</span>"
-        self.label = QLabel(label_text)
-        self.label.setTextFormat(Qt.RichText)
-        layout.addWidget(self.label)
+            parts = [(f"{number}. Общая настройка", "text")]
+            if info["alt"]:
+                parts.append((f" (альтернативный вариант {number})", "alt"))
+            parts.append((f" ({info['name']})", "file"))
+            if info["mgts"]:
+                parts.append((" [МГТС]", "mgts"))
+        if score is not None:
+            parts.append((f" ★ {score}", "score"))
+        return parts
+
+    def details_text(self, info: dict) -> str:
+        details = []
+        if info["desync"]:
+            details.append(", ".join(info["desync"]))
+        if info["tcp_ports"]:
+            details.append("TCP " + ",".join(info["tcp_ports"]))
+        if info["udp_ports"]:
+            details.append("UDP " + ",".join(info["udp_ports"]))
+        return " · ".join(details)
 
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.clicked.emit(self.file_path)
+    def paint(self, painter, option, index):
+        info = index.data(InfoRole)
+        score = index.data(ScoreRole)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = option.rect.adjusted(1, 1, -1, -self.SPACING - 1)
+        hovered = option.state & QStyle.State_MouseOver
+        painter.setPen(QPen(self.colors["border"], 2))
+        painter.setBrush(self.colors["hover"] if hovered else self.colors["background"])
+        painter.drawRoundedRect(rect, 8, 8)
+        text_rect = rect.adjusted(20, 12, -20, -12)
+        painter.setClipRect(text_rect)
+        painter.setFont(self.title_font)
+        metrics = painter.fontMetrics()
+        x = text_rect.left()
+        baseline = text_rect.top() + metrics.ascent()
+        for text, color in self.title_parts(info, index.row() + 1, score):
+            painter.setPen(self.colors[color])
+            painter.drawText(x, baseline, text)
+            x += metrics.horizontalAdvance(text)
+        details = self.details_text(info)
+        if details:
+            painter.setFont(self.details_font)
+            painter.setPen(self.colors["details"])
+            painter.drawText(text_rect.left(), baseline + painter.fontMetrics().height() + 6, details)
+        painter.restore()
 
 
 class AboutDialog(QDialog):
@@ -170,6 +401,8 @@ class AboutDialog(QDialog):
             "bol-van/zapret</a> – проект Zapret.</p>"
             "<p style='font-size:14px;'>Использую их проекты для реализации данной утилиты. Огромное спасибо авторам за их труд!</p>"
             "<p style='font-size:14px;'>Спасибо за использование программы!</p>"
+            "<p style='font-size:14px;'>Время запуска:</p>"
+            f"<pre style='font-size:12px;'>{startup_timer.report()}</pre>"
         )
         self.label = QLabel(message)
         self.label.setTextFormat(Qt.RichText)
@@ -177,6 +410,15 @@ class AboutDialog(QDialog):
         self.label.setOpenExternalLinks(True)
         self.label.setWordWrap(True)
         layout.addWidget(self.label)
+        self.trace_box = QCheckBox(f"Трассировка операций ({os.path.basename(core.TRACE_PATH)}, "
+                                   f"{os.path.basename(core.METRICS_PATH)})")
+        self.trace_box.setChecked(telemetry.enabled)
+        self.trace_box.toggled.connect(self.toggle_trace)
+        layout.addWidget(self.trace_box)
+        self.profile_box = QCheckBox(f"Профилирование ({os.path.basename(core.PROFILE_PATH)})")
+        self.profile_box.setChecked(telemetry.profiling)
+        self.profile_box.toggled.connect(self.toggle_profile)
+        layout.addWidget(self.profile_box)
         close_btn = QPushButton("Закрыть")
         close_btn.setStyleSheet("""
             QPushButton {
@@ -193,6 +435,261 @@ class AboutDialog(QDialog):
         close_btn.clicked.connect(self.accept)
         layout.addWidget(close_btn)
 
+    def toggle_trace(self, checked):
+        if not checked:
+            self.profile_box.setChecked(False)
+            telemetry.flush()
+        telemetry.enabled = checked
+
+    def toggle_profile(self, checked):
+        if checked:
+            self.trace_box.setChecked(True)
+        telemetry.set_profiling(checked)
+
+
+class ListsDialog(QDialog):
+    """Поиск по спискам доменов и IP, добавление домена и сжатие ipset‑списков."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Списки доменов и IP")
+        self.setStyleSheet("background-color: #263238; color: #ffffff; font-size: 14px;")
+        self.resize(560, 600)
+        self.index = None
+        self.ipsets = None
+        layout = QVBoxLayout(self)
+        self.stats_label = QLabel("Загрузка списков...")
+        self.stats_label.setWordWrap(True)
+        layout.addWidget(self.stats_label)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Домен, например youtube.com")
+        self.search_edit.setEnabled(False)
+        self.search_edit.textChanged.connect(lambda: self.search_timer.start())
+        layout.addWidget(self.search_edit)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.on_search)
+        self.result_label = QLabel("")
+        self.result_label.setWordWrap(True)
+        layout.addWidget(self.result_label)
+        self.results = QListWidget()
+        layout.addWidget(self.results)
+        self.add_btn = QPushButton("➕ Добавить в свой список")
+        self.add_btn.setStyleSheet("background-color: #4caf50; padding: 8px; border-radius: 5px;")
+        self.add_btn.setEnabled(False)
+        self.add_btn.clicked.connect(self.on_add)
+        layout.addWidget(self.add_btn)
+        self.ipset_label = QLabel("")
+        self.ipset_label.setWordWrap(True)
+        layout.addWidget(self.ipset_label)
+        self.ip_edit = QLineEdit()
+        self.ip_edit.setPlaceholderText("IP‑адрес, например 162.159.130.234")
+        self.ip_edit.setEnabled(False)
+        self.ip_edit.textChanged.connect(self.on_ip_search)
+        layout.addWidget(self.ip_edit)
+        self.ip_result_label = QLabel("")
+        layout.addWidget(self.ip_result_label)
+        self.compact_btn = QPushButton("🗜 Сжать ipset‑списки")
+        self.compact_btn.setStyleSheet("background-color: #607D8B; padding: 8px; border-radius: 5px;")
+        self.compact_btn.setToolTip("Объединить пересекающиеся записи в минимальный набор CIDR")
+        self.compact_btn.setEnabled(False)
+        self.compact_btn.clicked.connect(self.on_compact)
+        layout.addWidget(self.compact_btn)
+        self.load_thread = ListsLoadThread()
+        self.load_thread.loaded.connect(self.on_loaded)
+        self.load_thread.start()
+
+    def on_loaded(self, index, ipsets=None):
+        self.index = index
+        if ipsets is not None:
+            self.ipsets = ipsets
+            self.show_ipset_stats()
+        stats = index.stats()
+        self.stats_label.setText(
+            f"Списков: {len(stats['lists'])}, записей: {stats['entries']}, уникальных: {stats['unique']}, "
+            f"покрыто родительским доменом: {stats['redundant']}.")
+        self.stats_label.setToolTip("\n".join(f"{name}: {count}" for name, count in sorted(stats["lists"].items())))
+        self.search_edit.setEnabled(True)
+        self.search_edit.setFocus()
+        self.on_search()
+
+    def on_search(self):
+        text = self.search_edit.text().strip()
+        self.results.clear()
+        if self.index is None or not text:
+            self.result_label.setText("")
+            self.add_btn.setEnabled(False)
+            return
+        found = self.index.lookup(text)
+        if found:
+            self.result_label.setText(f"✅ {found['domain']} покрыт записью {found['match']} "
+                                      f"({', '.join(found['lists'])})")
+        else:
+            self.result_label.setText(f"⛔ {text} не входит ни в один список")
+        self.add_btn.setEnabled(found is None and "." in text)
+        for domain, lists in self.index.search(text):
+            self.results.addItem(f"{domain}  —  {', '.join(lists)}")
+
+    def on_add(self):
+        try:
+            result = self.index.add(self.search_edit.text())
+        except (ValueError, OSError) as e:
+            QMessageBox.warning(self, "Списки доменов", str(e))
+            return
+        QMessageBox.information(self, "Списки доменов",
+                                f"{result['domain']} добавлен в {result['lists'][0]}. "
+                                "Переустановите сервис, чтобы winws перечитал списки.")
+        self.on_loaded(self.index)
+
+    def show_ipset_stats(self):
+        stats = self.ipsets.stats()
+        saved = 1 - stats["cidrs"] / stats["entries"] if stats["entries"] else 0
+        self.ipset_label.setText(
+            f"IP: записей {stats['entries']} → {stats['cidrs']} CIDR после объединения (−{saved:.0%}), "
+            f"отрезков в индексе {stats['segments']}, поиск {stats['lookup_us']:.1f} мкс.")
+        self.ipset_label.setToolTip("\n".join(f"{name}: {item['entries']} → {item['cidrs']}"
+                                              for name, item in sorted(stats["lists"].items())))
+        self.ip_edit.setEnabled(True)
+        self.compact_btn.setEnabled(stats["cidrs"] < stats["entries"])
+
+    def on_ip_search(self, text: str):
+        if self.ipsets is None or not text.strip():
+            self.ip_result_label.setText("")
+            return
+        found = self.ipsets.lookup(text)
+        self.ip_result_label.setText(f"✅ {found['ip']} входит в {', '.join(found['lists'])}" if found
+                                     else f"⛔ {text.strip()} не входит ни в один список")
+
+    def on_compact(self):
+        try:
+            result = self.ipsets.compact()
+        except OSError as e:
+            QMessageBox.warning(self, "Списки IP", str(e))
+            return
+        lines = [f"{name}: {before} → {after}" for name, (before, after) in sorted(result.items())]
+        QMessageBox.information(self, "Списки IP",
+                                "\n".join(lines) + "\nПереустановите сервис, чтобы winws перечитал списки.")
+        self.show_ipset_stats()
+
+    def done(self, result):
+        self.load_thread.wait()
+        super().done(result)
+
+
+class ScriptLogDialog(QDialog):
+    """Вывод служебных скриптов в реальном времени с полем ввода и остановкой."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Журнал скриптов")
+        self.setStyleSheet("background-color: #263238; color: #ffffff; font-size: 13px;")
+        self.resize(640, 420)
+        self.thread = None
+        layout = QVBoxLayout(self)
+        self.title_label = QLabel("")
+        layout.addWidget(self.title_label)
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setMaximumBlockCount(LOG_LINES)
+        self.view.setStyleSheet("font-family: Consolas, monospace; background-color: #1c262b;")
+        layout.addWidget(self.view)
+        self.input_edit = QLineEdit()
+        self.input_edit.setPlaceholderText("Ответ скрипту, Enter — отправить")
+        self.input_edit.setEnabled(False)
+        self.input_edit.returnPressed.connect(self.on_send)
+        layout.addWidget(self.input_edit)
+        self.stop_btn = QPushButton("⏹ Остановить")
+        self.stop_btn.setStyleSheet("background-color: #d32f2f; padding: 8px; border-radius: 5px;")
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.on_stop)
+        layout.addWidget(self.stop_btn)
+
+    def attach(self, thread: ScriptThread, title: str, interactive: bool = False):
+        self.thread = thread
+        self.title_label.setText(title)
+        self.view.appendPlainText(f"── {title} ──")
+        thread.line.connect(self.append_line)
+        thread.finished_script.connect(self.on_finished)
+        self.input_edit.setEnabled(interactive)
+        self.stop_btn.setEnabled(True)
+        if interactive:
+            self.input_edit.setFocus()
+
+    def append_line(self, stream: str, text: str):
+        prefix = {"stderr": "⚠ ", "stdin": "> "}.get(stream, "")
+        self.view.appendPlainText(prefix + text)
+
+    def on_send(self):
+        try:
+            self.thread.send(self.input_edit.text())
+        except (OSError, RuntimeError) as e:
+            self.append_line("stderr", str(e))
+        self.input_edit.clear()
+
+    def on_stop(self):
+        if self.thread is not None:
+            self.thread.cancel()
+
+    def on_finished(self, code, error: str):
+        self.view.appendPlainText(f"── код выхода {code} ──" if code is not None else f"── {error} ──")
+        self.input_edit.setEnabled(False)
+        self.stop_btn.setEnabled(False)
+
+
+class ReleasesDialog(QDialog):
+    """Сохранённые релизы: переключение на любой из них без скачивания."""
+
+    def __init__(self, parent=None, service_installed=False):
+        super().__init__(parent)
+        self.setWindowTitle("Сохранённые версии")
+        self.setStyleSheet("background-color: #263238; color: #ffffff; font-size: 14px;")
+        self.resize(480, 360)
+        self.service_installed = service_installed
+        self.rollback_thread = None
+        self.switched = False
+        layout = QVBoxLayout(self)
+        self.versions = core.cached_releases()
+        self.list = QListWidget()
+        for item in self.versions:
+            added = time.strftime("%d.%m.%Y %H:%M", time.localtime(item["added"]))
+            mark = "✅ " if item["active"] else ""
+            self.list.addItem(f"{mark}{item['release'] or item['sha256'][:12]}  —  "
+                              f"{item['size'] / 1024 / 1024:.1f} МБ, {added}")
+        layout.addWidget(self.list)
+        self.info_label = QLabel("" if self.versions else "Сохранённых версий пока нет: они появляются после обновления.")
+        self.info_label.setWordWrap(True)
+        layout.addWidget(self.info_label)
+        self.switch_btn = QPushButton("🕘 Переключиться")
+        self.switch_btn.setStyleSheet("background-color: #4caf50; padding: 8px; border-radius: 5px;")
+        self.switch_btn.setEnabled(bool(self.versions))
+        self.switch_btn.clicked.connect(self.on_switch)
+        layout.addWidget(self.switch_btn)
+
+    def on_switch(self):
+        row = self.list.currentRow()
+        if row < 0:
+            return
+        if self.service_installed:
+            QMessageBox.warning(self, "Сохранённые версии",
+                                "Перед сменой версии удалите установленный сервис, иначе его файлы будут заняты.")
+            return
+        self.switch_btn.setEnabled(False)
+        self.info_label.setText("Переключение...")
+        self.rollback_thread = RollbackThread(self.versions[row]["sha256"])
+        self.rollback_thread.finished_rollback.connect(self.on_switched)
+        self.rollback_thread.start()
+
+    def on_switched(self, success: bool, message: str):
+        self.switched = self.switched or success
+        self.info_label.setText(message)
+        self.switch_btn.setEnabled(True)
+
+    def done(self, result):
+        if self.rollback_thread is not None:
+            self.rollback_thread.wait()
+        super().done(result)
+
 
 class WelcomeDialog(QDialog):
     def __init__(self, parent=None):
@@ -204,8 +701,8 @@ class WelcomeDialog(QDialog):
             "<h2 style='color:#4caf50;'>Добро пожаловать в AUTOZAPRET!</h2>"
             "<p style='font-size:14px;'>Эта утилита, созданная <b>SpaceTrashPanda</b>, предназначена для быстрого и "
             "удобного обхода ограничений с помощью сервиса Zapret.</p>"
-            "<p style='font-size:14px;'>Вам будет предложено выбрать оптимальный вариант установки, после чего откроется "
-            "консоль с подробными инструкциями. Просто следуйте указаниям для успешной настройки сервиса.</p>"
+            "<p style='font-size:14px;'>Выберите вариант в списке — AUTOZAPRET сам ответит на вопросы установщика "
+            "и покажет его вывод в журнале.</p>"
             "<p style='font-size:14px;'>Нажмите 'OK', чтобы продолжить.</p>"
         )
         self.label = QLabel(message)
@@ -249,10 +746,46 @@ class AutoZapretGUI(QWidget):
         self.setWindowTitle("AUTOZAPRET")
         self.setGeometry(500, 200, 800, 500)
         self.file_list = []
+        self.scores = {}
+        self.strategy_index = StrategyIndex(EXTRACT_DIR, STRATEGY_INDEX_PATH)
+        self.app_state = core.app_state()
         self.current_filter = "all"
+        self.installing_variant = None
         self.download_mode = "normal"
+        self.awaiting_service_check = False
+        self.status_watcher = ServiceStatusWatcher(parent=self)
+        self.status_watcher.changed.connect(self.on_service_state)
+        self.status_watcher.checked.connect(self.on_status_checked)
+        self.welcome = None
+        self.deferred_prompts = []
+        self.failover = FailoverBridge(parent=self)
+        self.failover.decided.connect(self.on_failover_decision)
+        self.script_thread = None
+        self.script_log = ScriptLogDialog(self)
         self.init_ui()
-        self.prepare_update()
+        self.restore_snapshot()
+        QTimer.singleShot(0, self.prepare_update)
+
+    def restore_snapshot(self):
+        """Показывает последнее сохранённое состояние, пока фоновые проверки не вернули свежее."""
+        startup_timer.start("snapshot")
+        state = self.app_state
+        self.set_filter(state.get("filter", "all"))
+        release = state.get("release")
+        if release:
+            self.setWindowTitle(f"AUTOZAPRET — релиз {release}")
+        if os.path.isdir(EXTRACT_DIR):
+            self.scores = state.get("scores", {})
+            items = [info for info in map(self.strategy_index.get, state.get("variants", [])) if info]
+            if items:
+                self.show_variants(items)
+            variant = state.get("installed_variant")
+            if variant and state.get("status") in (RUNNING, STOPPED):
+                self.failover.scheduler.set_current(variant)
+        status = state.get("status")
+        if status is not None:
+            self.update_status(STATUS_TEXT.get(status, STATUS_TEXT[UNKNOWN]), state.get("status_time"))
+        startup_timer.finish("snapshot")
 
     def init_ui(self):
         main_layout = QHBoxLayout(self)
@@ -287,6 +820,30 @@ class AutoZapretGUI(QWidget):
         self.normal_btn.setStyleSheet(btn_style)
         self.normal_btn.clicked.connect(lambda: self.set_filter("normal"))
         sidebar.addWidget(self.normal_btn)
+        self.bench_btn = QPushButton("⚡ Подобрать лучший вариант")
+        self.bench_btn.setStyleSheet(btn_style)
+        self.bench_btn.clicked.connect(self.on_benchmark)
+        sidebar.addWidget(self.bench_btn)
+        self.failover_btn = QPushButton("🔁 Автопереключение")
+        self.failover_btn.setStyleSheet(btn_style)
+        self.failover_btn.setCheckable(True)
+        self.failover_btn.setToolTip("Переустанавливать сервис со следующим вариантом, если соединение "
+                                     "устойчиво деградирует")
+        self.failover_btn.toggled.connect(self.on_failover_toggled)
+        sidebar.addWidget(self.failover_btn)
+        self.lists_btn = QPushButton("🔎 Списки доменов и IP")
+        self.lists_btn.setStyleSheet(btn_style)
+        self.lists_btn.clicked.connect(self.show_lists)
+        sidebar.addWidget(self.lists_btn)
+        self.releases_btn = QPushButton("🕘 Версии")
+        self.releases_btn.setStyleSheet(btn_style)
+        self.releases_btn.setToolTip("Вернуть ранее скачанный релиз без обращения к сети")
+        self.releases_btn.clicked.connect(self.show_releases)
+        sidebar.addWidget(self.releases_btn)
+        self.log_btn = QPushButton("📜 Журнал скриптов")
+        self.log_btn.setStyleSheet(btn_style)
+        self.log_btn.clicked.connect(self.show_script_log)
+        sidebar.addWidget(self.log_btn)
         self.about_btn = QPushButton("ℹ️ О программе")
         self.about_btn.setStyleSheet(btn_style)
         self.about_btn.clicked.connect(self.show_about)
@@ -321,6 +878,10 @@ class AutoZapretGUI(QWidget):
         self.service_status_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.service_status_label.setStyleSheet("font-size: 20px; font-weight: bold;")
         content_layout.addWidget(self.service_status_label)
+        self.health_label = QLabel("Проверка соединения...")
+        self.health_label.setAlignment(Qt.AlignCenter)
+        self.health_label.setStyleSheet("font-size: 13px; color: #9E9E9E;")
+        content_layout.addWidget(self.health_label)
         btns_layout = QHBoxLayout()
         self.refresh_status_btn = QPushButton("🔄 Обновить статус")
         self.refresh_status_btn.setStyleSheet("""
@@ -337,93 +898,301 @@ class AutoZapretGUI(QWidget):
         """)
         self.refresh_status_btn.clicked.connect(self.check_service_status)
         btns_layout.addWidget(self.refresh_status_btn)
+        self.update_btn = QPushButton()
+        self.update_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #4caf50;
+                color: #ffffff;
+                padding: 10px;
+                border-radius: 5px;
+                font-size: 16px;
+            }
+            QPushButton:hover {
+                background-color: #388E3C;
+            }
+        """)
+        self.update_btn.clicked.connect(self.on_update_clicked)
+        self.update_btn.hide()
+        btns_layout.addWidget(self.update_btn)
+        self.cancel_download_btn = QPushButton("⏹ Остановить загрузку")
+        self.cancel_download_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #d32f2f;
+                color: #ffffff;
+                padding: 10px;
+                border-radius: 5px;
+                font-size: 16px;
+            }
+            QPushButton:hover {
+                background-color: #B71C1C;
+            }
+        """)
+        self.cancel_download_btn.clicked.connect(self.on_cancel_download)
+        self.cancel_download_btn.hide()
+        btns_layout.addWidget(self.cancel_download_btn)
         content_layout.addLayout(btns_layout)
-        self.files_container = QWidget()
-        self.files_layout = QVBoxLayout(self.files_container)
-        self.files_layout.setSpacing(10)
-        self.files_layout.setContentsMargins(0, 0, 0, 0)
-        self.scroll = QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        self.scroll.setWidget(self.files_container)
-        content_layout.addWidget(self.scroll)
+        self.empty_label = QLabel("Подходящих файлов для установки сервиса не найдено.")
+        self.empty_label.setAlignment(Qt.AlignCenter)
+        self.empty_label.hide()
+        content_layout.addWidget(self.empty_label)
+        self.strategy_model = StrategyListModel(self)
+        self.strategy_proxy = StrategyFilterProxy(self)
+        self.strategy_proxy.setSourceModel(self.strategy_model)
+        self.strategy_view = QListView()
+        self.strategy_view.setObjectName("strategyList")
+        self.strategy_view.setModel(self.strategy_proxy)
+        self.strategy_view.setItemDelegate(StrategyDelegate(self.strategy_view))
+        self.strategy_view.setUniformItemSizes(True)
+        self.strategy_view.setMouseTracking(True)
+        self.strategy_view.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.strategy_view.setSelectionMode(QListView.NoSelection)
+        self.strategy_view.clicked.connect(self.on_strategy_clicked)
+        content_layout.addWidget(self.strategy_view)
         main_layout.addLayout(content_layout, 4)
 
     def show_about(self):
         about = AboutDialog(self)
         about.exec()
 
+    def show_lists(self):
+        ListsDialog(self).exec()
+
+    def show_script_log(self):
+        self.script_log.show()
+        self.script_log.raise_()
+
+    def run_service_script(self, action, title: str, on_finished, interactive: bool = False) -> bool:
+        """Запускает скрипт сервиса с выводом в журнал; False, если предыдущий ещё работает."""
+        if self.script_thread is not None and self.script_thread.isRunning():
+            QMessageBox.warning(self, title, "Дождитесь завершения предыдущего скрипта или остановите его в журнале.")
+            self.show_script_log()
+            return False
+        self.script_thread = ScriptThread(action)
+        self.script_log.attach(self.script_thread, title, interactive)
+        self.script_thread.finished_script.connect(on_finished)
+        self.script_thread.start()
+        self.show_script_log()
+        return True
+
+    def show_releases(self):
+        dialog = ReleasesDialog(self, getattr(self, "service_state", None) in (RUNNING, STOPPED))
+        dialog.exec()
+        if dialog.switched:
+            self.reload_strategies()
+
     def set_filter(self, mode: str):
         self.current_filter = mode
-        self.populate_file_panels()
+        self.strategy_proxy.set_mode(mode)
+        self.app_state.update(filter=mode)
 
     def check_service_status(self):
         self.refresh_status_btn.setText("Проверка...")
         self.refresh_status_btn.setEnabled(False)
-        self.status_thread = ServiceStatusThread()
-        self.status_thread.status.connect(self.update_status)
-        self.status_thread.start()
+        self.status_watcher.refresh()
+
+    def on_service_state(self, state: str):
+        startup_timer.finish("status")
+        self.service_state = state
+        self.update_status(STATUS_TEXT.get(state, STATUS_TEXT[UNKNOWN]))
+        self.app_state.update(status=state, status_time=time.time())
+        if self.awaiting_service_check:
+            self.awaiting_service_check = False
+            if state in (RUNNING, STOPPED):
+                self.after_welcome(self.ask_remove_installed_service)
 
-    def update_status(self, status_text: str):
+    def on_status_checked(self, state: str):
+        self.refresh_status_btn.setText("🔄 Обновить статус")
+        self.refresh_status_btn.setEnabled(True)
+
+    def update_status(self, status_text: str, checked_at: float = None):
+        """``checked_at`` — время проверки для данных из снимка; такой статус помечается устаревшим."""
+        self.service_running = "запущен" in status_text.lower()
         color = "#4caf50" if "запущен" in status_text.lower() else "#d32f2f"
+        if checked_at is not None:
+            status_text += f" (данные от {time.strftime('%d.%m %H:%M', time.localtime(checked_at))})"
         self.service_status_label.setText(f"Статус сервиса: {status_text}")
         self.service_status_label.setStyleSheet(f"font-size: 24px; font-weight: bold; color: {color};")
-        self.refresh_status_btn.setText("🔄 Обновить статус")
-        self.refresh_status_btn.setEnabled(True)
 
     def prepare_update(self):
+        startup_timer.mark("first_paint")
+        self.health_monitor = HealthMonitorBridge(on_results=self.failover.scheduler.observe, parent=self)
+        self.health_monitor.updated.connect(self.on_health_update)
+        self.health_monitor.start()
         if os.path.exists(EXTRACT_DIR):
-            try:
-                output = subprocess.check_output("sc query zapret", shell=True, text=True, encoding="cp866")
-            except subprocess.CalledProcessError:
-                output = ""
-            if output:
-                reply = QMessageBox.question(
-                    self,
-                    "Сервис обнаружен",
-                    "Обнаружено, что сервис уже установлен. Желаете удалить установленный сервис?",
-                    QMessageBox.Yes | QMessageBox.No
-                )
-                if reply == QMessageBox.Yes:
-                    self.delete_service_directly()
-                    return
-                else:
-                    QMessageBox.information(self, "Обновление отменено",
-                                            "Обновление отменено. Используйте текущую установку сервиса.")
-                    self.populate_file_panels()
-                    self.check_service_status()
-                    return
-            else:
-                self.populate_file_panels()
-                self.check_service_status()
+            self.local_state_thread = LocalStateThread(self.strategy_index)
+            self.local_state_thread.loaded.connect(self.on_local_state_loaded)
+            self.local_state_thread.start()
+            self.awaiting_service_check = True
+            startup_timer.start("status")
+            self.status_watcher.start()
+            self.update_check_thread = UpdateCheckThread()
+            self.update_check_thread.available.connect(self.on_update_available)
+            self.update_check_thread.start()
         else:
             self.download_latest_release()
 
+    def on_local_state_loaded(self, scores: dict, release):
+        self.scores = scores
+        self.populate_file_panels()
+        self.show_release(release)
+
+    def show_release(self, release):
+        self.setWindowTitle(f"AUTOZAPRET — релиз {release}" if release else "AUTOZAPRET")
+        self.app_state.update(release=release)
+
+    def on_update_available(self, tag: str):
+        self.update_btn.setText(f"⬇ Обновить до {tag}")
+        fetcher = core.get_release_fetcher()
+        lines = [f"Источник: {fetcher.last_source}"]
+        for name, entry in fetcher.stats.items():
+            if entry.get("latency") is not None:
+                lines.append(f"{name}: {entry['latency'] * 1000:.0f} мс, ошибок {entry['failures']}")
+        self.update_btn.setToolTip("\n".join(lines))
+        self.update_btn.show()
+
+    def on_update_clicked(self):
+        if getattr(self, "service_state", None) in (RUNNING, STOPPED):
+            QMessageBox.warning(self, "Обновление",
+                                "Перед обновлением удалите установленный сервис, иначе его файлы будут заняты.")
+            return
+        self.update_btn.hide()
+        self.download_latest_release()
+
+    def after_welcome(self, callback):
+        """Откладывает диалог до закрытия окна приветствия, чтобы они не перекрывали друг друга."""
+        if self.welcome is not None and self.welcome.isVisible():
+            self.deferred_prompts.append(callback)
+        else:
+            callback()
+
+    def on_welcome_closed(self):
+        self.welcome = None
+        prompts, self.deferred_prompts = self.deferred_prompts, []
+        for callback in prompts:
+            callback()
+
+    def ask_remove_installed_service(self):
+        reply = QMessageBox.question(
+            self,
+            "Сервис обнаружен",
+            "Обнаружено, что сервис уже установлен. Желаете удалить установленный сервис?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.delete_service_directly()
+        else:
+            QMessageBox.information(self, "Обновление отменено",
+                                    "Обновление отменено. Используйте текущую установку сервиса.")
+
+    def on_health_update(self, summary: dict):
+        if not summary["samples"]:
+            return
+        ttfb = summary["ttfb"]
+        if ttfb["p50"] is None:
+            text = "Соединение: все проверки неудачны"
+        else:
+            text = (f"Отклик (TTFB): p50 {ttfb['p50'] * 1000:.0f} мс · p95 {ttfb['p95'] * 1000:.0f} мс · "
+                    f"p99 {ttfb['p99'] * 1000:.0f} мс")
+        text += f" · ошибок {summary['error_rate']:.0%}"
+        color = "#4caf50" if summary["error_rate"] < 0.05 else "#FFA500" if summary["error_rate"] < 0.5 else "#d32f2f"
+        self.health_label.setText(text)
+        self.health_label.setStyleSheet(f"font-size: 13px; color: {color};")
+        lines = []
+        for name, metric in (("TCP", "connect"), ("TLS", "tls"), ("TTFB", "ttfb")):
+            values = summary[metric]
+            if values["p50"] is not None:
+                lines.append(f"{name}: " + " / ".join(f"{p} {values[p] * 1000:.0f}" for p in ("p50", "p95", "p99")) + " мс")
+        lines.append(f"Проверок за 15 минут: {summary['samples']}")
+        self.health_label.setToolTip("\n".join(lines))
+
+    def on_failover_toggled(self, checked: bool):
+        self.failover.scheduler.enabled = checked
+        if checked and self.failover.scheduler.current is None:
+            QMessageBox.information(self, "Автопереключение",
+                                    "Автопереключение начнёт работу после установки сервиса из AUTOZAPRET.")
+
+    def on_failover_decision(self, decision: dict):
+        name = os.path.basename(decision["variant"] or "")
+        if decision["action"] == "switched":
+            self.app_state.update(installed_variant=decision["variant"])
+            self.status_watcher.boost()
+            self.check_service_status()
+        elif decision["action"] == "switch_failed" and self.failover.scheduler.current is None:
+            self.app_state.update(installed_variant=None)
+            self.status_watcher.boost()
+            self.check_service_status()
+        lines = []
+        for item in list(self.failover.scheduler.log)[-10:]:
+            stamp = time.strftime("%H:%M", time.localtime(item["time"]))
+            lines.append(f"{stamp} {FAILOVER_ACTIONS.get(item['action'], item['action'])}: "
+                         f"{os.path.basename(item['variant'] or '')} ({item['reason']})")
+        self.failover_btn.setToolTip("\n".join(lines))
+        self.failover_btn.setText(f"🔁 {FAILOVER_ACTIONS.get(decision['action'], decision['action'])}: {name}")
+
+    def closeEvent(self, event):
+        if getattr(self, "health_monitor", None) is not None:
+            self.health_monitor.stop()
+        self.status_watcher.stop()
+        if self.script_thread is not None and self.script_thread.isRunning():
+            self.script_thread.cancel()
+            self.script_thread.wait()
+        download_thread = getattr(self, "download_thread", None)
+        if download_thread is not None and download_thread.isRunning():
+            download_thread.cancel()
+            download_thread.wait()
+        bench_thread = getattr(self, "bench_thread", None)
+        if bench_thread is not None and bench_thread.isRunning():
+            bench_thread.cancel()
+            bench_thread.wait()
+        telemetry.flush()
+        self.app_state.flush()
+        super().closeEvent(event)
+
     def download_latest_release(self):
         self.download_mode = "normal"
         self.download_thread = DownloadThread()
         self.download_thread.finished.connect(self.on_download_finished)
+        self.download_thread.progress.connect(self.on_download_progress)
         self.download_thread.start()
+        self.cancel_download_btn.setEnabled(True)
+        self.cancel_download_btn.show()
+
+    def on_cancel_download(self):
+        self.cancel_download_btn.setEnabled(False)
+        self.download_thread.cancel()
+
+    def on_download_progress(self, downloaded: int, total: int, speed: float):
+        mb = 1024 * 1024
+        if total:
+            text = f"Загрузка: {downloaded * 100 // total}% ({downloaded / mb:.1f} из {total / mb:.1f} МБ, {speed / mb:.1f} МБ/с)"
+        else:
+            text = f"Загрузка: {downloaded / mb:.1f} МБ ({speed / mb:.1f} МБ/с)"
+        self.service_status_label.setText(text)
 
     def on_download_finished(self, success: bool, message: str):
+        self.cancel_download_btn.hide()
         if success:
-            QMessageBox.information(self, "Успех", message)
-            self.populate_file_panels()
+            self.reload_strategies()
             self.check_service_status()
+            self.after_welcome(lambda: QMessageBox.information(self, "Успех", message))
         else:
-            QMessageBox.critical(self, "Ошибка", message)
+            self.after_welcome(lambda: QMessageBox.critical(self, "Ошибка", message))
 
     def delete_service_directly(self):
-        service_remove_path = os.path.join(EXTRACT_DIR, "service_remove.bat")
-        if not os.path.exists(service_remove_path):
+        if not os.path.exists(os.path.join(EXTRACT_DIR, core.SERVICE_REMOVE)):
             QMessageBox.critical(self, "Ошибка", "Файл service_remove.bat не найден!")
             return
-        self.remove_thread = RemoveServiceThread(service_remove_path, EXTRACT_DIR)
-        self.remove_thread.finished_remove.connect(self.on_remove_finished)
-        self.remove_thread.start()
+        self.run_service_script(core.remove_service, "Удаление сервиса", self.on_remove_finished)
 
-    def on_remove_finished(self, out: str, err: str):
-        message = out if out else err
-        QMessageBox.information(self, "Результат удаления сервиса", message)
+    def on_remove_finished(self, code, error: str):
+        if code == 0:
+            self.app_state.update(installed_variant=None)
+            QMessageBox.information(self, "Результат удаления сервиса", "Сервис успешно удалён.")
+        else:
+            QMessageBox.critical(self, "Результат удаления сервиса",
+                                 error or f"Ошибка удаления сервиса: код выхода {code}. Подробности — в журнале.")
+        self.failover.scheduler.set_current(None)
+        self.status_watcher.boost()
         self.check_service_status()
 
     def on_delete_service(self):
@@ -436,52 +1205,69 @@ class AutoZapretGUI(QWidget):
         if reply == QMessageBox.Yes:
             self.delete_service_directly()
 
+    def reload_strategies(self):
+        from autozapret.delta_update import installed_release
+        self.strategy_index.refresh()
+        self.populate_file_panels()
+        self.show_release(installed_release(EXTRACT_DIR))
+
     def populate_file_panels(self):
-        for i in reversed(range(self.files_layout.count())):
-            widget = self.files_layout.itemAt(i).widget()
-            if widget is not None:
-                widget.deleteLater()
         try:
-            files = []
-            for fname in os.listdir(EXTRACT_DIR):
-                lower = fname.lower()
-                if lower.endswith(".bat") and all(x not in lower for x in ["service_remove", "check_updates", "service_install", "service_status"]):
-                    files.append(os.path.join(EXTRACT_DIR, fname))
-            if not files:
-                lbl = QLabel("Подходящих файлов для установки сервиса не найдено.")
-                lbl.setAlignment(Qt.AlignCenter)
-                self.files_layout.addWidget(lbl)
-                return
-            def sort_key(path):
-                name = os.path.basename(path).lower()
-                if name == "discord.bat":
-                    return (0, name)
-                elif name == "general.bat":
-                    return (1, name)
-                elif "alt" in name:
-                    return (2, name)
-                else:
-                    return (3, name)
-            files = sorted(files, key=sort_key)
-            self.file_list = files
-            filtered_files = []
-            for file_path in self.file_list:
-                fname = os.path.basename(file_path).lower()
-                if self.current_filter == "mgts":
-                    if "mgts" in fname or "мгтс" in fname:
-                        filtered_files.append(file_path)
-                elif self.current_filter == "normal":
-                    if ("mgts" not in fname and "мгтс" not in fname):
-                        filtered_files.append(file_path)
-                else:
-                    filtered_files.append(file_path)
-            for i, file_path in enumerate(filtered_files, start=1):
-                panel = FilePanel(file_path, i)
-                panel.clicked.connect(self.on_file_panel_clicked)
-                self.files_layout.addWidget(panel)
+            items = self.strategy_index.all(self.scores)
+            self.show_variants(items)
+            self.app_state.update(variants=self.file_list, scores=self.scores)
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить файлы из папки {EXTRACT_DIR}.\n{e}")
 
+    def show_variants(self, items):
+        self.file_list = [info["path"] for info in items]
+        self.failover.scheduler.set_candidates(
+            sorted(self.file_list, key=lambda path: -self.scores.get(path, -1)))
+        self.strategy_model.set_items(items, self.scores)
+        self.empty_label.setVisible(not items)
+        self.strategy_view.setVisible(bool(items))
+
+    def on_strategy_clicked(self, index):
+        info = index.data(InfoRole)
+        if info is not None:
+            self.on_file_panel_clicked(info["path"])
+
+    def on_benchmark(self):
+        if getattr(self, "service_running", False):
+            QMessageBox.warning(self, "Подбор варианта",
+                                "Сервис запущен и перехватывает трафик. Удалите сервис перед подбором варианта.")
+            return
+        if not self.file_list:
+            QMessageBox.warning(self, "Подбор варианта", "Нет вариантов для проверки.")
+            return
+        reply = QMessageBox.question(
+            self,
+            "Подбор варианта",
+            f"Будут по очереди запущены {len(self.file_list)} вариантов и проверена доступность "
+            f"Discord и YouTube. Это займёт несколько минут. Продолжить?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        self.bench_btn.setEnabled(False)
+        self.bench_thread = BenchmarkThread(self.file_list)
+        self.bench_thread.progress.connect(self.on_benchmark_progress)
+        self.bench_thread.finished_bench.connect(self.on_benchmark_finished)
+        self.bench_thread.start()
+
+    def on_benchmark_progress(self, index: int, total: int, name: str):
+        self.bench_btn.setText(f"⚡ Проверено {index} из {total}")
+
+    def on_benchmark_finished(self, success: bool, message: str):
+        self.bench_btn.setText("⚡ Подобрать лучший вариант")
+        self.bench_btn.setEnabled(True)
+        self.scores = core.load_scores()
+        self.populate_file_panels()
+        if success:
+            QMessageBox.information(self, "Подбор варианта", message)
+        else:
+            QMessageBox.critical(self, "Ошибка", message)
+
     def on_file_panel_clicked(self, file_path: str):
         base = os.path.basename(file_path)
         reply = QMessageBox.question(
@@ -494,48 +1280,44 @@ class AutoZapretGUI(QWidget):
             self.launch_install_prompt(file_path)
 
     def launch_install_prompt(self, selected_file: str):
-        menu_lines = []
-        for i, file in enumerate(self.file_list, start=1):
-            menu_lines.append(f"{i}. {os.path.basename(file)}")
-        menu_str = "<br>".join(menu_lines)
-        try:
-            recommended_index = self.file_list.index(selected_file) + 1
-        except ValueError:
-            recommended_index = "?"
-        instructions = (
-            f"<h2 style='color:#4caf50;'>🚀 Установка сервиса</h2>"
-            f"<p style='font-size:16px;'>Вы выбрали вариант установки, который отображается как "
-            f"<span style='background-color:#ffcc00; padding:4px 8px; border-radius:4px; color:#000; font-weight:bold;'>{recommended_index}</span>.</p>"
-            f"<p style='font-size:14px;'>Доступные варианты установки:</p>"
-            f"<p style='font-size:14px;'>{menu_str}</p>"
-            f"<p style='font-size:14px;'>После нажатия «ОК» откроется консоль, где вам будет предложено ввести номер выбранного варианта. "
-            f"Следуйте инструкциям в консоли для завершения установки сервиса.</p>"
-        )
-        instr_box = QMessageBox(self)
-        instr_box.setWindowTitle("Инструкция по установке")
-        instr_box.setTextFormat(Qt.RichText)
-        instr_box.setText(instructions)
-        instr_box.setIcon(QMessageBox.Information)
-        instr_box.setStandardButtons(QMessageBox.Ok)
-        instr_box.exec()
-        service_install_path = os.path.join(EXTRACT_DIR, "service_install.bat")
-        if not os.path.exists(service_install_path):
+        if not os.path.exists(os.path.join(EXTRACT_DIR, core.SERVICE_INSTALL)):
             QMessageBox.critical(self, "Ошибка", "Файл service_install.bat не найден!")
             return
-        self.install_thread = InstallServiceThread(service_install_path, EXTRACT_DIR)
-        self.install_thread.finished_install.connect(self.on_install_finished)
-        self.install_thread.start()
+        number = self.file_list.index(selected_file) + 1 if selected_file in self.file_list else None
 
-    def on_install_finished(self, out: str, err: str):
-        message = out if out else err
-        QMessageBox.information(self, "Результат установки сервиса", message)
+        def install(directory, **kwargs):
+            return core.install_service(directory, variant=selected_file, number=number, **kwargs)
+
+        if self.run_service_script(install, f"Установка сервиса: {os.path.basename(selected_file)}",
+                                   self.on_install_finished):
+            self.installing_variant = selected_file
+            self.failover.scheduler.set_current(selected_file)
+
+    def on_install_finished(self, code, error: str):
+        if code == 0:
+            self.app_state.update(installed_variant=self.installing_variant)
+            QMessageBox.information(self, "Результат установки сервиса",
+                                    "Сервис установлен. Статус сервиса обновится автоматически.")
+        else:
+            self.failover.scheduler.set_current(None)
+            QMessageBox.critical(self, "Результат установки сервиса",
+                                 error or f"Установщик завершился с кодом {code}. Подробности — в журнале.")
+        self.status_watcher.boost()
         self.check_service_status()
 
 
 if __name__ == '__main__':
+    startup_timer.mark("imports")
+    core.configure_telemetry("--trace" in sys.argv)
     app = QApplication(sys.argv)
-    welcome = WelcomeDialog()
-    welcome.exec()
+    app.setStyleSheet(APP_THEME)
+    startup_timer.start("window")
     window = AutoZapretGUI()
     window.show()
+    startup_timer.finish("window")
+    window.welcome = WelcomeDialog(window)
+    window.welcome.finished.connect(window.on_welcome_closed)
+    window.welcome.open()
+    if "--startup-report" in sys.argv:
+        app.aboutToQuit.connect(lambda: print(startup_timer.report()))
     sys.exit(app.exec())
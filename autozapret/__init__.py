@@ -0,0 +1 @@
+"""Компоненты AUTOZAPRET, не зависящие от Qt."""
@@ -0,0 +1,5 @@
+import sys
+
+from autozapret.cli import main
+
+sys.exit(main())
@@ -0,0 +1,84 @@
+"""Снимок состояния окна для мгновенного запуска.
+
+Хранит последний известный статус сервиса со временем проверки,
+установленный вариант, фильтр, порядок вариантов с оценками и версию
+релиза. Окно рисуется по снимку сразу, а свежие данные приходят позже.
+"""
+import json
+import os
+import threading
+import time
+
+STATE_VERSION = 1
+SAVE_DELAY = 1.0
+
+
+class AppState:
+    """Снимок в JSON‑файле ``path``.
+
+    ``update`` меняет значения в памяти и откладывает запись на
+    ``delay`` секунд: частые изменения объединяются в одну запись, которая
+    выполняется в фоновом потоке через временный файл и ``os.replace``.
+    ``flush`` записывает немедленно (при выходе).
+    """
+
+    def __init__(self, path: str, delay: float = SAVE_DELAY):
+        self.path = path
+        self.delay = delay
+        self.data = {}
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == STATE_VERSION:
+            self.data = data.get("state", {})
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            return self.data.get(key, default)
+
+    def update(self, **fields):
+        with self._lock:
+            changed = {key: value for key, value in fields.items() if self.data.get(key, None) != value}
+            if not changed:
+                return
+            self.data.update(changed)
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self._save)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self._save()
+
+    def _save(self):
+        with self._save_lock:
+            with self._lock:
+                self._timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                payload = json.dumps({"version": STATE_VERSION, "saved": time.time(), "state": self.data},
+                                     ensure_ascii=False)
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.path)
+                self.saves += 1
+            except OSError:
+                pass
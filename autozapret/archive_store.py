@@ -0,0 +1,194 @@
+"""Локальное хранилище скачанных релизов с адресацией по содержимому.
+
+Каждый релиз хранится как список файлов, а сами файлы — один раз в папке
+``blobs`` под своим SHA-256, поэтому одинаковые файлы разных версий не
+занимают место повторно. Версия определяется SHA-256 исходного архива.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zipfile
+
+from autozapret.delta_update import COPY_BUFFER, MANIFEST_NAME, _member_path, apply_files
+from autozapret.integrity import file_sha256
+
+DEFAULT_LIMIT = 512 * 1024 * 1024
+INDEX_VERSION = 1
+
+
+class ArchiveStore:
+    """Хранилище версий с вытеснением давно не использованных (LRU) сверх ``limit`` байт.
+
+    Установленная версия (``active``) не вытесняется.
+    """
+
+    def __init__(self, root: str, limit: int = DEFAULT_LIMIT):
+        self.root = root
+        self.limit = limit
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        self.versions = {}
+        self.active = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self.versions = data.get("versions", {})
+            self.active = data.get("active")
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "active": self.active, "versions": self.versions},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "blobs", sha256[:2], sha256)
+
+    def _known_blobs(self) -> dict:
+        """SHA-256 сохранённых файлов по размеру и CRC."""
+        return {(meta["size"], meta["crc"]): meta["sha256"]
+                for version in self.versions.values() for meta in version["files"].values()}
+
+    def _store_member(self, zf: zipfile.ZipFile, info: zipfile.ZipInfo, known: dict) -> tuple:
+        """Кладёт элемент архива в ``blobs``; возвращает SHA-256 и число записанных байт.
+
+        Если в хранилище уже есть файл с тем же размером и CRC, элемент
+        только хэшируется при чтении и при совпадении хэша на диск не пишется.
+        """
+        candidate = known.get((info.file_size, info.CRC))
+        if candidate is not None and os.path.exists(self.blob_path(candidate)):
+            sha = hashlib.sha256()
+            with zf.open(info) as src:
+                while True:
+                    block = src.read(COPY_BUFFER)
+                    if not block:
+                        break
+                    sha.update(block)
+            if sha.hexdigest() == candidate:
+                return candidate, 0
+        tmp_path = os.path.join(self.root, "blobs", f".tmp-{threading.get_ident()}")
+        os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+        sha = hashlib.sha256()
+        with zf.open(info) as src, open(tmp_path, "wb") as out:
+            while True:
+                block = src.read(COPY_BUFFER)
+                if not block:
+                    break
+                sha.update(block)
+                out.write(block)
+        digest = sha.hexdigest()
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return digest, info.file_size
+
+    def add(self, zip_path: str, release: str = None, sha256: str = None, active: bool = False) -> str:
+        """Сохраняет архив релиза, возвращает его SHA-256.
+
+        Уже сохранённый архив только отмечается как использованный.
+        ``sha256`` можно передать, если хэш посчитан при скачивании.
+        """
+        sha256 = sha256 or file_sha256(zip_path)
+        with self._lock:
+            now = time.time()
+            if sha256 not in self.versions:
+                files = {}
+                written = 0
+                known = self._known_blobs()
+                with zipfile.ZipFile(zip_path, "r") as zf:
+                    for info in zf.infolist():
+                        rel = _member_path(info.filename)
+                        if rel is None or rel == MANIFEST_NAME or info.is_dir():
+                            continue
+                        digest, size = self._store_member(zf, info, known)
+                        written += size
+                        known[(info.file_size, info.CRC)] = digest
+                        files[rel] = {"size": info.file_size, "crc": info.CRC, "sha256": digest}
+                self.versions[sha256] = {"release": release, "added": now, "files": files,
+                                         "size": sum(item["size"] for item in files.values()),
+                                         "written": written}
+            self.versions[sha256]["last_used"] = now
+            if active:
+                self.active = sha256
+            self._evict()
+            self._save()
+        return sha256
+
+    def list(self) -> list:
+        """Версии от недавно использованных к давним."""
+        with self._lock:
+            items = [{"sha256": sha, "release": v["release"], "added": v["added"],
+                      "last_used": v["last_used"], "size": v["size"], "files": len(v["files"]),
+                      "active": sha == self.active} for sha, v in self.versions.items()]
+        return sorted(items, key=lambda item: -item["last_used"])
+
+    def find(self, spec: str) -> str:
+        """SHA-256 версии по номеру релиза или началу хэша."""
+        with self._lock:
+            matches = [sha for sha, v in self.versions.items() if v["release"] == spec]
+            matches = matches or [sha for sha in self.versions if len(spec) >= 6 and sha.startswith(spec)]
+        if not matches:
+            raise LookupError(f"Версия «{spec}» не найдена в хранилище.")
+        return max(matches, key=lambda sha: self.versions[sha]["last_used"])
+
+    def activate(self, sha256: str, target_dir: str) -> dict:
+        """Переключает ``target_dir`` на сохранённую версию без обращения к сети."""
+        with self._lock:
+            version = self.versions.get(sha256)
+            if version is None:
+                raise LookupError("Версия не найдена в хранилище.")
+            files = {rel: (self.blob_path(meta["sha256"]), meta) for rel, meta in version["files"].items()}
+        missing = [rel for rel, (path, _) in files.items() if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"В хранилище нет файлов версии: {', '.join(missing[:3])}")
+        stats = apply_files(files, target_dir, release=version["release"])
+        with self._lock:
+            version["last_used"] = time.time()
+            self.active = sha256
+            self._save()
+        return stats
+
+    def disk_usage(self) -> int:
+        """Размер уникальных файлов всех версий."""
+        blobs = {}
+        for version in self.versions.values():
+            for meta in version["files"].values():
+                blobs[meta["sha256"]] = meta["size"]
+        return sum(blobs.values())
+
+    def _evict(self):
+        while self.disk_usage() > self.limit:
+            candidates = [sha for sha in self.versions if sha != self.active]
+            if not candidates:
+                break
+            del self.versions[min(candidates, key=lambda sha: self.versions[sha]["last_used"])]
+        self._collect_garbage()
+
+    def _collect_garbage(self):
+        used = {meta["sha256"] for version in self.versions.values() for meta in version["files"].values()}
+        blobs_dir = os.path.join(self.root, "blobs")
+        if not os.path.isdir(blobs_dir):
+            return
+        for prefix in os.listdir(blobs_dir):
+            folder = os.path.join(blobs_dir, prefix)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if name not in used:
+                    try:
+                        os.remove(os.path.join(folder, name))
+                    except OSError:
+                        pass
@@ -0,0 +1,225 @@
+"""Командная строка AUTOZAPRET: ``python -m autozapret <команда>``."""
+import argparse
+import json
+import sys
+import time
+
+from autozapret import core
+from autozapret.telemetry import telemetry
+
+
+def _print(args, data, text: str):
+    if args.json:
+        print(json.dumps(data, ensure_ascii=False))
+    else:
+        print(text)
+
+
+def cmd_update(args) -> int:
+    result = core.update(args.dir, delta=not args.full)
+    checksum = "совпадает с опубликованным" if result["checksum"] else "опубликованного нет"
+    _print(args, result,
+           f"Установлен релиз {result['release']}: новых {result['added']}, изменённых {result['changed']}, "
+           f"удалённых {result['removed']}, без изменений {result['unchanged']}.\n"
+           f"SHA-256 {result['sha256'][:16]}… ({checksum}), проверка: хэш {result['hash_seconds']:.2f} с, "
+           f"CRC {result['verified']} элементов {result['verify_seconds']:.2f} с.")
+    return 0
+
+
+def cmd_check(args) -> int:
+    tag = core.check_update(args.dir)
+    _print(args, {"update": tag}, f"Доступен релиз {tag}." if tag else "Установлена последняя версия.")
+    return 0
+
+
+def cmd_list(args) -> int:
+    scores = core.load_scores()
+    index = core.strategy_index(args.dir)
+    variants = index.all(scores)
+    shown = index.query(args.filter, scores)
+    numbers = {info["path"]: i for i, info in enumerate(variants, start=1)}
+    data = [{"number": numbers[info["path"]], "name": info["name"], "path": info["path"],
+             "score": scores.get(info["path"]), "mgts": info["mgts"], "desync": info["desync"],
+             "hostlists": info["hostlists"], "ipsets": info["ipsets"]} for info in shown]
+    lines = []
+    for item in data:
+        score = f"  ★ {item['score']}" if item["score"] is not None else ""
+        lines.append(f"{item['number']:>3}. {item['name']}{score}")
+    _print(args, data, "\n".join(lines) or "Подходящих файлов для установки сервиса не найдено.")
+    return 0
+
+
+def _print_line(args):
+    """Вывод скрипта: в терминал или, при ``--json``, в stderr, чтобы не портить JSON."""
+    out = sys.stderr if args.json else sys.stdout
+
+    def on_line(stream, text):
+        if stream != "stdin":
+            print(text, file=out, flush=True)
+    return on_line
+
+
+def cmd_install(args) -> int:
+    scores = core.load_scores()
+    info = core.resolve_variant(args.variant, args.dir, scores)
+    number = [v["path"] for v in core.list_variants(args.dir, scores=scores)].index(info["path"]) + 1
+    if not args.json:
+        print(f"Установка варианта {number}: {info['name']}.")
+    code = core.install_service(args.dir, variant=info["path"], number=number, on_line=_print_line(args))
+    _print(args, {"variant": info["name"], "number": number, "exit_code": code},
+           "Сервис установлен." if code == 0 else f"Установщик завершился с кодом {code}.")
+    return code
+
+
+def cmd_remove(args) -> int:
+    code = core.remove_service(args.dir, on_line=_print_line(args))
+    _print(args, {"exit_code": code}, "Сервис успешно удалён." if code == 0 else f"Ошибка удаления: код {code}.")
+    return code
+
+
+def cmd_status(args) -> int:
+    state = core.service_status()
+    _print(args, {"status": state}, state)
+    return 0
+
+
+def cmd_sources(args) -> int:
+    fetcher = core.get_release_fetcher()
+    data = []
+    for source in fetcher.order():
+        entry = fetcher.stats.get(source.name, {})
+        data.append({"name": source.name, "latency": entry.get("latency"), "samples": entry.get("samples", 0),
+                     "failures": entry.get("failures", 0)})
+    lines = []
+    for item in data:
+        latency = f"{item['latency'] * 1000:.0f} мс" if item["latency"] is not None else "нет данных"
+        lines.append(f"{item['name']}: {latency}, успешных {item['samples']}, ошибок {item['failures']}")
+    _print(args, data, "\n".join(lines))
+    return 0
+
+
+def cmd_versions(args) -> int:
+    data = core.cached_releases()
+    lines = []
+    for item in data:
+        mark = "*" if item["active"] else " "
+        used = time.strftime("%Y-%m-%d %H:%M", time.localtime(item["last_used"]))
+        lines.append(f"{mark} {item['release'] or '?'}  {item['sha256'][:12]}  "
+                     f"{item['size'] / 1024 / 1024:.1f} МБ  {used}")
+    _print(args, data, "\n".join(lines) or "Сохранённых версий нет.")
+    return 0
+
+
+def cmd_rollback(args) -> int:
+    started = time.perf_counter()
+    result = core.rollback(args.version, args.dir)
+    result["seconds"] = time.perf_counter() - started
+    _print(args, result, f"Установлена сохранённая версия {result['release']} за {result['seconds']:.2f} с: "
+           f"скопировано {result['added'] + result['changed']}, без изменений {result['unchanged']}.")
+    return 0
+
+
+def cmd_hostlist(args) -> int:
+    index = core.hostlist_index(args.dir)
+    if args.action == "stats":
+        stats = index.stats()
+        lines = [f"{name}: {count}" for name, count in sorted(stats["lists"].items())]
+        lines.append(f"Всего записей {stats['entries']}, уникальных {stats['unique']}, "
+                     f"покрытых родительским доменом {stats['redundant']}, некорректных {stats['invalid']}.")
+        _print(args, stats, "\n".join(lines))
+        return 0
+    if not args.domain:
+        raise ValueError("Укажите домен.")
+    if args.action == "check":
+        found = index.lookup(args.domain)
+        _print(args, found, f"{found['domain']}: запись {found['match']} в {', '.join(found['lists'])}."
+               if found else f"{args.domain} не входит ни в один список.")
+        return 0 if found else 1
+    if args.action == "add":
+        result = index.add(args.domain)
+        _print(args, result, f"{result['domain']} добавлен в {result['lists'][0]}." if result["added"]
+               else f"{result['domain']} уже покрыт записью {result['match']} в {', '.join(result['lists'])}.")
+        return 0
+    count = index.export(args.domain)
+    _print(args, {"path": args.domain, "entries": count}, f"Записано {count} доменов в {args.domain}.")
+    return 0
+
+
+def cmd_ipset(args) -> int:
+    index = core.ipset_index(args.dir)
+    if args.action == "stats":
+        stats = index.stats()
+        lines = [f"{name}: {item['entries']} → {item['cidrs']} CIDR" for name, item in sorted(stats["lists"].items())]
+        lines.append(f"Всего {stats['entries']} записей → {stats['cidrs']} CIDR, отрезков индекса {stats['segments']}, "
+                     f"поиск {stats['lookup_us']:.1f} мкс.")
+        _print(args, stats, "\n".join(lines))
+        return 0
+    if args.action == "compact":
+        result = index.compact()
+        _print(args, {name: {"before": before, "after": after} for name, (before, after) in result.items()},
+               "\n".join(f"{name}: {before} → {after}" for name, (before, after) in result.items())
+               or "Списки уже минимальны.")
+        return 0
+    if not args.ip:
+        raise ValueError("Укажите IP‑адрес.")
+    found = index.lookup(args.ip)
+    _print(args, found, f"{found['ip']} входит в {', '.join(found['lists'])}." if found
+           else f"{args.ip} не входит ни в один список.")
+    return 0 if found else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="autozapret", description="Управление сервисом Zapret без GUI.")
+    parser.add_argument("--dir", default=core.EXTRACT_DIR, help="папка со скриптами (по умолчанию ./ZAPRET)")
+    parser.add_argument("--json", action="store_true", help="вывод в формате JSON")
+    parser.add_argument("--trace", action="store_true",
+                        help=f"записать трассировку в {core.TRACE_PATH} и метрики в {core.METRICS_PATH}")
+    parser.add_argument("--profile", action="store_true", help=f"сохранить профиль cProfile в {core.PROFILE_PATH}")
+    sub = parser.add_subparsers(dest="command", required=True)
+    update = sub.add_parser("update", help="скачать и установить последний релиз")
+    update.add_argument("--full", action="store_true", help="распаковать все файлы, а не только изменённые")
+    update.set_defaults(func=cmd_update)
+    sub.add_parser("check", help="проверить наличие нового релиза").set_defaults(func=cmd_check)
+    list_cmd = sub.add_parser("list", help="показать варианты настроек")
+    list_cmd.add_argument("--filter", choices=["all", "mgts", "normal"], default="all")
+    list_cmd.set_defaults(func=cmd_list)
+    install = sub.add_parser("install", help="установить сервис для варианта (номер или имя файла)")
+    install.add_argument("variant")
+    install.set_defaults(func=cmd_install)
+    sub.add_parser("remove", help="удалить сервис").set_defaults(func=cmd_remove)
+    sub.add_parser("status", help="состояние сервиса").set_defaults(func=cmd_status)
+    sub.add_parser("sources", help="источники релизов в порядке опроса и их задержки").set_defaults(
+        func=cmd_sources)
+    sub.add_parser("versions", help="сохранённые релизы для отката").set_defaults(func=cmd_versions)
+    rollback = sub.add_parser("rollback", help="вернуть сохранённый релиз без скачивания")
+    rollback.add_argument("version", help="номер релиза или начало SHA-256 архива")
+    rollback.set_defaults(func=cmd_rollback)
+    hostlist = sub.add_parser("hostlist", help="списки доменов: проверка, добавление, сводка, экспорт")
+    hostlist.add_argument("action", choices=["check", "add", "stats", "export"])
+    hostlist.add_argument("domain", nargs="?", help="домен (для export — путь к файлу)")
+    hostlist.set_defaults(func=cmd_hostlist)
+    ipset = sub.add_parser("ipset", help="списки IP: проверка адреса, сводка, сжатие в CIDR")
+    ipset.add_argument("action", choices=["check", "stats", "compact"])
+    ipset.add_argument("ip", nargs="?")
+    ipset.set_defaults(func=cmd_ipset)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    core.configure_telemetry(args.trace, args.profile)
+    try:
+        with telemetry.span(f"cli.{args.command}"):
+            return args.func(args)
+    except Exception as e:
+        if args.json:
+            print(json.dumps({"error": str(e)}, ensure_ascii=False))
+        else:
+            print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    finally:
+        telemetry.flush()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
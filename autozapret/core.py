@@ -0,0 +1,348 @@
+"""Основные операции AUTOZAPRET без зависимости от Qt.
+
+Модуль используется и графическим интерфейсом, и командной строкой
+(``python -m autozapret``). Тяжёлые зависимости вроде ``requests``
+загружаются только при первом обращении к сети.
+"""
+import os
+import time
+
+from autozapret.service_status import default_backend
+from autozapret.strategy_index import StrategyIndex
+from autozapret.telemetry import BYTE_BUCKETS, telemetry
+
+GITHUB_API_RELEASE = "https://api.github.com/repos/Flowseal/zapret-discord-youtube/releases/latest"
+BASE_DIR = os.getcwd()
+EXTRACT_DIR = os.path.join(BASE_DIR, "ZAPRET")
+ZIP_PATH = os.path.join(BASE_DIR, "autozapret.zip")
+RELEASE_CACHE_PATH = os.path.join(BASE_DIR, "release_cache.json")
+RELEASE_CACHE_TTL = 15 * 60
+RELEASE_SOURCES_PATH = os.path.join(BASE_DIR, "release_sources.json")
+RELEASE_STATS_PATH = os.path.join(BASE_DIR, "release_sources_stats.json")
+BENCHMARK_PATH = os.path.join(BASE_DIR, "benchmark.json")
+STRATEGY_INDEX_PATH = os.path.join(BASE_DIR, "strategy_index.json")
+HOSTLIST_INDEX_PATH = os.path.join(BASE_DIR, "hostlist_index.json")
+FAILOVER_LOG_PATH = os.path.join(BASE_DIR, "failover_log.jsonl")
+ARCHIVE_STORE_DIR = os.path.join(BASE_DIR, "archive_store")
+ARCHIVE_STORE_LIMIT = 512 * 1024 * 1024
+TRACE_PATH = os.path.join(BASE_DIR, "trace.jsonl")
+METRICS_PATH = os.path.join(BASE_DIR, "metrics.prom")
+PROFILE_PATH = os.path.join(BASE_DIR, "profile.prof")
+STATE_PATH = os.path.join(BASE_DIR, "app_state.json")
+SERVICE_INSTALL = "service_install.bat"
+SERVICE_REMOVE = "service_remove.bat"
+# Без аргумента admin скрипты Flowseal перезапускают себя с повышением
+# прав (Start-Process -Verb RunAs) в отдельном окне, вывод которого не
+# перехватить.
+SERVICE_ARGS = ("admin",)
+SCRIPT_TIMEOUT = 10 * 60
+INSTALL_TIMEOUT = 2 * 60
+REMOVE_TIMEOUT = 2 * 60
+
+_http_session = None
+_release_fetcher = None
+_archive_store = None
+_supervisor = None
+_app_state = None
+
+
+def configure_telemetry(enabled: bool = False, profiling: bool = False):
+    """Задаёт пути телеметрии рядом с программой; вызывается при запуске CLI и GUI.
+
+    Телеметрия включается флагом ``enabled`` или переменной окружения
+    ``AUTOZAPRET_TRACE=1``.
+    """
+    telemetry.configure(TRACE_PATH, METRICS_PATH, PROFILE_PATH,
+                        enabled=enabled or profiling or os.environ.get("AUTOZAPRET_TRACE") == "1")
+    telemetry.profiling = profiling
+
+
+def http_session():
+    """Общая сессия requests с пулом keep-alive соединений."""
+    global _http_session
+    if _http_session is None:
+        from autozapret.release_sources import make_session
+        _http_session = make_session()
+    return _http_session
+
+
+def get_release_fetcher():
+    """Источники релиза из release_sources.json (по умолчанию только GitHub)."""
+    global _release_fetcher
+    if _release_fetcher is None:
+        from autozapret.release_sources import ReleaseFetcher, load_sources
+        sources = load_sources(RELEASE_SOURCES_PATH, GITHUB_API_RELEASE, RELEASE_CACHE_PATH,
+                               RELEASE_CACHE_TTL, http_session())
+        _release_fetcher = ReleaseFetcher(sources, RELEASE_STATS_PATH)
+    return _release_fetcher
+
+
+def _fetch_release() -> dict:
+    with telemetry.span("release.lookup") as span:
+        release = get_release_fetcher().fetch()
+        span.set(source=release.get("source"), release=release["tag"])
+    return release
+
+
+def get_latest_release() -> tuple:
+    """Возвращает версию последнего релиза и ссылку на его zip‑архив (или путь к локальному архиву)."""
+    release = _fetch_release()
+    return release["tag"], release["url"]
+
+
+def get_latest_release_zip_url() -> str:
+    """Запрашивает GitHub API и возвращает ссылку на zip‑архив последнего релиза."""
+    return get_latest_release()[1]
+
+
+def check_update(target_dir: str = EXTRACT_DIR):
+    """Возвращает версию нового релиза или None, если установлена последняя."""
+    from autozapret.delta_update import installed_release
+    tag, _ = get_latest_release()
+    return tag if tag and tag != installed_release(target_dir) else None
+
+
+def update(target_dir: str = EXTRACT_DIR, delta: bool = True, progress=None, on_downloader=None) -> dict:
+    """Скачивает последний релиз и обновляет ``target_dir``.
+
+    ``on_downloader`` получает созданный ``RangeDownloader``, чтобы
+    вызывающий код мог отменить загрузку. SHA-256 архива считается при
+    скачивании и сверяется с опубликованным, если источник его указал;
+    при несовпадении папка не меняется. Без опубликованной суммы CRC
+    проверяются и у элементов, которые не распаковываются.
+    """
+    with telemetry.span("update", delta=delta) as span:
+        stats = _update(target_dir, delta, progress, on_downloader)
+        span.set(release=stats["release"], changed=stats.get("changed"))
+    return stats
+
+
+def _update(target_dir: str, delta: bool, progress, on_downloader) -> dict:
+    from autozapret.downloader import RangeDownloader
+    from autozapret.integrity import check_digest, file_sha256
+    release = _fetch_release()
+    tag, zip_url, expected = release["tag"], release["url"], release.get("sha256")
+    if os.path.isfile(zip_url):
+        with telemetry.span("verify", path=zip_url):
+            started = time.perf_counter()
+            sha256 = file_sha256(zip_url)
+            check_digest(sha256, expected)
+        verify = {"sha256": sha256, "checksum": bool(expected), "hash_seconds": time.perf_counter() - started,
+                  "hash_reread": os.path.getsize(zip_url)}
+        stats = _extract(zip_url, target_dir, delta, tag, expected)
+        _remember_archive(zip_url, tag, sha256)
+        return {"release": tag, **verify, **stats}
+    downloader = RangeDownloader(zip_url, ZIP_PATH, session=http_session(), progress=progress,
+                                 expected_sha256=expected)
+    if on_downloader is not None:
+        on_downloader(downloader)
+    with telemetry.span("download", source=release.get("source")) as span:
+        downloader.download()
+        size = os.path.getsize(ZIP_PATH)
+        span.set(bytes=size, hash_seconds=round(downloader.hasher.seconds, 6), hash_reread=downloader.hasher.reread)
+    telemetry.count("autozapret_download_bytes_total", size)
+    telemetry.observe("autozapret_download_size_bytes", size, buckets=BYTE_BUCKETS)
+    verify = {"sha256": downloader.sha256, "checksum": bool(expected),
+              "hash_seconds": downloader.hasher.seconds, "hash_reread": downloader.hasher.reread}
+    stats = _extract(ZIP_PATH, target_dir, delta, tag, expected)
+    _remember_archive(ZIP_PATH, tag, downloader.sha256)
+    os.remove(ZIP_PATH)
+    return {"release": tag, **verify, **stats}
+
+
+def _extract(zip_path: str, target_dir: str, delta: bool, tag: str, expected) -> dict:
+    from autozapret.delta_update import apply_update
+    with telemetry.span("extract", delta=delta) as span:
+        stats = apply_update(zip_path, target_dir, delta=delta, release=tag, verify=not expected)
+        span.set(**{key: value for key, value in stats.items() if isinstance(value, (int, float, str))})
+    return stats
+
+
+def archive_store():
+    """Хранилище скачанных релизов для отката без сети."""
+    global _archive_store
+    if _archive_store is None:
+        from autozapret.archive_store import ArchiveStore
+        _archive_store = ArchiveStore(ARCHIVE_STORE_DIR, ARCHIVE_STORE_LIMIT)
+    return _archive_store
+
+
+def _remember_archive(zip_path: str, release: str, sha256: str = None):
+    try:
+        archive_store().add(zip_path, release, sha256=sha256, active=True)
+    except OSError:
+        pass
+
+
+def cached_releases() -> list:
+    """Сохранённые версии, начиная с недавно использованных."""
+    return archive_store().list()
+
+
+def rollback(spec: str, target_dir: str = EXTRACT_DIR) -> dict:
+    """Переключает ``target_dir`` на сохранённую версию (номер релиза или начало SHA-256)."""
+    store = archive_store()
+    sha256 = store.find(spec)
+    with telemetry.span("rollback", sha256=sha256):
+        stats = store.activate(sha256, target_dir)
+    return {"release": store.versions[sha256]["release"], "sha256": sha256, **stats}
+
+
+def load_scores() -> dict:
+    from autozapret.strategy_bench import load_scores
+    return load_scores(BENCHMARK_PATH)
+
+
+def strategy_index(directory: str = EXTRACT_DIR) -> StrategyIndex:
+    cache_path = STRATEGY_INDEX_PATH if directory == EXTRACT_DIR else None
+    index = StrategyIndex(directory, cache_path)
+    index.refresh()
+    return index
+
+
+def list_variants(directory: str = EXTRACT_DIR, mode: str = "all", scores=None):
+    """Варианты в порядке показа в интерфейсе; номер варианта — позиция в полном списке."""
+    return strategy_index(directory).query(mode, scores if scores is not None else load_scores())
+
+
+def resolve_variant(spec: str, directory: str = EXTRACT_DIR, scores=None) -> dict:
+    """Находит вариант по номеру, имени файла (с .bat или без) или пути."""
+    variants = list_variants(directory, scores=scores)
+    if spec.isdigit() and 1 <= int(spec) <= len(variants):
+        return variants[int(spec) - 1]
+    wanted = os.path.basename(spec).lower()
+    for info in variants:
+        name = info["name"].lower()
+        if wanted in (name, name[:-len(".bat")]):
+            return info
+    raise LookupError(f"Вариант «{spec}» не найден.")
+
+
+def hostlist_index(directory: str = EXTRACT_DIR):
+    """Индекс списков доменов из ``<directory>/lists``."""
+    from autozapret.hostlists import HostlistIndex
+    cache_path = HOSTLIST_INDEX_PATH if directory == EXTRACT_DIR else None
+    index = HostlistIndex(os.path.join(directory, "lists"), cache_path)
+    index.refresh()
+    return index
+
+
+def ipset_index(directory: str = EXTRACT_DIR):
+    """Интервальный индекс ipset‑списков из ``<directory>/lists``."""
+    from autozapret.ipsets import IpsetIndex
+    index = IpsetIndex(os.path.join(directory, "lists"))
+    index.refresh()
+    return index
+
+
+def supervisor():
+    """Общий запуск служебных скриптов: не больше одного одновременно."""
+    global _supervisor
+    if _supervisor is None:
+        from autozapret.supervisor import ProcessSupervisor
+        _supervisor = ProcessSupervisor(max_concurrent=1)
+    return _supervisor
+
+
+def run_script(path: str, cwd: str, timeout: float = SCRIPT_TIMEOUT, on_line=None, on_job=None,
+               interactive: bool = False, args=()) -> int:
+    """Запускает скрипт с аргументами ``args`` и возвращает его код выхода.
+
+    ``on_line(поток, строка)`` получает вывод по мере появления,
+    ``on_job`` — созданный Job, чтобы вызывающий код мог отменить его или
+    отправить ввод.
+    """
+    job = supervisor().submit(path, cwd, timeout, interactive=interactive, on_line=on_line, args=args)
+    if on_job is not None:
+        on_job(job)
+    return job.wait()
+
+
+def is_elevated() -> bool:
+    """Запущена ли программа с правами администратора (вне Windows — всегда да)."""
+    if os.name != "nt":
+        return True
+    try:
+        import ctypes
+        return bool(ctypes.windll.shell32.IsUserAnAdmin())
+    except (ImportError, AttributeError, OSError):
+        return False
+
+
+def _script(directory: str, name: str) -> str:
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Файл {name} не найден!")
+    if not is_elevated():
+        raise PermissionError("Для работы со службой запустите программу от имени администратора.")
+    return path
+
+
+def install_service(directory: str = EXTRACT_DIR, variant: str = None, number: int = None, on_line=None,
+                    on_job=None) -> int:
+    """Запускает service_install.bat.
+
+    С ``variant`` (путь или имя .bat) установка идёт без участия
+    пользователя: номер варианта берётся из меню установщика, а если его не
+    удалось разобрать — ``number``. Без ``variant`` номер передаётся через
+    ``Job.send``.
+    """
+    path = _script(directory, SERVICE_INSTALL)
+    with telemetry.span("install", variant=variant and os.path.basename(variant)) as span:
+        code = _install(path, directory, variant, number, on_line, on_job)
+        span.set(exit_code=code)
+    return code
+
+
+def _install(path: str, directory: str, variant, number, on_line, on_job) -> int:
+    if variant is None:
+        return run_script(path, directory, on_line=on_line, on_job=on_job, interactive=True, args=SERVICE_ARGS)
+    from autozapret.installer import InstallerDriver
+    from autozapret.supervisor import ScriptCancelled
+    driver = InstallerDriver(variant, number)
+
+    def feed(stream, text):
+        driver.feed(stream, text)
+        if on_line is not None:
+            on_line(stream, text)
+
+    def attach(job):
+        driver.attach(job)
+        if on_job is not None:
+            on_job(job)
+
+    try:
+        code = run_script(path, directory, timeout=INSTALL_TIMEOUT, on_line=feed, on_job=attach, interactive=True,
+                          args=SERVICE_ARGS)
+    except ScriptCancelled:
+        if driver.error is not None:
+            raise driver.error
+        raise
+    if driver.answered is None and code == 0:
+        raise RuntimeError("Установщик не запросил номер варианта: формат service_install.bat изменился.")
+    return code
+
+
+def remove_service(directory: str = EXTRACT_DIR, on_line=None, on_job=None) -> int:
+    with telemetry.span("remove") as span:
+        code = run_script(_script(directory, SERVICE_REMOVE), directory, timeout=REMOVE_TIMEOUT,
+                          on_line=on_line, on_job=on_job, args=SERVICE_ARGS)
+        span.set(exit_code=code)
+    return code
+
+
+def app_state():
+    """Снимок состояния окна из app_state.json для мгновенного запуска."""
+    global _app_state
+    if _app_state is None:
+        from autozapret.app_state import AppState
+        _app_state = AppState(STATE_PATH)
+    return _app_state
+
+
+def service_status(backend=None) -> str:
+    backend = backend or default_backend()
+    with telemetry.span("status.query", backend=type(backend).__name__) as span:
+        state = backend.query()
+        span.set(state=state)
+    return state
@@ -0,0 +1,266 @@
+"""Инкрементальное обновление папки ZAPRET из zip-архива релиза."""
+import hashlib
+import json
+import os
+import shutil
+import time
+import zipfile
+import zlib
+
+from autozapret.integrity import IntegrityError, MemberVerifier
+
+MANIFEST_NAME = ".autozapret-manifest.json"
+COPY_BUFFER = 1024 * 1024
+PRESERVE = ("lists/list-general-user.txt", "lists/list-exclude-user.txt", "lists/ipset-exclude-user.txt")
+
+
+def _staging_path(target_dir: str) -> str:
+    return target_dir.rstrip("\\/") + ".staging"
+
+
+def _backup_path(target_dir: str) -> str:
+    return target_dir.rstrip("\\/") + ".old"
+
+
+def _member_path(name: str):
+    """Возвращает безопасный относительный путь элемента архива или None."""
+    parts = [p for p in name.replace("\\", "/").split("/") if p not in ("", ".")]
+    if not parts or ".." in parts or ":" in parts[0]:
+        return None
+    return "/".join(parts)
+
+
+def _read_manifest(target_dir: str) -> dict:
+    try:
+        with open(os.path.join(target_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_manifest(target_dir: str) -> dict:
+    return _read_manifest(target_dir).get("files", {})
+
+
+def installed_release(target_dir: str):
+    """Версия релиза, из которого установлена папка, или None."""
+    return _read_manifest(target_dir).get("release")
+
+
+def _write_manifest(target_dir: str, files: dict, release=None):
+    with open(os.path.join(target_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "release": release, "files": files}, f,
+                  ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def _file_digest(path: str):
+    crc = 0
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(COPY_BUFFER)
+            if not block:
+                return crc, sha.hexdigest()
+            crc = zlib.crc32(block, crc)
+            sha.update(block)
+
+
+def recover(target_dir: str):
+    """Доводит до конца или откатывает прерванную замену папки."""
+    backup = _backup_path(target_dir)
+    if os.path.isdir(backup):
+        if os.path.isdir(target_dir):
+            shutil.rmtree(backup, ignore_errors=True)
+        else:
+            os.replace(backup, target_dir)
+    staging = _staging_path(target_dir)
+    if os.path.isdir(staging):
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _unchanged_digest(target_dir: str, rel: str, info: zipfile.ZipInfo, entry):
+    """Возвращает SHA-256 установленного файла, если он совпадает с элементом архива."""
+    path = os.path.join(target_dir, *rel.split("/"))
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if st.st_size != info.file_size:
+        return None
+    if (entry and entry.get("crc") == info.CRC and entry.get("size") == st.st_size
+            and entry.get("mtime") == st.st_mtime_ns and entry.get("sha256")):
+        return entry["sha256"]
+    crc, sha256 = _file_digest(path)
+    return sha256 if crc == info.CRC else None
+
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _extract_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, dst: str) -> str:
+    """Распаковывает элемент; CRC сверяет zipfile по ходу чтения, размер — здесь."""
+    sha = hashlib.sha256()
+    size = 0
+    try:
+        with zf.open(info) as src, open(dst, "wb") as out:
+            while True:
+                block = src.read(COPY_BUFFER)
+                if not block:
+                    break
+                sha.update(block)
+                out.write(block)
+                size += len(block)
+    except (zipfile.BadZipFile, EOFError) as e:
+        raise IntegrityError(f"{info.filename}: {e}") from e
+    if size != info.file_size:
+        raise IntegrityError(f"{info.filename}: размер {size} вместо {info.file_size}.")
+    return sha.hexdigest()
+
+
+def apply_update(zip_path: str, target_dir: str, delta: bool = True, release: str = None,
+                 verify: bool = True) -> dict:
+    """Обновляет ``target_dir`` содержимым архива через промежуточную папку.
+
+    Неизменённые файлы переносятся в промежуточную папку жёсткими ссылками,
+    из архива распаковываются только новые и изменённые элементы, удалённые
+    из релиза файлы не переносятся. Готовая папка подменяет текущую
+    переименованием, поэтому сбой посреди распаковки не портит установку.
+    ``release`` сохраняется в манифесте как установленная версия.
+    CRC и размер распакованных элементов проверяются при распаковке,
+    пропущенных (``verify``) — параллельно в пуле потоков; при ошибке
+    бросается IntegrityError до замены папки.
+    Возвращает статистику: сколько файлов добавлено, изменено, удалено,
+    оставлено, сколько байт записано и сколько элементов проверено в пуле.
+    """
+    recover(target_dir)
+    manifest = load_manifest(target_dir) if delta and os.path.isdir(target_dir) else {}
+    staging = _staging_path(target_dir)
+    os.makedirs(staging)
+    stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0, "bytes_written": 0,
+             "verified": 0, "verify_seconds": 0.0}
+    files = {}
+    try:
+        with zipfile.ZipFile(zip_path, "r") as zf, MemberVerifier(zip_path) as verifier:
+            for info in zf.infolist():
+                rel = _member_path(info.filename)
+                if rel is None or rel == MANIFEST_NAME:
+                    continue
+                dst = os.path.join(staging, *rel.split("/"))
+                if info.is_dir():
+                    os.makedirs(dst, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                live = os.path.join(target_dir, *rel.split("/"))
+                if rel in PRESERVE and os.path.isfile(live):
+                    continue
+                sha256 = _unchanged_digest(target_dir, rel, info, manifest.get(rel)) if delta else None
+                if sha256 is not None:
+                    _link_or_copy(live, dst)
+                    stats["unchanged"] += 1
+                    if verify:
+                        verifier.submit(info)
+                else:
+                    sha256 = _extract_member(zf, info, dst)
+                    stats["bytes_written"] += info.file_size
+                    stats["changed" if os.path.exists(live) else "added"] += 1
+                st = os.stat(dst)
+                files[rel] = {"size": info.file_size, "crc": info.CRC, "sha256": sha256,
+                              "mtime": st.st_mtime_ns}
+            waited = time.perf_counter()
+            verifier.wait()
+            stats["verified"] = verifier.checked
+            stats["verify_seconds"] = verifier.seconds
+            stats["verify_wait"] = time.perf_counter() - waited
+        _finish_staging(target_dir, staging, manifest, files, stats, release)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _swap(target_dir, staging)
+    return stats
+
+
+def apply_files(files: dict, target_dir: str, delta: bool = True, release: str = None) -> dict:
+    """Собирает ``target_dir`` из готовых файлов так же, как ``apply_update`` из архива.
+
+    ``files`` — ``{относительный путь: (путь к файлу, {"size", "crc", "sha256"})}``.
+    Файл, совпадающий по SHA-256 с установленным, переносится из текущей
+    папки, остальные копируются.
+    """
+    recover(target_dir)
+    manifest = load_manifest(target_dir) if delta and os.path.isdir(target_dir) else {}
+    staging = _staging_path(target_dir)
+    os.makedirs(staging)
+    stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0, "bytes_written": 0}
+    result = {}
+    try:
+        for rel, (src, meta) in files.items():
+            dst = os.path.join(staging, *rel.split("/"))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            live = os.path.join(target_dir, *rel.split("/"))
+            if rel in PRESERVE and os.path.isfile(live):
+                continue
+            entry = manifest.get(rel)
+            try:
+                st = os.stat(live)
+            except OSError:
+                st = None
+            if (st is not None and entry and entry.get("sha256") == meta["sha256"]
+                    and entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime_ns):
+                _link_or_copy(live, dst)
+                stats["unchanged"] += 1
+            else:
+                shutil.copyfile(src, dst)
+                stats["bytes_written"] += meta["size"]
+                stats["changed" if st is not None else "added"] += 1
+            result[rel] = {**meta, "mtime": os.stat(dst).st_mtime_ns}
+        _finish_staging(target_dir, staging, manifest, result, stats, release)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _swap(target_dir, staging)
+    return stats
+
+
+def _finish_staging(target_dir: str, staging: str, manifest: dict, files: dict, stats: dict, release):
+    for rel in manifest:
+        if rel not in files and rel not in PRESERVE:
+            stats["removed"] += 1
+    if manifest:
+        _keep_user_files(target_dir, staging, manifest, files)
+    _keep_preserved(target_dir, staging)
+    _write_manifest(staging, files, release)
+
+
+def _swap(target_dir: str, staging: str):
+    backup = _backup_path(target_dir)
+    if os.path.isdir(target_dir):
+        os.replace(target_dir, backup)
+    os.replace(staging, target_dir)
+    shutil.rmtree(backup, ignore_errors=True)
+
+
+def _keep_preserved(target_dir: str, staging: str):
+    """Переносит пользовательские списки ``PRESERVE``, даже если релиз приносит свою версию."""
+    for rel in PRESERVE:
+        src = os.path.join(target_dir, *rel.split("/"))
+        dst = os.path.join(staging, *rel.split("/"))
+        if os.path.isfile(src) and not os.path.exists(dst):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            _link_or_copy(src, dst)
+
+
+def _keep_user_files(target_dir: str, staging: str, manifest: dict, files: dict):
+    """Переносит файлы, которые не приходили из релиза (например, свои списки)."""
+    for root, _dirs, names in os.walk(target_dir):
+        for name in names:
+            src = os.path.join(root, name)
+            rel = os.path.relpath(src, target_dir).replace(os.sep, "/")
+            if rel == MANIFEST_NAME or rel in manifest or rel in files:
+                continue
+            dst = os.path.join(staging, *rel.split("/"))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            _link_or_copy(src, dst)
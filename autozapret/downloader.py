@@ -0,0 +1,310 @@
+"""Многопоточная загрузка с докачкой по HTTP Range."""
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+import requests
+
+from autozapret.integrity import IntegrityError, StreamHasher, check_digest
+from autozapret.telemetry import telemetry
+
+CHUNK_SIZE = 1024 * 1024
+READ_SIZE = 64 * 1024
+SEGMENTS = 4
+MIN_SEGMENT_SIZE = 2 * 1024 * 1024
+RETRIES = 5
+PROGRESS_INTERVAL = 0.2
+STATE_INTERVAL = 1.0
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+class RangeNotSupported(Exception):
+    pass
+
+
+class _Throughput:
+    """Скорость загрузки по скользящему окну в несколько секунд."""
+
+    def __init__(self, window: float = 3.0):
+        self.window = window
+        self.samples = deque()
+
+    def add(self, now: float, total: int) -> float:
+        self.samples.append((now, total))
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+        first_time, first_total = self.samples[0]
+        elapsed = now - first_time
+        return (total - first_total) / elapsed if elapsed > 0 else 0.0
+
+
+class RangeDownloader:
+    """Скачивает файл параллельными сегментами и докачивает его после обрыва.
+
+    Промежуточные данные хранятся в ``<dest>.part``, а позиции сегментов —
+    в ``<dest>.part.json``. Если сервер не поддерживает Range, файл
+    загружается одним потоком. SHA-256 считается по мере поступления
+    данных (``sha256`` после загрузки); при несовпадении с ``expected_sha256``
+    загрузка удаляется и бросается IntegrityError.
+    """
+
+    def __init__(self, url: str, dest_path: str, session=None, segments: int = SEGMENTS,
+                 chunk_size: int = CHUNK_SIZE, retries: int = RETRIES, timeout: float = 30,
+                 progress=None, expected_sha256: str = None):
+        self.url = url
+        self.dest_path = dest_path
+        self.part_path = dest_path + ".part"
+        self.state_path = dest_path + ".part.json"
+        self.session = session or requests.Session()
+        self.segments = max(1, segments)
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+        self.progress = progress
+        self.expected_sha256 = expected_sha256
+        self.hasher = StreamHasher()
+        self.sha256 = None
+        self._cancel = threading.Event()
+        self._abort = threading.Event()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._state = None
+        self._total = 0
+        self._downloaded = 0
+        self._throughput = _Throughput()
+        self._last_progress = 0.0
+        self._last_state_save = 0.0
+
+    def cancel(self):
+        self._cancel.set()
+
+    def download(self) -> str:
+        size, ranges, validator = self._probe()
+        if ranges and size:
+            try:
+                self._download_ranges(size, validator)
+                return self._finish()
+            except RangeNotSupported:
+                self._discard_part()
+        self._download_single()
+        return self._finish()
+
+    def _probe(self):
+        """Определяет размер файла и поддержку Range запросом первого байта."""
+        headers = {"Range": "bytes=0-0"}
+        with self.session.get(self.url, headers=headers, stream=True, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified") or ""
+            if resp.status_code == 206:
+                content_range = resp.headers.get("Content-Range", "")
+                total = content_range.rpartition("/")[2]
+                if total.isdigit():
+                    return int(total), True, validator
+                return 0, False, validator
+            length = resp.headers.get("Content-Length", "")
+            return (int(length) if length.isdigit() else 0), False, validator
+
+    def _load_state(self, size: int, validator: str):
+        if not (os.path.exists(self.state_path) and os.path.exists(self.part_path)):
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (state.get("url") != self.url or state.get("size") != size
+                or state.get("validator") != validator
+                or os.path.getsize(self.part_path) != size):
+            return None
+        return state
+
+    def _save_state(self, force: bool = False):
+        with self._save_lock:
+            now = time.monotonic()
+            if not force and now - self._last_state_save < STATE_INTERVAL:
+                return
+            self._last_state_save = now
+            with self._lock:
+                data = json.dumps(self._state)
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.state_path)
+
+    def _plan_segments(self, size: int):
+        count = max(1, min(self.segments, size // MIN_SEGMENT_SIZE))
+        step = size // count
+        segments = []
+        for i in range(count):
+            start = i * step
+            end = size - 1 if i == count - 1 else start + step - 1
+            segments.append({"start": start, "end": end, "pos": start})
+        return segments
+
+    def _download_ranges(self, size: int, validator: str):
+        self._state = self._load_state(size, validator)
+        if self._state is None:
+            self._state = {"url": self.url, "size": size, "validator": validator,
+                           "segments": self._plan_segments(size)}
+            with open(self.part_path, "wb") as f:
+                f.truncate(size)
+        self._total = size
+        self._downloaded = sum(s["pos"] - s["start"] for s in self._state["segments"])
+        self._save_state(force=True)
+        pending = [s for s in self._state["segments"] if s["pos"] <= s["end"]]
+        self._abort.clear()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, len(pending))) as pool:
+                futures = [pool.submit(self._fetch_segment, s) for s in pending]
+                try:
+                    wait(futures, return_when=FIRST_EXCEPTION)
+                finally:
+                    # Ошибка одного сегмента останавливает остальные, но не
+                    # считается отменой: после RangeNotSupported загрузка
+                    # продолжается одним потоком.
+                    self._abort.set()
+        finally:
+            self._save_state(force=True)
+        if self._cancel.is_set():
+            raise DownloadCancelled()
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            raise next((e for e in errors if not isinstance(e, DownloadCancelled)), errors[0])
+        self._report(force=True)
+
+    def _fetch_segment(self, segment: dict):
+        attempts = 0
+        with open(self.part_path, "r+b") as f:
+            while segment["pos"] <= segment["end"]:
+                if self._cancel.is_set() or self._abort.is_set():
+                    raise DownloadCancelled()
+                headers = {"Range": f"bytes={segment['pos']}-{segment['end']}"}
+                buffer = bytearray()
+                start = segment["pos"]
+                try:
+                    with self.session.get(self.url, headers=headers, stream=True,
+                                          timeout=self.timeout) as resp:
+                        resp.raise_for_status()
+                        if resp.status_code != 206:
+                            raise RangeNotSupported()
+                        for chunk in resp.iter_content(chunk_size=READ_SIZE):
+                            if self._cancel.is_set() or self._abort.is_set():
+                                raise DownloadCancelled()
+                            remaining = segment["end"] + 1 - segment["pos"] - len(buffer)
+                            chunk = chunk[:remaining]
+                            if not chunk:
+                                continue
+                            buffer += chunk
+                            with self._lock:
+                                self._downloaded += len(chunk)
+                            attempts = 0
+                            self._report()
+                            if len(buffer) >= self.chunk_size:
+                                self._flush(f, segment, buffer)
+                            if len(chunk) == remaining:
+                                break
+                except requests.RequestException as e:
+                    telemetry.count("autozapret_download_retries_total", error=type(e).__name__)
+                    attempts += 1
+                    if attempts > self.retries:
+                        raise
+                    time.sleep(min(2 ** attempts * 0.25, 5.0))
+                else:
+                    if not buffer and segment["pos"] == start:
+                        telemetry.count("autozapret_download_retries_total", error="EmptyResponse")
+                        attempts += 1
+                        if attempts > self.retries:
+                            raise requests.ConnectionError(
+                                f"Сервер не отдаёт данные с позиции {start}: ответ закончился раньше времени.")
+                        time.sleep(min(2 ** attempts * 0.25, 5.0))
+                finally:
+                    self._flush(f, segment, buffer)
+
+    def _flush(self, f, segment: dict, buffer: bytearray):
+        """Пишет накопленный буфер сегмента на диск и сдвигает его позицию."""
+        if not buffer:
+            return
+        self.hasher.feed(segment["pos"], buffer)
+        f.seek(segment["pos"])
+        f.write(buffer)
+        with self._lock:
+            segment["pos"] += len(buffer)
+        buffer.clear()
+        self._save_state()
+
+    def _discard_part(self):
+        """Удаляет недокачанный файл и состояние сегментов."""
+        self._state = None
+        for path in (self.part_path, self.state_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _download_single(self):
+        self._state = None
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        attempts = 0
+        while True:
+            self._downloaded = 0
+            self.hasher.reset()
+            try:
+                with self.session.get(self.url, stream=True, timeout=self.timeout) as resp:
+                    resp.raise_for_status()
+                    length = resp.headers.get("Content-Length", "")
+                    self._total = int(length) if length.isdigit() else 0
+                    with open(self.part_path, "wb", buffering=self.chunk_size) as f:
+                        for chunk in resp.iter_content(chunk_size=READ_SIZE):
+                            if self._cancel.is_set():
+                                raise DownloadCancelled()
+                            if chunk:
+                                self.hasher.feed(self._downloaded, chunk)
+                                f.write(chunk)
+                                self._downloaded += len(chunk)
+                                self._report()
+                if self._total and self._downloaded != self._total:
+                    raise requests.ConnectionError("Соединение оборвано до конца файла.")
+                self._report(force=True)
+                return
+            except requests.RequestException as e:
+                telemetry.count("autozapret_download_retries_total", error=type(e).__name__)
+                attempts += 1
+                if attempts > self.retries:
+                    raise
+                time.sleep(min(2 ** attempts * 0.25, 5.0))
+
+    def _report(self, force: bool = False):
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_progress < PROGRESS_INTERVAL:
+                return
+            self._last_progress = now
+            downloaded = self._downloaded
+            speed = self._throughput.add(now, downloaded)
+        self.progress(downloaded, self._total, speed)
+
+    def _finish(self) -> str:
+        self.sha256 = self.hasher.finish(self.part_path, os.path.getsize(self.part_path))
+        try:
+            check_digest(self.sha256, self.expected_sha256)
+        except IntegrityError:
+            for path in (self.part_path, self.state_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        os.replace(self.part_path, self.dest_path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return self.dest_path
+
+
+def download_file(url: str, dest_path: str, **kwargs) -> str:
+    """Скачивает ``url`` в ``dest_path``, при возможности докачивая и по сегментам."""
+    return RangeDownloader(url, dest_path, **kwargs).download()
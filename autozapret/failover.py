@@ -0,0 +1,211 @@
+"""Автоматическое переключение варианта при устойчивой деградации соединения."""
+import json
+import threading
+import time
+from collections import deque
+
+from autozapret import core
+
+
+class FailoverPolicy:
+    """Пороговые значения планировщика.
+
+    Деградация начинается, когда доля ошибок в окне ``window`` достигает
+    ``degrade_error_rate``, и заканчивается только при падении ниже
+    ``recover_error_rate`` (гистерезис). Переключение происходит, если
+    деградация держится ``sustain`` секунд, с момента прошлого
+    переключения прошло ``cooldown`` секунд и за ``switch_period`` было не
+    больше ``max_switches`` переключений.
+    """
+
+    def __init__(self, degrade_error_rate: float = 0.5, recover_error_rate: float = 0.2,
+                 window: float = 120, sustain: float = 120, cooldown: float = 600,
+                 max_switches: int = 3, switch_period: float = 3600, min_samples: int = 4,
+                 retry_failed_after: float = 3600):
+        self.degrade_error_rate = degrade_error_rate
+        self.recover_error_rate = recover_error_rate
+        self.window = window
+        self.sustain = sustain
+        self.cooldown = cooldown
+        self.max_switches = max_switches
+        self.switch_period = switch_period
+        self.min_samples = min_samples
+        self.retry_failed_after = retry_failed_after
+
+
+class SwitchError(RuntimeError):
+    """Переключение не удалось; ``removed`` — старый сервис уже удалён."""
+
+    def __init__(self, message: str, removed: bool = False):
+        super().__init__(message)
+        self.removed = removed
+
+
+class CoreSwitcher:
+    """Переустанавливает сервис через service_remove.bat и service_install.bat."""
+
+    def __init__(self, directory: str = core.EXTRACT_DIR):
+        self.directory = directory
+
+    def switch(self, variant: str) -> bool:
+        code = core.remove_service(self.directory)
+        if code != 0:
+            raise SwitchError(f"{core.SERVICE_REMOVE} завершился с кодом {code}, сервис не переустановлен")
+        try:
+            code = core.install_service(self.directory, variant=variant)
+        except Exception as e:
+            raise SwitchError(f"сервис удалён, установка не удалась: {e}", removed=True) from e
+        if code != 0:
+            raise SwitchError(f"сервис удалён, {core.SERVICE_INSTALL} завершился с кодом {code}", removed=True)
+        return True
+
+
+class FailoverScheduler:
+    """Следит за результатами проверок и переключает вариант по политике.
+
+    ``switcher`` — объект с методом ``switch(variant) -> bool``, ``clock`` —
+    источник монотонного времени; оба подменяются в проверках. Решения
+    складываются в ``log`` и передаются в ``on_decision``. Если при неудачном
+    переключении старый сервис уже удалён (SwitchError с ``removed``),
+    ``current`` сбрасывается: следить больше не за чем.
+    """
+
+    def __init__(self, switcher, policy: FailoverPolicy = None, clock=time.monotonic,
+                 on_decision=None, log_path: str = None, background: bool = True):
+        self.switcher = switcher
+        self.policy = policy or FailoverPolicy()
+        self.clock = clock
+        self.on_decision = on_decision
+        self.log_path = log_path
+        self.background = background
+        self.enabled = True
+        self.candidates = []
+        self.current = None
+        self.samples = deque()
+        self.degraded_since = None
+        self.last_switch = None
+        self.switch_times = deque()
+        self.failed_at = {}
+        self.switching = False
+        self.log = deque(maxlen=200)
+        self._lock = threading.RLock()
+
+    def set_candidates(self, variants):
+        """Варианты от лучшего к худшему, например по оценке замера."""
+        with self._lock:
+            self.candidates = list(variants)
+
+    def set_current(self, variant):
+        with self._lock:
+            self.current = variant
+            self.samples.clear()
+            self.degraded_since = None
+
+    def observe(self, results, now: float = None):
+        """Принимает результаты проверок (объекты с полем ``ok``)."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            if self.switching:
+                return
+            for result in results:
+                self.samples.append((now, bool(result.ok)))
+        return self.evaluate(now)
+
+    def error_rate(self, now: float):
+        with self._lock:
+            while self.samples and self.samples[0][0] < now - self.policy.window:
+                self.samples.popleft()
+            if len(self.samples) < self.policy.min_samples:
+                return None
+            return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def evaluate(self, now: float = None):
+        now = self.clock() if now is None else now
+        with self._lock:
+            if not self.enabled or self.current is None or self.switching:
+                return None
+            rate = self.error_rate(now)
+            if rate is None:
+                return None
+            policy = self.policy
+            if self.degraded_since is None:
+                if rate >= policy.degrade_error_rate:
+                    self.degraded_since = now
+                    return self._decide(now, "degraded", self.current, f"доля ошибок {rate:.0%}")
+                return None
+            if rate <= policy.recover_error_rate:
+                self.degraded_since = None
+                return self._decide(now, "recovered", self.current, f"доля ошибок {rate:.0%}")
+            if now - self.degraded_since < policy.sustain:
+                return None
+            if self.last_switch is not None and now - self.last_switch < policy.cooldown:
+                return None
+            while self.switch_times and self.switch_times[0] < now - policy.switch_period:
+                self.switch_times.popleft()
+            if len(self.switch_times) >= policy.max_switches:
+                return None
+            target = self._next_candidate(now)
+            if target is None:
+                return None
+            self.switching = True
+            self.last_switch = now
+            self.switch_times.append(now)
+            decision = self._decide(now, "switch", target,
+                                    f"доля ошибок {rate:.0%} держится {now - self.degraded_since:.0f} с")
+        if self.background:
+            threading.Thread(target=self._switch, args=(target,), name="Failover", daemon=True).start()
+        else:
+            self._switch(target)
+        return decision
+
+    def _next_candidate(self, now: float):
+        if not self.candidates:
+            return None
+        start = self.candidates.index(self.current) + 1 if self.current in self.candidates else 0
+        for offset in range(len(self.candidates)):
+            variant = self.candidates[(start + offset) % len(self.candidates)]
+            if variant == self.current:
+                continue
+            failed = self.failed_at.get(variant)
+            if failed is not None and now - failed < self.policy.retry_failed_after:
+                continue
+            return variant
+        return None
+
+    def _switch(self, target: str):
+        previous = self.current
+        removed = False
+        try:
+            ok = self.switcher.switch(target)
+            error = ""
+        except Exception as e:
+            ok = False
+            error = str(e)
+            removed = isinstance(e, SwitchError) and e.removed
+        now = self.clock()
+        with self._lock:
+            self.switching = False
+            if previous is not None:
+                self.failed_at[previous] = now
+            if ok:
+                self.set_current(target)
+                self._decide(now, "switched", target, f"вместо {previous}")
+            else:
+                self.failed_at[target] = now
+                if removed:
+                    self.set_current(None)
+                self._decide(now, "switch_failed", target, error or "установщик завершился с ошибкой")
+
+    def _decide(self, now: float, action: str, variant, reason: str) -> dict:
+        decision = {"time": time.time(), "monotonic": now, "action": action,
+                    "variant": variant, "reason": reason}
+        self.log.append(decision)
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(decision, ensure_ascii=False) + "\n")
+            except OSError:
+                pass
+        if self.on_decision is not None:
+            self.on_decision(decision)
+        return decision
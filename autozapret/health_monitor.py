@@ -0,0 +1,178 @@
+"""Фоновая проверка доступности целей с гистограммами задержек."""
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+
+from autozapret.strategy_bench import ProbeTarget, probe_all, DEFAULT_TARGETS, PROBE_TIMEOUT
+
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS
+MAX_VALUE_US = 60 * 1000 * 1000
+METRICS = ("connect", "tls", "ttfb")
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < SUB_BUCKETS:
+        return max(0, value_us)
+    shift = value_us.bit_length() - SUB_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + (value_us >> shift) - SUB_BUCKETS
+
+
+def _bucket_value(index: int) -> float:
+    """Середина интервала значений, попадающих в корзину."""
+    if index < SUB_BUCKETS:
+        return float(index)
+    shift = index // SUB_BUCKETS - 1
+    low = (SUB_BUCKETS + index % SUB_BUCKETS) << shift
+    return low + ((1 << shift) - 1) / 2
+
+
+BUCKET_COUNT = _bucket_index(MAX_VALUE_US) + 1
+
+
+class LatencyHistogram:
+    """Гистограмма в стиле HDR: логарифмические интервалы по 32 линейные корзины.
+
+    Относительная погрешность процентилей не превышает 1/32, а размер не
+    зависит от числа записанных значений.
+    """
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.total = 0
+
+    def record(self, seconds: float):
+        value_us = min(MAX_VALUE_US, int(seconds * 1_000_000))
+        self.counts[_bucket_index(value_us)] += 1
+        self.total += 1
+
+    def merge(self, other: "LatencyHistogram"):
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self.total += other.total
+
+    def percentile(self, p: float):
+        """Значение процентиля ``p`` в секундах или None для пустой гистограммы."""
+        if not self.total:
+            return None
+        rank = max(1, math.ceil(p / 100 * self.total))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return _bucket_value(i) / 1_000_000
+        return MAX_VALUE_US / 1_000_000
+
+
+class _Slot:
+    def __init__(self, start: float):
+        self.start = start
+        self.histograms = {metric: LatencyHistogram() for metric in METRICS}
+        self.ok = 0
+        self.failed = 0
+
+
+class HealthStats:
+    """Скользящее окно поминутных гистограмм и кольцевой буфер последних проверок."""
+
+    def __init__(self, slot_seconds: float = 60, slots: int = 60, recent: int = 500):
+        self.slot_seconds = slot_seconds
+        self.slots = deque(maxlen=slots)
+        self.recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+
+    def _slot(self, now: float) -> _Slot:
+        start = now - now % self.slot_seconds
+        if not self.slots or self.slots[-1].start != start:
+            self.slots.append(_Slot(start))
+        return self.slots[-1]
+
+    def record(self, result, now: float = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            slot = self._slot(now)
+            if result.ok:
+                slot.ok += 1
+                for metric in METRICS:
+                    value = getattr(result, metric)
+                    if value is not None:
+                        slot.histograms[metric].record(value)
+            else:
+                slot.failed += 1
+            self.recent.append((now, result.target.host, result.ok, result.connect, result.tls,
+                                result.ttfb, result.error))
+
+    def summary(self, window: float = 15 * 60, now: float = None) -> dict:
+        """Процентили p50/p95/p99 (в секундах) и доля ошибок за последние ``window`` секунд."""
+        now = time.time() if now is None else now
+        merged = {metric: LatencyHistogram() for metric in METRICS}
+        ok = failed = 0
+        with self._lock:
+            for slot in self.slots:
+                if slot.start + self.slot_seconds <= now - window:
+                    continue
+                ok += slot.ok
+                failed += slot.failed
+                for metric in METRICS:
+                    merged[metric].merge(slot.histograms[metric])
+        result = {"samples": ok + failed, "error_rate": failed / (ok + failed) if ok + failed else None}
+        for metric, histogram in merged.items():
+            result[metric] = {f"p{p}": histogram.percentile(p) for p in (50, 95, 99)}
+        return result
+
+
+class HealthMonitor:
+    """Раз в ``interval`` секунд проверяет цели в отдельном потоке с циклом asyncio.
+
+    ``on_update`` получает свежую сводку ``HealthStats.summary``, а
+    ``on_results`` — список результатов раунда; оба вызываются из потока
+    монитора.
+    """
+
+    def __init__(self, targets=None, interval: float = 30, timeout: float = PROBE_TIMEOUT,
+                 window: float = 15 * 60, on_update=None, on_results=None, ssl_context=None,
+                 stats: HealthStats = None):
+        self.targets = [ProbeTarget.parse(t) for t in (targets or DEFAULT_TARGETS)]
+        self.interval = interval
+        self.timeout = timeout
+        self.window = window
+        self.on_update = on_update
+        self.on_results = on_results
+        self.ssl_context = ssl_context
+        self.stats = stats or HealthStats()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="HealthMonitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    async def run_round(self) -> dict:
+        results = await probe_all(self.targets, rounds=1, timeout=self.timeout, ssl_context=self.ssl_context)
+        for result in results:
+            self.stats.record(result)
+        if self.on_results is not None:
+            self.on_results(results)
+        summary = self.stats.summary(self.window)
+        if self.on_update is not None:
+            self.on_update(summary)
+        return summary
+
+    async def _loop(self):
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            await self.run_round()
+            delay = max(0.0, self.interval - (time.monotonic() - started))
+            while delay > 0 and not self._stopped.is_set():
+                await asyncio.sleep(min(delay, 0.5))
+                delay -= 0.5
+
+    def _run(self):
+        asyncio.run(self._loop())
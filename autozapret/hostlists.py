@@ -0,0 +1,242 @@
+"""Сборка списков доменов (lists/list-*.txt) в индекс с поиском по суффиксу."""
+import json
+import os
+import re
+from bisect import bisect_left
+
+USER_LIST = "list-general-user.txt"
+INDEX_VERSION = 2
+
+_LABEL_RE = re.compile(r"^[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?$")
+
+
+def is_hostlist_file(fname: str) -> bool:
+    """Список доменов, которые обходятся; списки исключений (``*exclude*``) сюда не входят."""
+    lower = fname.lower()
+    return lower.endswith(".txt") and not lower.startswith("ipset") and "exclude" not in lower
+
+
+def normalize(line: str):
+    """Приводит строку списка к виду ``sub.example.com`` или возвращает None.
+
+    Убирает комментарии, схему, путь, порт, маску ``*.`` и точку в конце;
+    национальные домены переводятся в punycode.
+    """
+    line = line.split("#", 1)[0].strip().lower()
+    if "://" in line:
+        line = line.split("://", 1)[1]
+    line = line.split("/", 1)[0].split(":", 1)[0].lstrip("*.").rstrip(".")
+    if not line:
+        return None
+    if not line.isascii():
+        try:
+            line = line.encode("idna").decode("ascii")
+        except UnicodeError:
+            return None
+    if len(line) > 253 or not all(_LABEL_RE.match(label) for label in line.split(".")):
+        return None
+    return line
+
+
+def _key(domain: str) -> str:
+    """Домен с обратным порядком меток: поддомены идут в сортировке сразу за родителем."""
+    return ".".join(reversed(domain.split(".")))
+
+
+def parse_hostlist(path: str) -> dict:
+    domains = set()
+    invalid = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            domain = normalize(line)
+            if domain:
+                domains.add(domain)
+            elif line.split("#", 1)[0].strip():
+                invalid += 1
+    return {"domains": sorted(domains), "invalid": invalid}
+
+
+class HostlistIndex:
+    """Объединённые списки доменов папки ``lists``.
+
+    Запись ``example.com`` покрывает и все его поддомены, как в winws.
+    Домены хранятся в отсортированном массиве ключей с обратным порядком
+    меток и параллельном массиве битовых масок списков, поэтому проверка
+    домена — несколько бинарных поисков. Файлы, не изменившиеся с прошлой
+    сборки (mtime + размер), повторно не читаются.
+    """
+
+    def __init__(self, directory: str, cache_path: str = None):
+        self.directory = directory
+        self.cache_path = cache_path
+        self.sources = {}
+        self.names = []
+        self.keys = []
+        self.masks = []
+        self.domains = []
+        self._load()
+        self._compile()
+
+    def _load(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("directory") == self.directory:
+            self.sources = data.get("sources", {})
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "directory": self.directory,
+                           "sources": self.sources}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def refresh(self) -> bool:
+        """Перечитывает новые и изменённые списки, возвращает True, если индекс изменился."""
+        seen = set()
+        changed = False
+        try:
+            listing = list(os.scandir(self.directory))
+        except OSError:
+            listing = []
+        for entry in listing:
+            if not (entry.is_file() and is_hostlist_file(entry.name)):
+                continue
+            st = entry.stat()
+            seen.add(entry.path)
+            cached = self.sources.get(entry.path)
+            if cached and cached["mtime"] == st.st_mtime_ns and cached["size"] == st.st_size:
+                continue
+            try:
+                info = parse_hostlist(entry.path)
+            except OSError:
+                continue
+            info.update(name=entry.name, mtime=st.st_mtime_ns, size=st.st_size)
+            self.sources[entry.path] = info
+            changed = True
+        for path in [p for p in self.sources if p not in seen]:
+            del self.sources[path]
+            changed = True
+        if changed:
+            self._compile()
+            self._save()
+        return changed
+
+    def _compile(self):
+        merged = {}
+        paths = sorted(self.sources, key=lambda p: self.sources[p]["name"])
+        self.names = [self.sources[p]["name"] for p in paths]
+        for bit, path in enumerate(paths):
+            for domain in self.sources[path]["domains"]:
+                key = _key(domain)
+                merged[key] = merged.get(key, 0) | (1 << bit)
+        self.keys = sorted(merged)
+        self.masks = [merged[key] for key in self.keys]
+        self.domains = [_key(key) for key in self.keys]
+
+    def _find(self, key: str) -> int:
+        i = bisect_left(self.keys, key)
+        return i if i < len(self.keys) and self.keys[i] == key else -1
+
+    def _lists(self, mask: int):
+        return [name for bit, name in enumerate(self.names) if mask >> bit & 1]
+
+    def lookup(self, domain: str):
+        """Ближайшая запись, покрывающая домен, и списки, где она есть, или None."""
+        domain = normalize(domain)
+        if not domain:
+            return None
+        labels = domain.split(".")
+        for i in range(len(labels)):
+            candidate = ".".join(labels[i:])
+            pos = self._find(_key(candidate))
+            if pos >= 0:
+                return {"domain": domain, "match": candidate, "lists": self._lists(self.masks[pos])}
+        return None
+
+    def subdomains(self, domain: str, limit: int = 200):
+        """Записи для самого домена и его поддоменов."""
+        domain = normalize(domain)
+        if not domain:
+            return []
+        key = _key(domain)
+        result = []
+        pos = self._find(key)
+        if pos >= 0:
+            result.append((domain, self._lists(self.masks[pos])))
+        prefix = key + "."
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            if len(result) >= limit or not self.keys[i].startswith(prefix):
+                break
+            result.append((_key(self.keys[i]), self._lists(self.masks[i])))
+        return result
+
+    def search(self, text: str, limit: int = 200):
+        """Записи, содержащие ``text``, сначала покрывающая запись и поддомены."""
+        text = text.strip().lower()
+        if not text:
+            return []
+        result = []
+        found = self.lookup(text)
+        if found:
+            result.append((found["match"], found["lists"]))
+        result += [item for item in self.subdomains(text, limit) if item[0] != (found or {}).get("match")]
+        seen = {domain for domain, _ in result}
+        for domain, mask in zip(self.domains, self.masks):
+            if len(result) >= limit:
+                break
+            if text in domain and domain not in seen:
+                result.append((domain, self._lists(mask)))
+        return result[:limit]
+
+    def _covered(self, key: str) -> bool:
+        labels = key.split(".")
+        return any(self._find(".".join(labels[:i])) >= 0 for i in range(1, len(labels)))
+
+    def redundant(self) -> int:
+        """Число записей, уже покрытых родительским доменом из любого списка."""
+        return sum(1 for key in self.keys if self._covered(key))
+
+    def stats(self) -> dict:
+        return {
+            "lists": {info["name"]: len(info["domains"]) for info in self.sources.values()},
+            "entries": sum(len(info["domains"]) for info in self.sources.values()),
+            "invalid": sum(info["invalid"] for info in self.sources.values()),
+            "unique": len(self.keys),
+            "redundant": self.redundant(),
+        }
+
+    def add(self, domain: str, list_name: str = USER_LIST) -> dict:
+        """Добавляет домен в пользовательский список, если он ещё не покрыт."""
+        normalized = normalize(domain)
+        if not normalized:
+            raise ValueError(f"«{domain}» не похоже на доменное имя.")
+        found = self.lookup(normalized)
+        if found:
+            return {**found, "added": False}
+        path = os.path.join(self.directory, list_name)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "a+", encoding="utf-8") as f:
+            f.seek(0)
+            text = f.read()
+            if text and not text.endswith("\n"):
+                f.write("\n")
+            f.write(normalized + "\n")
+        self.refresh()
+        return {"domain": normalized, "match": normalized, "lists": [list_name], "added": True}
+
+    def export(self, path: str) -> int:
+        """Пишет объединённый список без дублей и покрытых поддоменов, возвращает число строк."""
+        lines = sorted(_key(key) for key in self.keys if not self._covered(key))
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write("\n".join(lines) + "\n")
+        return len(lines)
@@ -0,0 +1,76 @@
+"""Ответы на вопросы service_install.bat без участия пользователя."""
+import os
+import re
+import threading
+
+MENU_RE = re.compile(r"^\s*(\d+)\s*[.)]\s+(.+?)\s*$")
+INDEX_PROMPT_RE = re.compile(r"(index|number|номер)[^:]*:\s*$", re.IGNORECASE)
+
+
+class InstallerError(RuntimeError):
+    pass
+
+
+class InstallerDriver:
+    """Читает вывод установщика и отвечает на его вопросы.
+
+    Номер варианта берётся из меню, которое печатает сам установщик
+    (строки ``N. имя.bat``), поэтому он совпадает с выбранным файлом даже
+    при другом порядке сортировки. Если меню разобрать не удалось,
+    используется ``fallback_number``. После ответа вход закрывается, чтобы
+    ``pause`` и повторные вопросы не ждали пользователя.
+    """
+
+    def __init__(self, variant: str, fallback_number: int = None):
+        self.variant = os.path.basename(variant)
+        self.fallback_number = fallback_number
+        self.menu = {}
+        self.answered = None
+        self.error = None
+        self.job = None
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def attach(self, job):
+        with self._lock:
+            self.job = job
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self._send(pending)
+
+    def feed(self, stream: str, text: str):
+        if stream != "stdout":
+            return
+        match = MENU_RE.match(text)
+        if match:
+            self.menu[match.group(2).casefold()] = int(match.group(1))
+            return
+        if self.answered is None and self.error is None and INDEX_PROMPT_RE.search(text):
+            self._answer(self._choose())
+
+    def _choose(self):
+        number = self.menu.get(self.variant.casefold())
+        if number is None and not self.menu:
+            number = self.fallback_number
+        if number is None:
+            self.error = InstallerError(f"Вариант «{self.variant}» отсутствует в меню установщика.")
+            return None
+        self.answered = number
+        return str(number)
+
+    def _answer(self, text):
+        with self._lock:
+            if self.job is None:
+                self._pending = text
+                return
+        self._send(text)
+
+    def _send(self, text):
+        if text is None:
+            self.job.cancel()
+            return
+        try:
+            self.job.send(text)
+            self.job.close_stdin()
+        except (OSError, RuntimeError):
+            pass
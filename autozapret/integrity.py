@@ -0,0 +1,186 @@
+"""Проверка целостности архива релиза: SHA-256 на лету и CRC элементов zip."""
+import hashlib
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_MEMORY = 64 * 1024 * 1024
+READ_BUFFER = 1024 * 1024
+VERIFY_WORKERS = 4
+
+_SHA256_RE = re.compile(r"\b[0-9a-fA-F]{64}\b")
+
+
+class IntegrityError(ValueError):
+    pass
+
+
+def parse_digest(value):
+    """SHA-256 из ``sha256:<hex>``, строки ``sha256sum`` или просто hex; иначе None."""
+    if not value:
+        return None
+    value = value.strip()
+    if ":" in value.split()[0]:
+        algorithm, _, value = value.partition(":")
+        if algorithm.lower() != "sha256":
+            return None
+    match = _SHA256_RE.search(value)
+    return match.group(0).lower() if match else None
+
+
+def read_checksum_file(archive_path: str):
+    """Опубликованная контрольная сумма из ``<архив>.sha256`` рядом с архивом или None."""
+    try:
+        with open(archive_path + ".sha256", "r", encoding="utf-8") as f:
+            return parse_digest(f.read())
+    except OSError:
+        return None
+
+
+def check_digest(actual: str, expected):
+    if expected and actual != expected:
+        raise IntegrityError(f"Контрольная сумма архива не совпадает: ожидалась {expected[:12]}…, "
+                             f"получена {actual[:12]}….")
+
+
+class StreamHasher:
+    """SHA-256 файла, собираемого из частей в произвольном порядке.
+
+    Часть, начинающаяся с текущей позиции, хэшируется сразу в потоке,
+    который её принёс, вместе с дождавшимися своей очереди; хэширование
+    идёт вне блокировки, поэтому остальные потоки загрузки не ждут.
+    Пришедшие раньше времени части ждут в памяти (не больше ``limit``
+    байт). Не поместившееся, а также скачанное до докачки, ``finish``
+    дочитывает с диска; объём дочитанного — ``reread``.
+    """
+
+    def __init__(self, limit: int = HASH_MEMORY):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.sha = hashlib.sha256()
+            self.pos = 0
+            self.pending = {}
+            self.pending_bytes = 0
+            self.reread = 0
+            self.seconds = 0.0
+            self._busy = False
+
+    def feed(self, offset: int, data):
+        with self._lock:
+            if offset != self.pos or self._busy:
+                if offset > self.pos and self.pending_bytes + len(data) <= self.limit:
+                    self.pending[offset] = bytes(data)
+                    self.pending_bytes += len(data)
+                return
+            self._busy = True
+        while data is not None:
+            started = time.perf_counter()
+            self.sha.update(data)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.seconds += elapsed
+                self.pos += len(data)
+                data = self.pending.pop(self.pos, None)
+                if data is None:
+                    self._busy = False
+                else:
+                    self.pending_bytes -= len(data)
+
+    def finish(self, path: str, size: int) -> str:
+        with self._lock:
+            started = time.perf_counter()
+            with open(path, "rb") as f:
+                while self.pos < size:
+                    block = self.pending.pop(self.pos, None)
+                    if block is None:
+                        following = [offset for offset in self.pending if offset > self.pos]
+                        f.seek(self.pos)
+                        block = f.read(min(READ_BUFFER, min(following, default=size) - self.pos))
+                        if not block:
+                            break
+                        self.reread += len(block)
+                    self.sha.update(block)
+                    self.pos += len(block)
+            self.pending.clear()
+            self.pending_bytes = 0
+            self.seconds += time.perf_counter() - started
+            return self.sha.hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(READ_BUFFER)
+            if not block:
+                return sha.hexdigest()
+            sha.update(block)
+
+
+def check_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo):
+    """Читает элемент целиком: zipfile сверяет CRC в конце, размер сверяется здесь."""
+    size = 0
+    try:
+        with zf.open(info) as src:
+            while True:
+                block = src.read(READ_BUFFER)
+                if not block:
+                    break
+                size += len(block)
+    except (zipfile.BadZipFile, EOFError, OSError) as e:
+        raise IntegrityError(f"{info.filename}: {e}") from e
+    if size != info.file_size:
+        raise IntegrityError(f"{info.filename}: размер {size} вместо {info.file_size}.")
+
+
+class MemberVerifier:
+    """Пул потоков, проверяющий элементы архива, пока основной поток распаковывает другие.
+
+    У каждого потока свой дескриптор архива, поэтому чтение идёт параллельно.
+    """
+
+    def __init__(self, zip_path: str, workers: int = VERIFY_WORKERS):
+        self.zip_path = zip_path
+        self.workers = workers
+        self.checked = 0
+        self.seconds = 0.0
+        self._pool = None
+        self._futures = []
+        self._local = threading.local()
+        self._handles = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ZipVerify")
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        for zf in self._handles:
+            zf.close()
+
+    def submit(self, info: zipfile.ZipInfo):
+        self._futures.append(self._pool.submit(self._check, info))
+
+    def _check(self, info: zipfile.ZipInfo):
+        zf = getattr(self._local, "zf", None)
+        if zf is None:
+            zf = self._local.zf = zipfile.ZipFile(self.zip_path, "r")
+            with self._lock:
+                self._handles.append(zf)
+        started = time.perf_counter()
+        check_member(zf, info)
+        with self._lock:
+            self.checked += 1
+            self.seconds += time.perf_counter() - started
+
+    def wait(self):
+        """Дожидается всех проверок; первая ошибка пробрасывается как IntegrityError."""
+        for future in self._futures:
+            future.result()
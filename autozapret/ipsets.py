@@ -0,0 +1,258 @@
+"""Сжатие списков IP (lists/ipset-*.txt) в минимальный набор CIDR и поиск по интервалам."""
+import ipaddress
+import os
+import random
+import socket
+import time
+from array import array
+from bisect import bisect_right
+
+BITS = {4: 32, 6: 128}
+
+
+def is_ipset_file(fname: str) -> bool:
+    lower = fname.lower()
+    return lower.endswith(".txt") and lower.startswith("ipset")
+
+
+def parse_entry(line: str):
+    """Возвращает ``(версия, первый адрес, последний адрес)`` как целые или None.
+
+    Понимает одиночные адреса, префиксы ``a.b.c.d/n`` и диапазоны ``a-b``.
+    """
+    line = line.split("#", 1)[0].strip()
+    if not line:
+        return None
+    if ":" not in line and "-" not in line:
+        return _parse_ipv4(line)
+    try:
+        if "-" in line:
+            first, last = (ipaddress.ip_address(part.strip()) for part in line.split("-", 1))
+            if first.version != last.version or first > last:
+                return None
+            return first.version, int(first), int(last)
+        if "/" in line:
+            net = ipaddress.ip_network(line, strict=False)
+            return net.version, int(net.network_address), int(net.broadcast_address)
+        ip = ipaddress.ip_address(line)
+        return ip.version, int(ip), int(ip)
+    except ValueError:
+        return None
+
+
+def _parse_ipv4(line: str):
+    address, _, prefix = line.partition("/")
+    try:
+        value = int.from_bytes(socket.inet_pton(socket.AF_INET, address), "big")
+        length = int(prefix) if prefix else 32
+    except (OSError, ValueError):
+        return None
+    if not 0 <= length <= 32:
+        return None
+    host = (1 << (32 - length)) - 1
+    return 4, value & ~host, value | host
+
+
+def merge(ranges):
+    """Объединяет пересекающиеся и соседние интервалы."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def to_cidrs(start: int, end: int, version: int):
+    """Минимальное покрытие интервала выровненными префиксами."""
+    bits = BITS[version]
+    while start <= end:
+        size = (start & -start).bit_length() - 1 if start else bits
+        size = min(size, (end - start + 1).bit_length() - 1)
+        yield start, bits - size
+        start += 1 << size
+
+
+def format_cidr(start: int, prefix: int, version: int) -> str:
+    address = ipaddress.ip_address(start) if version == 4 else ipaddress.IPv6Address(start)
+    return f"{address}/{prefix}"
+
+
+def parse_ipset(path: str) -> dict:
+    ranges = {4: [], 6: []}
+    entries = invalid = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parsed = parse_entry(line)
+            if parsed:
+                ranges[parsed[0]].append(parsed[1:])
+                entries += 1
+            elif line.split("#", 1)[0].strip():
+                invalid += 1
+    merged = {version: merge(items) for version, items in ranges.items()}
+    cidrs = sum(1 for version, items in merged.items() for start, end in items
+                for _ in to_cidrs(start, end, version))
+    return {"ranges": merged, "entries": entries, "invalid": invalid, "cidrs": cidrs}
+
+
+class _Table:
+    """Непересекающиеся отрезки в отсортированных массивах с маской списков на каждом.
+
+    Маски — целые Python без ограничения разрядности: списков может быть больше 64.
+    """
+
+    def __init__(self, version: int):
+        self.starts = array("Q") if version == 4 else []
+        self.ends = array("Q") if version == 4 else []
+        self.masks = []
+
+    def build(self, per_list):
+        events = []
+        for bit, ranges in enumerate(per_list):
+            for start, end in ranges:
+                events.append((start, 1 << bit))
+                events.append((end + 1, -(1 << bit)))
+        events.sort()
+        mask = 0
+        pos = None
+        i = 0
+        while i < len(events):
+            point = events[i][0]
+            if mask and pos is not None and point > pos:
+                self._append(pos, point - 1, mask)
+            while i < len(events) and events[i][0] == point:
+                mask += events[i][1]
+                i += 1
+            pos = point
+
+    def _append(self, start: int, end: int, mask: int):
+        if self.masks and self.masks[-1] == mask and self.ends[-1] + 1 == start:
+            self.ends[-1] = end
+            return
+        self.starts.append(start)
+        self.ends.append(end)
+        self.masks.append(mask)
+
+    def find(self, value: int) -> int:
+        i = bisect_right(self.starts, value) - 1
+        return self.masks[i] if i >= 0 and value <= self.ends[i] else 0
+
+    def __len__(self):
+        return len(self.masks)
+
+
+class IpsetIndex:
+    """Интервальный индекс по всем ipset‑спискам папки ``lists``.
+
+    Каждый список сводится к непересекающимся интервалам, затем все списки
+    раскладываются на элементарные отрезки с маской списков, которые их
+    покрывают. Поиск адреса — один бинарный поиск по массиву начал
+    отрезков. ``refresh`` перечитывает только изменённые файлы.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.sources = {}
+        self.names = []
+        self.tables = {4: _Table(4), 6: _Table(6)}
+
+    def refresh(self) -> bool:
+        """Перечитывает новые и изменённые списки, возвращает True, если индекс изменился."""
+        seen = set()
+        changed = False
+        try:
+            listing = list(os.scandir(self.directory))
+        except OSError:
+            listing = []
+        for entry in listing:
+            if not (entry.is_file() and is_ipset_file(entry.name)):
+                continue
+            st = entry.stat()
+            seen.add(entry.path)
+            cached = self.sources.get(entry.path)
+            if cached and cached["mtime"] == st.st_mtime_ns and cached["size"] == st.st_size:
+                continue
+            try:
+                info = parse_ipset(entry.path)
+            except OSError:
+                continue
+            info.update(name=entry.name, mtime=st.st_mtime_ns, size=st.st_size)
+            self.sources[entry.path] = info
+            changed = True
+        for path in [p for p in self.sources if p not in seen]:
+            del self.sources[path]
+            changed = True
+        if changed:
+            self._compile()
+        return changed
+
+    def _compile(self):
+        paths = sorted(self.sources, key=lambda p: self.sources[p]["name"])
+        self.names = [self.sources[p]["name"] for p in paths]
+        for version in BITS:
+            table = _Table(version)
+            table.build([self.sources[p]["ranges"][version] for p in paths])
+            self.tables[version] = table
+
+    def lookup(self, ip: str):
+        """Списки, в которые входит адрес, или None, если адрес не покрыт."""
+        try:
+            address = ipaddress.ip_address(ip.strip())
+        except ValueError:
+            return None
+        mask = self.tables[address.version].find(int(address))
+        if not mask:
+            return None
+        return {"ip": str(address), "lists": [name for bit, name in enumerate(self.names) if mask >> bit & 1]}
+
+    def lookup_time(self, samples: int = 2000) -> float:
+        """Среднее время поиска случайного IPv4‑адреса в микросекундах."""
+        rng = random.Random(samples)
+        addresses = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(samples)]
+        started = time.perf_counter()
+        for address in addresses:
+            self.lookup(address)
+        return (time.perf_counter() - started) / samples * 1_000_000
+
+    def stats(self) -> dict:
+        lists = {}
+        for info in self.sources.values():
+            lists[info["name"]] = {
+                "entries": info["entries"],
+                "cidrs": info["cidrs"],
+                "invalid": info["invalid"],
+                "addresses_v4": sum(end - start + 1 for start, end in info["ranges"][4]),
+            }
+        return {
+            "lists": lists,
+            "entries": sum(item["entries"] for item in lists.values()),
+            "cidrs": sum(item["cidrs"] for item in lists.values()),
+            "segments": sum(len(table) for table in self.tables.values()),
+            "lookup_us": self.lookup_time(),
+        }
+
+    def compact(self) -> dict:
+        """Переписывает списки минимальным набором CIDR, возвращает ``имя -> (было, стало)``.
+
+        Список переписывается, только если записей становится меньше
+        (диапазоны ``a-b`` в CIDR могут и разрастись). Строки‑комментарии и
+        нераспознанные строки сохраняются в начале файла как есть.
+        """
+        result = {}
+        for path, info in list(self.sources.items()):
+            if info["cidrs"] >= info["entries"]:
+                continue
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                kept = [line.rstrip("\r\n") for line in f if line.strip() and not parse_entry(line)]
+            lines = kept + [format_cidr(start, prefix, version)
+                            for version in BITS for first, last in info["ranges"][version]
+                            for start, prefix in to_cidrs(first, last, version)]
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, path)
+            result[info["name"]] = (info["entries"], info["cidrs"])
+        self.refresh()
+        return result
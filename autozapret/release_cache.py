@@ -0,0 +1,158 @@
+"""Кэш метаданных релиза GitHub с условными запросами."""
+import json
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+DEFAULT_TTL = 15 * 60
+DEFAULT_BACKOFF = 60
+READ_SIZE = 16 * 1024
+
+
+class RateLimited(Exception):
+    pass
+
+
+class FetchCancelled(Exception):
+    pass
+
+
+def _retry_delay(headers, now: float) -> float:
+    """Сколько секунд ждать до следующего запроса по заголовкам ответа."""
+    retry_after = headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return float(retry_after)
+    if retry_after:
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - now)
+        except (TypeError, ValueError):
+            pass
+    reset = headers.get("X-RateLimit-Reset", "")
+    if reset.isdigit():
+        return max(0.0, int(reset) - now)
+    return DEFAULT_BACKOFF
+
+
+class ReleaseCache:
+    """Хранит JSON релиза вместе с ETag и Last-Modified в файле на диске.
+
+    В пределах ``ttl`` ответ берётся из кэша без сети, после — проверяется
+    запросом с ``If-None-Match``/``If-Modified-Since``. При исчерпании лимита
+    GitHub или без сети возвращаются последние известные данные.
+    Обращения из разных потоков выполняются по очереди под ``lock``.
+    """
+
+    def __init__(self, url: str, path: str, ttl: float = DEFAULT_TTL, session=None, timeout: float = 10):
+        self.url = url
+        self.path = path
+        self.ttl = ttl
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.from_network = False
+        self.stale = False
+        self.lock = threading.RLock()
+        self.entry = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entry if entry.get("url") == self.url else {}
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def _stale(self, error: Exception) -> dict:
+        if "data" in self.entry:
+            self.stale = True
+            return self.entry["data"]
+        raise error
+
+    def get(self, force: bool = False, cancel=None) -> dict:
+        """Данные релиза.
+
+        После вызова ``from_network`` показывает, ответил ли сервер, а
+        ``stale`` — что вернулись устаревшие данные из-за ошибки. Если
+        событие ``cancel`` установлено, запрос не начинается, а начатый
+        ответ закрывается и бросается FetchCancelled.
+        """
+        with self.lock:
+            return self._get(force, cancel)
+
+    def _get(self, force: bool, cancel) -> dict:
+        now = time.time()
+        self.from_network = False
+        self.stale = False
+        if "data" in self.entry and not force and now - self.entry.get("fetched_at", 0) < self.ttl:
+            return self.entry["data"]
+        blocked_until = self.entry.get("blocked_until", 0)
+        if now < blocked_until:
+            return self._stale(RateLimited(
+                f"Лимит запросов GitHub исчерпан, повторите через {int(blocked_until - now)} с."))
+        headers = {"Accept": "application/vnd.github+json"}
+        if "data" in self.entry:
+            if self.entry.get("etag"):
+                headers["If-None-Match"] = self.entry["etag"]
+            if self.entry.get("last_modified"):
+                headers["If-Modified-Since"] = self.entry["last_modified"]
+        if cancel is not None and cancel.is_set():
+            raise FetchCancelled()
+        try:
+            resp = self.session.get(self.url, headers=headers, timeout=self.timeout, stream=True)
+        except requests.RequestException as e:
+            return self._stale(e)
+        with resp:
+            return self._receive(resp, now, cancel)
+
+    def _receive(self, resp, now: float, cancel) -> dict:
+        try:
+            body = self._read_body(resp, cancel)
+        except requests.RequestException as e:
+            return self._stale(e)
+        self.entry["url"] = self.url
+        self.from_network = True
+        if resp.status_code in (403, 429) and (
+                resp.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in resp.headers):
+            self.entry["blocked_until"] = now + _retry_delay(resp.headers, now)
+            self._save()
+            return self._stale(RateLimited(f"Лимит запросов GitHub исчерпан (HTTP {resp.status_code})."))
+        if resp.status_code == 304 and "data" in self.entry:
+            self.entry["fetched_at"] = now
+        else:
+            try:
+                resp.raise_for_status()
+                data = json.loads(body)
+            except (requests.RequestException, ValueError) as e:
+                return self._stale(e)
+            self.entry.update({
+                "data": data,
+                "etag": resp.headers.get("ETag", ""),
+                "last_modified": resp.headers.get("Last-Modified", ""),
+                "fetched_at": now,
+            })
+        if resp.headers.get("X-RateLimit-Remaining") == "0":
+            self.entry["blocked_until"] = now + _retry_delay(resp.headers, now)
+        else:
+            self.entry.pop("blocked_until", None)
+        self._save()
+        return self.entry["data"]
+
+    @staticmethod
+    def _read_body(resp, cancel) -> bytes:
+        body = bytearray()
+        for chunk in resp.iter_content(chunk_size=READ_SIZE):
+            if cancel is not None and cancel.is_set():
+                raise FetchCancelled()
+            body += chunk
+        return bytes(body)
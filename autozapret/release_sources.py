@@ -0,0 +1,278 @@
+"""Получение релиза из нескольких источников наперегонки.
+
+Источники — API GitHub, зеркала с тем же форматом ответа и локальная папка
+или сетевой ресурс с архивами. Порядок запуска определяется статистикой
+задержек прошлых запросов.
+"""
+import json
+import os
+import queue
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from autozapret.integrity import parse_digest, read_checksum_file
+from autozapret.release_cache import ReleaseCache
+
+HEDGE_DELAY = 0.25
+FETCH_TIMEOUT = 20
+EWMA_ALPHA = 0.3
+POOL_SIZE = 16
+
+_VERSION_RE = re.compile(r"\d+(?:\.\d+)+[a-z]?")
+
+
+def make_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    """Сессия с пулом keep-alive соединений на каждый хост."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def release_from_json(data: dict) -> dict:
+    """Версия, ссылка на zip‑архив и его опубликованный SHA-256 (поле ``digest``), если есть."""
+    for asset in data.get("assets", []):
+        if asset.get("name", "").lower().endswith(".zip"):
+            return {"tag": data.get("tag_name"), "url": asset.get("browser_download_url"),
+                    "sha256": parse_digest(asset.get("digest"))}
+    raise ValueError("Zip‑архив не найден в последнем релизе.")
+
+
+class ReleaseSource:
+    """Источник релиза: ``fetch`` возвращает ``{"tag", "url", "sha256", "cached", "stale"}`` или бросает исключение.
+
+    ``cancel`` — событие, которое устанавливается, когда гонку выиграл
+    другой источник; получать ответ после этого незачем.
+    """
+
+    name = "source"
+
+    def fetch(self, cancel=None) -> dict:
+        raise NotImplementedError
+
+
+class ApiSource(ReleaseSource):
+    """API релизов GitHub или зеркало, отдающее такой же JSON, с кэшем ReleaseCache."""
+
+    def __init__(self, name: str, cache: ReleaseCache):
+        self.name = name
+        self.cache = cache
+
+    def fetch(self, cancel=None) -> dict:
+        with self.cache.lock:
+            release = release_from_json(self.cache.get(cancel=cancel))
+            release["cached"] = not self.cache.from_network
+            release["stale"] = self.cache.stale
+        return release
+
+
+class LocalSource(ReleaseSource):
+    """Zip‑архив или папка с архивами (берётся самый новый по времени изменения).
+
+    Контрольная сумма берётся из файла ``<архив>.sha256`` рядом с архивом.
+    Каждое чтение папки — настоящий запрос (сетевой ресурс может отвечать
+    медленно), поэтому его задержка попадает в статистику.
+    """
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+
+    def fetch(self, cancel=None) -> dict:
+        path = self.path
+        if os.path.isdir(path):
+            archives = [os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(".zip")]
+            if not archives:
+                raise FileNotFoundError(f"В папке {path} нет zip‑архивов.")
+            path = max(archives, key=os.path.getmtime)
+        elif not os.path.isfile(path):
+            raise FileNotFoundError(f"Архив {path} не найден.")
+        stem = os.path.splitext(os.path.basename(path))[0]
+        match = _VERSION_RE.search(stem)
+        return {"tag": match.group(0) if match else stem, "url": path, "sha256": read_checksum_file(path),
+                "cached": False, "stale": False}
+
+
+def load_sources(config_path: str, default_url: str, cache_path: str, ttl: float, session) -> list:
+    """Читает список источников из JSON; без файла используется только GitHub.
+
+    Формат: ``{"sources": [{"name": "github", "url": "https://api.github.com/..."},
+    {"name": "nas", "path": "Z:/zapret"}]}``; ``url`` — API релизов или
+    зеркало с тем же JSON, ``path`` — zip‑архив или папка с архивами.
+    """
+    entries = []
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            entries = json.load(f).get("sources", [])
+    except (OSError, ValueError):
+        pass
+    if not entries:
+        entries = [{"name": "github", "url": default_url}]
+    sources = []
+    for i, entry in enumerate(entries):
+        name = entry.get("name") or f"source{i + 1}"
+        if entry.get("path"):
+            sources.append(LocalSource(name, entry["path"]))
+        elif entry.get("url"):
+            path = cache_path if i == 0 else f"{os.path.splitext(cache_path)[0]}-{name}.json"
+            sources.append(ApiSource(name, ReleaseCache(entry["url"], path, ttl=ttl, session=session)))
+    return sources
+
+
+class ReleaseFetcher:
+    """Запускает источники наперегонки и возвращает первый корректный ответ.
+
+    Самый быстрый по статистике источник стартует сразу, каждый следующий —
+    через ``hedge_delay`` секунд, если победителя ещё нет, или немедленно
+    после ошибки предыдущего. Источники без статистики запускаются сразу,
+    чтобы узнать их задержку. После победы отставшие запросы отменяются:
+    ещё не начатые не запускаются, а у начатых ответ закрывается, не
+    дочитывая тело; в статистику задержек это не попадает. Устаревшие данные из кэша источника,
+    не ответившего из-за ошибки, возвращаются, только если свежих нет ни у
+    кого.
+    """
+
+    def __init__(self, sources, stats_path: str = None, hedge_delay: float = HEDGE_DELAY,
+                 timeout: float = FETCH_TIMEOUT):
+        self.sources = list(sources)
+        self.stats_path = stats_path
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.stats = self._load_stats()
+        self.last_source = None
+        self._probing = set()
+        self._lock = threading.Lock()
+
+    def _load_stats(self) -> dict:
+        if not self.stats_path:
+            return {}
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_stats(self):
+        if not self.stats_path:
+            return
+        tmp_path = self.stats_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.stats, f, ensure_ascii=False)
+            os.replace(tmp_path, self.stats_path)
+        except OSError:
+            pass
+
+    def _record(self, name: str, latency):
+        """``latency`` в секундах; None означает ошибку."""
+        with self._lock:
+            entry = self.stats.setdefault(name, {"latency": None, "samples": 0, "failures": 0, "streak": 0})
+            if latency is None:
+                entry["failures"] += 1
+                entry["streak"] += 1
+            else:
+                entry["samples"] += 1
+                entry["streak"] = 0
+                previous = entry["latency"]
+                entry["latency"] = latency if previous is None else previous + EWMA_ALPHA * (latency - previous)
+            entry["updated"] = time.time()
+            self._save_stats()
+
+    def _rank(self, source):
+        entry = self.stats.get(source.name, {})
+        if entry.get("streak"):
+            return (2, entry["streak"])
+        if entry.get("latency") is None:
+            return (1, 0)
+        return (0, entry["latency"])
+
+    def order(self) -> list:
+        with self._lock:
+            return sorted(self.sources, key=self._rank)
+
+    def _winner(self, source, release: dict) -> dict:
+        self.last_source = source.name
+        return {"tag": release["tag"], "url": release["url"], "sha256": release.get("sha256"),
+                "source": source.name}
+
+    def fetch(self) -> dict:
+        """Возвращает ``{"tag", "url", "sha256", "source"}`` первого источника, ответившего корректно."""
+        ordered = self.order()
+        if not ordered:
+            raise ValueError("Не настроено ни одного источника релизов.")
+        results = queue.Queue()
+        done = threading.Event()
+        triggers = []
+
+        def worker(source, delay, trigger):
+            if delay:
+                trigger.wait(delay)
+            trigger.set()
+            if done.is_set():
+                return
+            started = time.monotonic()
+            try:
+                release = source.fetch(done)
+                if not release.get("tag") or not release.get("url"):
+                    raise ValueError("ответ без версии или ссылки на архив")
+            except Exception as e:
+                if done.is_set():
+                    return
+                self._record(source.name, None)
+                results.put((source, None, e))
+                return
+            finally:
+                with self._lock:
+                    self._probing.discard(source.name)
+            if release.get("stale"):
+                self._record(source.name, None)
+            elif not release.get("cached"):
+                self._record(source.name, time.monotonic() - started)
+            results.put((source, release, None))
+
+        known = 0
+        for source in ordered:
+            delay = 0.0
+            with self._lock:
+                probe = self._rank(source)[0] == 1 and source.name not in self._probing
+                if probe:
+                    self._probing.add(source.name)
+            if not probe:
+                delay = known * self.hedge_delay
+                known += 1
+            # Срабатывает, когда источник стартует: по своей задержке или после
+            # ошибки другого источника (тогда досрочно запускается только один).
+            trigger = threading.Event()
+            if delay:
+                triggers.append(trigger)
+            threading.Thread(target=worker, args=(source, delay, trigger), name=f"Release-{source.name}",
+                             daemon=True).start()
+        errors = []
+        fallback = None
+        deadline = time.monotonic() + self.timeout + len(ordered) * self.hedge_delay
+        while len(errors) < len(ordered):
+            try:
+                source, release, error = results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                errors.append("время ожидания истекло")
+                break
+            if release is not None and not release["stale"]:
+                done.set()
+                return self._winner(source, release)
+            if release is not None:
+                fallback = fallback or (source, release)
+                errors.append(f"{source.name}: нет ответа, есть данные из кэша")
+            else:
+                errors.append(f"{source.name}: {error}")
+            waiting = next((trigger for trigger in triggers if not trigger.is_set()), None)
+            if waiting is not None:
+                waiting.set()
+        done.set()
+        if fallback is not None:
+            return self._winner(*fallback)
+        raise ConnectionError("Не удалось получить релиз ни из одного источника: " + "; ".join(errors))
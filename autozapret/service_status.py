@@ -0,0 +1,164 @@
+"""Отслеживание состояния сервиса zapret с адаптивным интервалом опроса."""
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from autozapret.telemetry import telemetry
+
+RUNNING = "running"
+STOPPED = "stopped"
+NOT_FOUND = "not_found"
+UNKNOWN = "unknown"
+
+SERVICE_NAME = "zapret"
+QUERY_TIMEOUT = 15
+
+
+class StatusBackend:
+    """Источник состояния сервиса: ``query`` возвращает одну из констант модуля."""
+
+    def query(self) -> str:
+        raise NotImplementedError
+
+
+class ScBackend(StatusBackend):
+    """Windows SCM через ``sc query``."""
+
+    def __init__(self, service: str = SERVICE_NAME, command=None):
+        self.service = service
+        self.command = command or ["sc", "query", service]
+
+    def query(self) -> str:
+        try:
+            proc = subprocess.run(self.command, capture_output=True, text=True,
+                                  encoding="cp866", errors="replace", timeout=QUERY_TIMEOUT,
+                                  creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        except (OSError, subprocess.TimeoutExpired):
+            return UNKNOWN
+        if proc.returncode != 0:
+            return NOT_FOUND
+        return RUNNING if "RUNNING" in proc.stdout else STOPPED
+
+
+class SystemdBackend(StatusBackend):
+    """systemd через ``systemctl show``."""
+
+    def __init__(self, unit: str = SERVICE_NAME):
+        self.unit = unit
+
+    def query(self) -> str:
+        try:
+            proc = subprocess.run(["systemctl", "show", "-p", "LoadState", "-p", "ActiveState", self.unit],
+                                  capture_output=True, text=True, timeout=QUERY_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired):
+            return UNKNOWN
+        if proc.returncode != 0:
+            return UNKNOWN
+        props = dict(line.partition("=")[::2] for line in proc.stdout.splitlines() if "=" in line)
+        if props.get("LoadState") == "not-found":
+            return NOT_FOUND
+        return RUNNING if props.get("ActiveState") == "active" else STOPPED
+
+
+class FakeBackend(StatusBackend):
+    """Состояние в памяти; считает число опросов."""
+
+    def __init__(self, state: str = NOT_FOUND):
+        self.state = state
+        self.queries = 0
+
+    def query(self) -> str:
+        self.queries += 1
+        return self.state
+
+
+def default_backend() -> StatusBackend:
+    if sys.platform == "win32":
+        return ScBackend()
+    if shutil.which("systemctl"):
+        return SystemdBackend()
+    return FakeBackend()
+
+
+class StatusWatcher:
+    """Фоновый опрос сервиса в отдельном потоке.
+
+    После ``boost`` (например, сразу после установки или удаления) сервис
+    опрашивается каждые ``fast_interval`` секунд, затем интервал удваивается
+    до ``slow_interval``. ``on_change`` вызывается при первом опросе и затем
+    только при смене состояния, ``on_checked`` — после каждого опроса,
+    запрошенного через ``refresh``. Оба колбэка вызываются из потока
+    наблюдателя.
+    """
+
+    def __init__(self, backend: StatusBackend, on_change=None, on_checked=None,
+                 fast_interval: float = 1.0, slow_interval: float = 30.0, fast_period: float = 20.0):
+        self.backend = backend
+        self.on_change = on_change
+        self.on_checked = on_checked
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.fast_period = fast_period
+        self.state = None
+        self.checked_at = None
+        self.interval = fast_interval
+        self._fast_until = 0.0
+        self._wake = threading.Event()
+        self._refresh_requested = False
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="StatusWatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def refresh(self):
+        """Просит опросить сервис немедленно; повторные запросы объединяются."""
+        with self._lock:
+            self._refresh_requested = True
+        self._wake.set()
+
+    def boost(self):
+        with self._lock:
+            self._fast_until = time.monotonic() + self.fast_period
+            self.interval = self.fast_interval
+        self._wake.set()
+
+    def poll(self) -> str:
+        """Опрашивает сервис один раз и уведомляет об изменении."""
+        with self._lock:
+            requested = self._refresh_requested
+            self._refresh_requested = False
+        with telemetry.span("status.query", backend=type(self.backend).__name__) as span:
+            state = self.backend.query()
+            span.set(state=state)
+        changed = state != self.state
+        self.state = state
+        self.checked_at = time.time()
+        if changed and self.on_change is not None:
+            self.on_change(state)
+        if requested and self.on_checked is not None:
+            self.on_checked(state)
+        return state
+
+    def _next_interval(self) -> float:
+        with self._lock:
+            if time.monotonic() < self._fast_until:
+                self.interval = self.fast_interval
+            else:
+                self.interval = min(self.slow_interval, self.interval * 2)
+            return self.interval
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.poll()
+            self._wake.wait(self._next_interval())
+            self._wake.clear()
@@ -0,0 +1,48 @@
+"""Замер длительности этапов запуска."""
+import threading
+import time
+
+PROCESS_START = time.perf_counter()
+
+
+class StartupTimer:
+    """Хранит начало и конец каждого этапа относительно старта процесса."""
+
+    def __init__(self, origin: float = PROCESS_START):
+        self.origin = origin
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str):
+        with self._lock:
+            self.phases[name] = [time.perf_counter() - self.origin, None]
+
+    def finish(self, name: str):
+        with self._lock:
+            phase = self.phases.get(name)
+            if phase is not None and phase[1] is None:
+                phase[1] = time.perf_counter() - self.origin
+
+    def mark(self, name: str):
+        """Записывает этап, длившийся от старта процесса до текущего момента."""
+        with self._lock:
+            self.phases[name] = [0.0, time.perf_counter() - self.origin]
+
+    def pending(self):
+        with self._lock:
+            return [name for name, (_, end) in self.phases.items() if end is None]
+
+    def report(self) -> str:
+        with self._lock:
+            phases = sorted(self.phases.items(), key=lambda item: item[1][0])
+        lines = []
+        for name, (begin, end) in phases:
+            if end is None:
+                lines.append(f"{name:<16} выполняется (с {begin * 1000:.0f} мс)")
+            else:
+                lines.append(f"{name:<16} {(end - begin) * 1000:8.1f} мс  "
+                             f"({begin * 1000:.0f}–{end * 1000:.0f} мс)")
+        return "\n".join(lines)
+
+
+startup_timer = StartupTimer()
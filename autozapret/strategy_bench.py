@@ -0,0 +1,226 @@
+"""Замер качества соединения для каждого варианта .bat."""
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import time
+
+DEFAULT_TARGETS = ["discord.com", "gateway.discord.gg", "www.youtube.com", "i.ytimg.com"]
+PROBE_TIMEOUT = 5.0
+ROUNDS = 3
+CONCURRENCY = 16
+SETTLE_DELAY = 2.0
+
+
+class ProbeTarget:
+    """Адрес для проверки: хост, порт и нужно ли устанавливать TLS."""
+
+    def __init__(self, host: str, port: int = 443, tls: bool = True, server_hostname: str = None,
+                 path: str = "/"):
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.server_hostname = server_hostname or host
+        self.path = path
+
+    @classmethod
+    def parse(cls, spec):
+        """Принимает ``ProbeTarget``, ``"host"`` или ``"host:port"``."""
+        if isinstance(spec, cls):
+            return spec
+        host, _, port = spec.rpartition(":") if ":" in spec else (spec, "", "")
+        return cls(host, int(port)) if port else cls(spec)
+
+    def __repr__(self):
+        return f"ProbeTarget({self.host}:{self.port})"
+
+
+class ProbeResult:
+    def __init__(self, target: ProbeTarget, ok: bool, connect=None, tls=None, ttfb=None, error: str = ""):
+        self.target = target
+        self.ok = ok
+        self.connect = connect
+        self.tls = tls
+        self.ttfb = ttfb
+        self.error = error
+
+
+class _FirstByte(asyncio.Protocol):
+    def __init__(self, loop):
+        self.first = loop.create_future()
+
+    def data_received(self, data):
+        if not self.first.done():
+            self.first.set_result(time.perf_counter())
+
+    def connection_lost(self, exc):
+        if not self.first.done():
+            self.first.set_exception(exc or ConnectionError("Соединение закрыто без ответа."))
+
+
+async def probe(target: ProbeTarget, timeout: float = PROBE_TIMEOUT, ssl_context=None) -> ProbeResult:
+    """Замеряет время TCP-соединения, TLS-рукопожатия и первого байта ответа."""
+    loop = asyncio.get_running_loop()
+    transport = None
+    connect = tls = None
+    try:
+        start = time.perf_counter()
+        transport, protocol = await asyncio.wait_for(
+            loop.create_connection(lambda: _FirstByte(loop), target.host, target.port), timeout)
+        connected = time.perf_counter()
+        connect = connected - start
+        if target.tls:
+            ctx = ssl_context or ssl.create_default_context()
+            transport = await asyncio.wait_for(
+                loop.start_tls(transport, protocol, ctx, server_hostname=target.server_hostname), timeout)
+            tls = time.perf_counter() - connected
+        sent = time.perf_counter()
+        transport.write(f"HEAD {target.path} HTTP/1.1\r\nHost: {target.server_hostname}\r\n"
+                        f"Connection: close\r\n\r\n".encode("ascii"))
+        first = await asyncio.wait_for(protocol.first, timeout)
+        return ProbeResult(target, True, connect, tls, first - sent)
+    except (OSError, asyncio.TimeoutError, ssl.SSLError) as e:
+        return ProbeResult(target, False, connect, tls, error=str(e) or type(e).__name__)
+    finally:
+        if transport is not None:
+            transport.abort()
+
+
+async def probe_all(targets, rounds: int = ROUNDS, timeout: float = PROBE_TIMEOUT,
+                    concurrency: int = CONCURRENCY, ssl_context=None):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(target):
+        async with semaphore:
+            return await probe(target, timeout, ssl_context)
+
+    tasks = [limited(t) for _ in range(rounds) for t in targets]
+    return await asyncio.gather(*tasks)
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+class VariantScore:
+    """Сводка замеров одного варианта."""
+
+    def __init__(self, variant: str, results):
+        self.variant = variant
+        self.total = len(results)
+        self.succeeded = sum(1 for r in results if r.ok)
+        self.success_rate = self.succeeded / self.total if self.total else 0.0
+        ok = [r for r in results if r.ok]
+        self.connect = _median(r.connect for r in ok)
+        self.tls = _median(r.tls for r in ok)
+        self.ttfb = _median(r.ttfb for r in ok)
+        latency = sum(v for v in (self.connect, self.tls, self.ttfb) if v is not None)
+        self.score = round(100 * self.success_rate / (1 + latency), 2)
+        self.errors = sorted({r.error for r in results if not r.ok})
+
+    def to_dict(self) -> dict:
+        return {"variant": self.variant, "score": self.score, "success_rate": self.success_rate,
+                "connect": self.connect, "tls": self.tls, "ttfb": self.ttfb, "errors": self.errors}
+
+
+class StrategyLauncher:
+    """Запускает и останавливает вариант на время замера."""
+
+    def start(self, variant: str):
+        raise NotImplementedError
+
+    def stop(self, variant: str):
+        raise NotImplementedError
+
+
+class NullLauncher(StrategyLauncher):
+    """Ничего не запускает: замеряет соединение как есть."""
+
+    def start(self, variant: str):
+        pass
+
+    def stop(self, variant: str):
+        pass
+
+
+class BatLauncher(StrategyLauncher):
+    """Запускает .bat из папки ZAPRET и завершает winws.exe после замера.
+
+    Установленный сервис должен быть удалён, иначе он перехватывает трафик
+    вместо проверяемого варианта.
+    """
+
+    def __init__(self, process_name: str = "winws.exe"):
+        self.process_name = process_name
+
+    def start(self, variant: str):
+        subprocess.run(["cmd.exe", "/c", variant], cwd=os.path.dirname(variant),
+                       creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0), timeout=30)
+
+    def stop(self, variant: str):
+        subprocess.run(["taskkill", "/F", "/IM", self.process_name], capture_output=True,
+                       creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0), timeout=30)
+
+
+class StrategyBenchmark:
+    """Поочерёдно запускает варианты и ранжирует их по результатам проверки целей."""
+
+    def __init__(self, launcher: StrategyLauncher, targets=None, rounds: int = ROUNDS,
+                 timeout: float = PROBE_TIMEOUT, concurrency: int = CONCURRENCY,
+                 settle: float = SETTLE_DELAY, ssl_context=None):
+        self.launcher = launcher
+        self.targets = [ProbeTarget.parse(t) for t in (targets or DEFAULT_TARGETS)]
+        self.rounds = rounds
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.settle = settle
+        self.ssl_context = ssl_context
+        self.cancelled = False
+
+    def measure(self, variant: str) -> VariantScore:
+        self.launcher.start(variant)
+        try:
+            if self.settle:
+                time.sleep(self.settle)
+            results = asyncio.run(probe_all(self.targets, self.rounds, self.timeout,
+                                            self.concurrency, self.ssl_context))
+        finally:
+            self.launcher.stop(variant)
+        return VariantScore(variant, results)
+
+    def run(self, variants, progress=None):
+        """Возвращает оценки вариантов, отсортированные от лучшего к худшему."""
+        scores = []
+        for index, variant in enumerate(variants, start=1):
+            if self.cancelled:
+                break
+            score = self.measure(variant)
+            scores.append(score)
+            if progress is not None:
+                progress(index, len(variants), score)
+        return rank(scores)
+
+
+def rank(scores):
+    return sorted(scores, key=lambda s: (-s.score, -s.success_rate, s.variant))
+
+
+def save_scores(path: str, scores):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"measured_at": time.time(), "scores": [s.to_dict() for s in scores]},
+                  f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_scores(path: str) -> dict:
+    """Возвращает сохранённые оценки в виде ``{путь к .bat: score}``."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {item["variant"]: item["score"] for item in data.get("scores", [])}
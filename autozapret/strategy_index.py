@@ -0,0 +1,196 @@
+"""Индекс вариантов .bat: аргументы winws, списки, порты и режимы обхода."""
+import json
+import os
+import re
+
+SERVICE_SCRIPTS = ["service_remove", "check_updates", "service_install", "service_status"]
+INDEX_VERSION = 1
+
+_SET_RE = re.compile(r'^\s*set\s+"?([A-Za-z_][A-Za-z0-9_]*)=([^"]*)"?\s*$', re.IGNORECASE)
+_TOKEN_RE = re.compile(r'"[^"]*"|[^\s"]+(?:"[^"]*")?[^\s"]*')
+_VAR_RE = re.compile(r"%([A-Za-z_][A-Za-z0-9_]*)%")
+
+
+def is_strategy_file(fname: str) -> bool:
+    lower = fname.lower()
+    return lower.endswith(".bat") and all(x not in lower for x in SERVICE_SCRIPTS)
+
+
+def _logical_lines(text: str):
+    """Склеивает строки, перенесённые символом ``^``."""
+    line = ""
+    for raw in text.splitlines():
+        stripped = raw.rstrip()
+        if stripped.endswith("^"):
+            line += stripped[:-1] + " "
+            continue
+        yield line + stripped
+        line = ""
+    if line:
+        yield line
+
+
+def _expand(value: str, variables: dict) -> str:
+    return _VAR_RE.sub(lambda m: variables.get(m.group(1).upper(), m.group(0)), value)
+
+
+def _split_ports(value: str):
+    return [p for p in value.split(",") if p and "%" not in p]
+
+
+def parse_bat(path: str) -> dict:
+    """Разбирает вариант .bat и возвращает описание его запуска winws."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    bat_dir = os.path.dirname(path) + os.sep
+    variables = {}
+    args = []
+    for line in _logical_lines(text):
+        line = line.replace("%~dp0", bat_dir)
+        match = _SET_RE.match(line)
+        if match:
+            variables[match.group(1).upper()] = _expand(match.group(2), variables)
+            continue
+        if "winws" in line.lower() and not args:
+            tokens = [_expand(t, variables).replace('"', "") for t in _TOKEN_RE.findall(line)]
+            for i, token in enumerate(tokens):
+                if token.lower().endswith(("winws.exe", "winws")):
+                    args = tokens[i + 1:]
+                    break
+    profiles = [{}]
+    hostlists, ipsets, desync = [], [], []
+    tcp_ports, udp_ports = [], []
+    for arg in args:
+        if arg == "--new":
+            profiles.append({})
+            continue
+        if not arg.startswith("--"):
+            continue
+        key, _, value = arg[2:].partition("=")
+        profiles[-1].setdefault(key, []).append(value)
+        if key.startswith(("hostlist", "ipset")) and value:
+            target = hostlists if key.startswith("hostlist") else ipsets
+            name = os.path.basename(value.replace("\\", "/"))
+            if name not in target:
+                target.append(name)
+        elif key == "dpi-desync":
+            for mode in value.split(","):
+                if mode and mode not in desync:
+                    desync.append(mode)
+        elif key in ("wf-tcp", "filter-tcp"):
+            tcp_ports += [p for p in _split_ports(value) if p not in tcp_ports]
+        elif key in ("wf-udp", "filter-udp"):
+            udp_ports += [p for p in _split_ports(value) if p not in udp_ports]
+    name = os.path.basename(path)
+    lower = name.lower()
+    return {
+        "path": path,
+        "name": name,
+        "args": args,
+        "profiles": [p for p in profiles if p],
+        "hostlists": hostlists,
+        "ipsets": ipsets,
+        "desync": desync,
+        "tcp_ports": tcp_ports,
+        "udp_ports": udp_ports,
+        "discord": "discord" in lower,
+        "alt": "alt" in lower,
+        "mgts": "mgts" in lower or "мгтс" in lower,
+    }
+
+
+def sort_key(info: dict):
+    name = info["name"].lower()
+    if name == "discord.bat":
+        return (0, name)
+    elif name == "general.bat":
+        return (1, name)
+    elif info["alt"]:
+        return (2, name)
+    else:
+        return (3, name)
+
+
+class StrategyIndex:
+    """Кэш разобранных вариантов с ключом путь + mtime + размер.
+
+    ``refresh`` перечитывает только новые и изменённые файлы, остальные
+    запросы (фильтр, сортировка, подписи) работают по данным в памяти.
+    """
+
+    def __init__(self, directory: str, cache_path: str = None):
+        self.directory = directory
+        self.cache_path = cache_path
+        self.entries = {}
+        self._load()
+
+    def _load(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("directory") == self.directory:
+            self.entries = data.get("entries", {})
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "directory": self.directory,
+                           "entries": self.entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def refresh(self) -> bool:
+        """Синхронизирует индекс с папкой, возвращает True, если что-то изменилось."""
+        seen = set()
+        changed = False
+        try:
+            listing = list(os.scandir(self.directory))
+        except OSError:
+            listing = []
+        for entry in listing:
+            if not (entry.is_file() and is_strategy_file(entry.name)):
+                continue
+            st = entry.stat()
+            seen.add(entry.path)
+            cached = self.entries.get(entry.path)
+            if cached and cached["mtime"] == st.st_mtime_ns and cached["size"] == st.st_size:
+                continue
+            try:
+                info = parse_bat(entry.path)
+            except OSError:
+                continue
+            info["mtime"] = st.st_mtime_ns
+            info["size"] = st.st_size
+            self.entries[entry.path] = info
+            changed = True
+        for path in [p for p in self.entries if p not in seen]:
+            del self.entries[path]
+            changed = True
+        if changed:
+            self._save()
+        return changed
+
+    def all(self, scores=None):
+        """Все варианты в порядке показа: по оценке замера, затем по имени."""
+        scores = scores or {}
+        items = sorted(self.entries.values(), key=sort_key)
+        return sorted(items, key=lambda info: -scores.get(info["path"], -1))
+
+    def query(self, mode: str = "all", scores=None):
+        items = self.all(scores)
+        if mode == "mgts":
+            return [info for info in items if info["mgts"]]
+        if mode == "normal":
+            return [info for info in items if not info["mgts"]]
+        return items
+
+    def get(self, path: str):
+        return self.entries.get(path)
@@ -0,0 +1,336 @@
+"""Запуск служебных скриптов с потоковым выводом, тайм‑аутом и отменой."""
+import itertools
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+
+from autozapret.telemetry import telemetry
+
+LOG_LINES = 2000
+READ_SIZE = 4096
+POLL_INTERVAL = 0.1
+PARTIAL_LINE_DELAY = 0.5
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+TIMED_OUT = "timeout"
+CANCELLED = "cancelled"
+
+
+class ScriptTimeout(TimeoutError):
+    pass
+
+
+class ScriptCancelled(Exception):
+    pass
+
+
+def console_encoding() -> str:
+    """Кодировка вывода консольных программ: OEM‑страница в Windows (обычно cp866), иначе utf-8."""
+    if os.name == "nt":
+        try:
+            import ctypes
+            return f"cp{ctypes.windll.kernel32.GetOEMCP()}"
+        except (ImportError, AttributeError, OSError):
+            return "cp866"
+    return "utf-8"
+
+
+OEM_ENCODING = console_encoding()
+
+
+def decode_line(data: bytes) -> str:
+    """Декодирует строку вывода скрипта.
+
+    Скрипты Flowseal переключают консоль на UTF-8 (``chcp 65001``), поэтому
+    сначала пробуется UTF-8, а вывод без ``chcp`` читается в OEM‑странице.
+    """
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode(OEM_ENCODING, "replace")
+
+
+def script_command(path: str, args=()) -> list:
+    """Команда запуска скрипта: ``cmd.exe /c`` для .bat в Windows, ``sh`` для остальных систем."""
+    if os.name == "nt":
+        return ["cmd.exe", "/c", path, *args]
+    return ["sh", path, *args]
+
+
+class _LineBuffer:
+    """Собирает вывод потока в строки.
+
+    Незавершённый хвост отдаётся, только если за ``delay`` секунд не пришло
+    продолжение: так приглашение ко вводу без перевода строки всё равно
+    доходит до получателя, а строка, записанная по частям, не рвётся.
+    """
+
+    def __init__(self, job, name: str, delay: float = PARTIAL_LINE_DELAY):
+        self.job = job
+        self.name = name
+        self.delay = delay
+        self.pending = b""
+        self.updated = 0.0
+        self._lock = threading.Lock()
+
+    def feed(self, chunk: bytes):
+        with self._lock:
+            *complete, self.pending = (self.pending + chunk).split(b"\n")
+            self.updated = time.monotonic()
+            for line in complete:
+                self._emit(line)
+
+    def flush_idle(self, now: float = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.pending and now - self.updated >= self.delay:
+                self._emit(self.pending)
+                self.pending = b""
+
+    def close(self):
+        with self._lock:
+            if self.pending:
+                self._emit(self.pending)
+                self.pending = b""
+
+    def _emit(self, line: bytes):
+        self.job._emit(self.name, decode_line(line.rstrip(b"\r")))
+
+
+class Job:
+    """Скрипт в очереди или в работе.
+
+    ``lines`` — последние строки вывода как ``(поток, текст)``, где поток —
+    ``stdout``, ``stderr`` или ``stdin`` для отправленного ввода.
+    """
+
+    def __init__(self, job_id: int, name: str, command: list, cwd: str, timeout, interactive: bool,
+                 on_line=None, log_lines: int = LOG_LINES):
+        self.id = job_id
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.timeout = timeout
+        self.interactive = interactive
+        self.on_line = on_line
+        self.state = QUEUED
+        self.exit_code = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.lines = deque(maxlen=log_lines)
+        self.proc = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._stdin_lock = threading.Lock()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def send(self, text: str):
+        """Отправляет строку на вход интерактивного скрипта."""
+        if not self.interactive or self.proc is None or self.proc.stdin is None or self.proc.stdin.closed:
+            raise RuntimeError("Скрипт не принимает ввод.")
+        with self._stdin_lock:
+            self.proc.stdin.write((text + "\r\n").encode("utf-8"))
+            self.proc.stdin.flush()
+        self._emit("stdin", text)
+
+    def close_stdin(self):
+        """Закрывает вход: дальнейшие вопросы и ``pause`` получат конец файла."""
+        if self.proc is not None and self.proc.stdin is not None:
+            with self._stdin_lock:
+                self.proc.stdin.close()
+
+    def wait(self, timeout: float = None) -> int:
+        """Ждёт завершения и возвращает код выхода.
+
+        Бросает ScriptTimeout, ScriptCancelled или ошибку запуска процесса.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("Скрипт ещё выполняется.")
+        if self.state == TIMED_OUT:
+            raise ScriptTimeout(f"{self.name}: не завершился за {self.timeout:.0f} с и был остановлен.")
+        if self.state == CANCELLED:
+            raise ScriptCancelled(f"{self.name}: остановлен пользователем.")
+        if self.error is not None:
+            raise self.error
+        return self.exit_code
+
+    def output(self) -> str:
+        return "\n".join(text for stream, text in self.lines if stream != "stdin")
+
+    def _emit(self, stream: str, text: str):
+        self.lines.append((stream, text))
+        if self.on_line is not None:
+            self.on_line(stream, text)
+
+
+class ProcessSupervisor:
+    """Запускает скрипты в фоне, не больше ``max_concurrent`` одновременно.
+
+    Остальные ждут в очереди в порядке запуска. Вывод читается построчно
+    (незавершённая строка вроде приглашения ко вводу отдаётся, если за
+    ``PARTIAL_LINE_DELAY`` секунд не пришло продолжение) и
+    попадает в ``Job.lines`` и общий журнал ``log`` ограниченного размера.
+    По тайм‑ауту или отмене завершается всё дерево процессов.
+    """
+
+    def __init__(self, max_concurrent: int = 1, log_lines: int = LOG_LINES, on_line=None):
+        self.max_concurrent = max_concurrent
+        self.log_lines = log_lines
+        self.on_line = on_line
+        self.log = deque(maxlen=log_lines)
+        self.jobs = deque(maxlen=50)
+        self._ids = itertools.count(1)
+        self._running = 0
+        self._queue = deque()
+        self._turn = threading.Condition()
+
+    def submit(self, path: str, cwd: str = None, timeout: float = None, interactive: bool = False,
+               on_line=None, command: list = None, args=()) -> Job:
+        """Ставит скрипт ``path`` в очередь и сразу возвращает его Job."""
+        name = os.path.basename(path)
+
+        def emit(stream, text):
+            self.log.append((job.id, stream, text))
+            if on_line is not None:
+                on_line(stream, text)
+            if self.on_line is not None:
+                self.on_line(job, stream, text)
+
+        job = Job(next(self._ids), name, command or script_command(path, args), cwd or os.path.dirname(path),
+                  timeout, interactive, emit, self.log_lines)
+        with self._turn:
+            self.jobs.append(job)
+            self._queue.append(job)
+        threading.Thread(target=self._run, args=(job,), name=f"Script-{name}", daemon=True).start()
+        return job
+
+    def run(self, path: str, cwd: str = None, timeout: float = None, on_line=None) -> int:
+        """Запускает скрипт и ждёт код выхода."""
+        return self.submit(path, cwd, timeout, on_line=on_line).wait()
+
+    def active(self) -> list:
+        return [job for job in self.jobs if not job.done]
+
+    def _acquire(self, job: Job) -> bool:
+        """Ждёт своей очереди и свободного слота; False, если задание отменили раньше."""
+        with self._turn:
+            while self._queue[0] is not job or self._running >= self.max_concurrent:
+                if job._cancel.is_set():
+                    self._queue.remove(job)
+                    self._turn.notify_all()
+                    return False
+                self._turn.wait(POLL_INTERVAL)
+            self._queue.popleft()
+            self._running += 1
+            self._turn.notify_all()
+        return True
+
+    def _release(self):
+        with self._turn:
+            self._running -= 1
+            self._turn.notify_all()
+
+    def _run(self, job: Job):
+        if not self._acquire(job):
+            job.state = CANCELLED
+            job._done.set()
+            return
+        try:
+            self._execute(job)
+        except Exception as e:
+            job.error = e
+            job.state = FAILED
+        finally:
+            job.finished = time.monotonic()
+            self._release()
+            if job.started is not None:
+                telemetry.observe("autozapret_subprocess_seconds", job.finished - job.started, script=job.name)
+            telemetry.count("autozapret_subprocess_exit_total", script=job.name, state=job.state,
+                            code=job.exit_code)
+            job._done.set()
+
+    def _execute(self, job: Job):
+        kwargs = {}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        else:
+            kwargs["start_new_session"] = True
+        job.started = time.monotonic()
+        job.proc = subprocess.Popen(job.command, cwd=job.cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    stdin=subprocess.PIPE if job.interactive else subprocess.DEVNULL, **kwargs)
+        job.state = RUNNING
+        buffers = [_LineBuffer(job, "stdout"), _LineBuffer(job, "stderr")]
+        readers = [threading.Thread(target=self._read, args=(stream, buffer), daemon=True)
+                   for stream, buffer in zip((job.proc.stdout, job.proc.stderr), buffers)]
+        for reader in readers:
+            reader.start()
+        deadline = job.started + job.timeout if job.timeout else None
+        while True:
+            try:
+                job.exit_code = job.proc.wait(POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            for buffer in buffers:
+                buffer.flush_idle()
+            if job._cancel.is_set():
+                job.state = CANCELLED
+            elif deadline is not None and time.monotonic() > deadline:
+                job.state = TIMED_OUT
+            else:
+                continue
+            self._kill(job.proc)
+            job.exit_code = job.proc.wait()
+            break
+        for reader in readers:
+            reader.join(1.0)
+        for buffer in buffers:
+            buffer.close()
+        if job.proc.stdin is not None:
+            try:
+                job.proc.stdin.close()
+            except OSError:
+                pass
+        if job.state == RUNNING:
+            job.state = FINISHED
+
+    @staticmethod
+    def _read(stream, buffer: _LineBuffer):
+        while True:
+            try:
+                chunk = stream.read1(READ_SIZE)
+            except (OSError, ValueError):
+                break
+            if not chunk:
+                break
+            buffer.feed(chunk)
+        stream.close()
+
+    @staticmethod
+    def _kill(proc: subprocess.Popen):
+        """Завершает процесс вместе с дочерними (cmd.exe запускает sc, net, timeout и т.д.)."""
+        if proc.poll() is not None:
+            return
+        try:
+            if os.name == "nt":
+                subprocess.run(["taskkill", "/PID", str(proc.pid), "/T", "/F"], capture_output=True,
+                               creationflags=subprocess.CREATE_NO_WINDOW)
+            else:
+                os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        if proc.poll() is None:
+            proc.kill()
@@ -0,0 +1,260 @@
+"""Трассировка операций, счётчики и гистограммы с выгрузкой в JSON Lines и формат Prometheus.
+
+По умолчанию выключена: ``span`` возвращает общий пустой объект, а
+``count`` и ``observe`` сразу выходят, поэтому в рабочем режиме
+накладные расходы — одна проверка флага.
+"""
+import bisect
+import itertools
+import json
+import os
+import threading
+import time
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTE_BUCKETS = tuple(1024 * 4 ** i for i in range(11))
+TRACE_MAX_BYTES = 1024 * 1024
+TRACE_BACKUPS = 3
+METRICS_INTERVAL = 5.0
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Histogram:
+    """Накопительные корзины Prometheus: количество значений не больше каждой границы."""
+
+    def __init__(self, buckets=TIME_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Span:
+    """Замер одной операции; ``set`` добавляет атрибуты по ходу работы."""
+
+    def __init__(self, telemetry, name: str, attrs: dict):
+        self.telemetry = telemetry
+        self.name = name
+        self.attrs = attrs
+        self.id = next(telemetry._ids)
+        self.parent = None
+        self.profiler = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.telemetry._stack()
+        self.parent = stack[-1].id if stack else None
+        if self.telemetry.profiling and not stack:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:
+                self.profiler = None
+        stack.append(self)
+        self.wall = time.time()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        self.telemetry._stack().pop()
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.telemetry._merge_profile(self.profiler)
+        self.telemetry._finish(self, duration, exc)
+        return False
+
+
+class Telemetry:
+    """Спаны, счётчики и гистограммы процесса.
+
+    Завершённые спаны дописываются в ``trace_path`` (файл ротируется по
+    размеру), метрики раз в ``METRICS_INTERVAL`` секунд и по ``flush``
+    перезаписываются в ``metrics_path``. Пока включено ``profiling``,
+    внешние спаны каждого потока профилируются cProfile, результат
+    накапливается и сохраняется в ``profile_path`` при выключении.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.profiling = False
+        self.trace_path = None
+        self.metrics_path = None
+        self.profile_path = None
+        self.counters = {}
+        self.histograms = {}
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profile_stats = None
+        self._last_metrics = 0.0
+
+    def configure(self, trace_path: str = None, metrics_path: str = None, profile_path: str = None,
+                  enabled: bool = None):
+        self.trace_path = trace_path or self.trace_path
+        self.metrics_path = metrics_path or self.metrics_path
+        self.profile_path = profile_path or self.profile_path
+        if enabled is not None:
+            self.enabled = enabled
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return NO_SPAN
+        return Span(self, name, attrs)
+
+    def count(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets=TIME_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def set_profiling(self, enabled: bool):
+        """Включает или выключает профилирование; при выключении сохраняет ``profile_path``."""
+        self.profiling = enabled
+        if not enabled:
+            self.save_profile()
+
+    def save_profile(self):
+        with self._lock:
+            stats, self._profile_stats = self._profile_stats, None
+        if stats is not None and self.profile_path:
+            stats.dump_stats(self.profile_path)
+
+    def _merge_profile(self, profiler):
+        import pstats
+        with self._lock:
+            if self._profile_stats is None:
+                self._profile_stats = pstats.Stats(profiler)
+            else:
+                self._profile_stats.add(profiler)
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _finish(self, span: Span, duration: float, exc):
+        status = "ok" if exc is None else "error"
+        self.observe("autozapret_span_seconds", duration, span=span.name)
+        self.count("autozapret_spans_total", span=span.name, status=status)
+        record = {"time": span.wall, "span": span.name, "id": span.id, "parent": span.parent,
+                  "thread": threading.current_thread().name, "duration": round(duration, 6), "status": status}
+        if exc is not None:
+            record["error"] = f"{type(exc).__name__}: {exc}"
+        if span.attrs:
+            record["attrs"] = span.attrs
+        self._write_trace(record)
+        if time.monotonic() - self._last_metrics >= METRICS_INTERVAL:
+            self.write_metrics()
+
+    def _write_trace(self, record: dict):
+        if not self.trace_path:
+            return
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            try:
+                if os.path.exists(self.trace_path) and os.path.getsize(self.trace_path) >= TRACE_MAX_BYTES:
+                    self._rotate()
+                with open(self.trace_path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError:
+                pass
+
+    def _rotate(self):
+        for i in range(TRACE_BACKUPS - 1, 0, -1):
+            older = f"{self.trace_path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.trace_path}.{i + 1}")
+        os.replace(self.trace_path, self.trace_path + ".1")
+
+    def metrics_text(self) -> str:
+        """Метрики в текстовом формате Prometheus."""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (h.buckets, list(h.counts), h.sum, h.count))
+                                for key, h in self.histograms.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            bounds = [f"{bound:g}" for bound in buckets] + ["+Inf"]
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self):
+        self._last_metrics = time.monotonic()
+        if not self.metrics_path:
+            return
+        tmp_path = self.metrics_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+                f.write(self.metrics_text())
+            os.replace(tmp_path, self.metrics_path)
+        except OSError:
+            pass
+
+    def flush(self):
+        """Сохраняет метрики и накопленный профиль (вызывается при выходе)."""
+        if self.enabled:
+            self.write_metrics()
+        if self.profiling:
+            self.save_profile()
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+telemetry = Telemetry()
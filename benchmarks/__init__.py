@@ -0,0 +1 @@
+"""Замеры скорости собственных операций AUTOZAPRET: ``python -m benchmarks``."""
@@ -0,0 +1,121 @@
+"""Запуск замеров и сравнение с базовой линией.
+
+    python -m benchmarks                       # все замеры, сравнение с baseline.json
+    python -m benchmarks --quick --only gui    # короткий прогон одной группы
+    python -m benchmarks --update-baseline     # записать новую базовую линию
+
+Код возврата 1 означает, что медиана хотя бы одного замера выросла больше
+чем на ``--tolerance`` относительно базовой линии.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import suite  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+GROUPS = ("release", "update", "index", "gui", "install", "status")
+
+
+def run(groups, quick: bool, repeat: int, workdir: str) -> dict:
+    sizes = [10] if quick else [10, 50, 200]
+    counts = [200, 1000] if quick else [200, 1000, 3000]
+    results = {}
+    for group in groups:
+        print(f"• {group}...", file=sys.stderr)
+        if group == "release":
+            results.update(suite.bench_release(workdir, repeat))
+        elif group == "update":
+            results.update(suite.bench_update(workdir, sizes, repeat))
+        elif group == "index":
+            results.update(suite.bench_index(workdir, counts, repeat))
+        elif group == "gui":
+            results.update(suite.bench_gui(workdir, counts, repeat))
+        elif group == "install":
+            results.update(suite.bench_install(workdir, repeat))
+        elif group == "status":
+            results.update(suite.bench_status(repeat))
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list:
+    """Замеры, медиана которых превысила базовую больше чем на ``tolerance`` и ``min_delta`` секунд."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        delta = result["median"] - base["median"]
+        if delta > min_delta and result["median"] > base["median"] * (1 + tolerance):
+            regressions.append((name, base["median"], result["median"]))
+    return regressions
+
+
+def print_table(results: dict, baseline: dict):
+    for name, result in results.items():
+        line = f"{name:<28} {result['median'] * 1000:>10.2f} мс  (мин {result['min'] * 1000:.2f})"
+        if "mb_per_s" in result:
+            line += f"  {result['mb_per_s']:.1f} МБ/с"
+        if "hash_s" in result:
+            line += f"  хэш {result['hash_s'] * 1000:.0f} мс, дочитано {result['hash_reread_mb']:.1f} МБ"
+        if "verify_s" in result:
+            line += f"  CRC {result['verify_s'] * 1000:.0f} мс"
+        base = baseline.get(name)
+        if base is not None:
+            line += f"  {result['median'] / base['median'] - 1:+.0%} к базовой"
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Замеры скорости AUTOZAPRET.")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS), help="группы замеров")
+    parser.add_argument("--quick", action="store_true", help="только малые архивы и списки")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов каждого замера")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="файл базовой линии")
+    parser.add_argument("--update-baseline", action="store_true", help="записать результаты в базовую линию")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустимый рост медианы (доля)")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="игнорировать рост меньше N секунд")
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    parser.add_argument("--workdir", help="папка для архивов и файлов (по умолчанию временная)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        results = run(args.only, args.quick, args.repeat, args.workdir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="autozapret-bench-") as workdir:
+            results = run(args.only, args.quick, args.repeat, workdir)
+
+    print_table(results, baseline)
+    report = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.update_baseline:
+        report["results"] = {**baseline, **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Базовая линия записана в {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    for name, before, after in regressions:
+        print(f"РЕГРЕССИЯ {name}: {before * 1000:.2f} мс → {after * 1000:.2f} мс", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""Локальные заменители GitHub, ``sc`` и проверяемых сайтов для воспроизводимых замеров."""
+import hashlib
+import http.server
+import json
+import os
+import random
+import socketserver
+import sys
+import threading
+import time
+import zipfile
+
+from autozapret.integrity import file_sha256
+from autozapret.strategy_bench import ProbeTarget
+
+CHUNK = 256 * 1024
+RELEASE_TAG = "bench-1.0"
+SERVICE_SCRIPTS = ("service_install.bat", "service_remove.bat", "service_status.bat")
+
+STRATEGY_TEMPLATE = """@echo off
+chcp 65001 > nul
+:: 65001 - UTF-8
+
+cd /d "%~dp0"
+call service_status.bat zapret
+echo:
+
+set "BIN=%~dp0bin\\"
+set "LISTS=%~dp0lists\\"
+cd /d %BIN%
+
+start "zapret: %~n0" /min "%BIN%winws.exe" --wf-tcp=80,443,{tcp} --wf-udp=443,50000-50100,{udp} ^
+--filter-udp=443 --hostlist="%LISTS%list-general.txt" --dpi-desync=fake --dpi-desync-repeats={repeats} --dpi-desync-fake-quic="%BIN%quic_initial_www_google_com.bin" --new ^
+--filter-udp=50000-50100 --filter-l7=discord,stun --dpi-desync=fake --dpi-desync-repeats=6 --new ^
+--filter-tcp=80 --hostlist="%LISTS%list-general.txt" --dpi-desync=fake,split2 --dpi-desync-autottl=2 --dpi-desync-fooling=md5sig --new ^
+--filter-tcp=443 --hostlist="%LISTS%list-general.txt" --dpi-desync={desync} --dpi-desync-split-pos=1 --dpi-desync-fooling=badseq --new ^
+--filter-tcp=80,443 --ipset="%LISTS%ipset-all.txt" --dpi-desync={desync} --dpi-desync-autottl=2
+"""
+
+SC_SCRIPT = (
+    "import sys\n"
+    "print('SERVICE_NAME: ' + sys.argv[1])\n"
+    "print('        TYPE               : 10  WIN32_OWN_PROCESS')\n"
+    "print('        STATE              : 4  RUNNING')\n"
+    "print('        WIN32_EXIT_CODE    : 0  (0x0)')\n"
+)
+
+
+INSTALLER_SCRIPT = """import os
+import sys
+
+sys.stdout.reconfigure(encoding="utf-8")
+names = sorted((f for f in os.listdir(".") if f.lower().endswith(".bat") and not f.lower().startswith("service")),
+               key=str.casefold)
+print("Pick one of the options:")
+for i, name in enumerate(names, start=1):
+    print(f"{i}. {name}")
+sys.stdout.write("Input file index (number): ")
+sys.stdout.flush()
+choice = sys.stdin.readline().strip()
+if not choice.isdigit() or not 1 <= int(choice) <= len(names):
+    print("Wrong index")
+    sys.exit(1)
+print(f"Installing service for {names[int(choice) - 1]}")
+with open("installed.txt", "w", encoding="utf-8") as f:
+    f.write(names[int(choice) - 1])
+sys.stdout.write("Press any key to continue . . . ")
+sys.stdout.flush()
+sys.stdin.read(1)
+"""
+
+
+def make_installer(directory: str) -> str:
+    """Заменяет service_install.bat скриптом, задающим те же вопросы, что установщик Flowseal.
+
+    Выбранный вариант записывается в ``installed.txt``.
+    """
+    with open(os.path.join(directory, "service_install.py"), "w", encoding="utf-8") as f:
+        f.write(INSTALLER_SCRIPT)
+    path = os.path.join(directory, "service_install.bat")
+    with open(path, "w", encoding="utf-8") as f:
+        if os.name == "nt":
+            f.write(f'@"{sys.executable}" service_install.py\n')
+        else:
+            f.write(f'exec "{sys.executable}" service_install.py\n')
+    return path
+
+
+def sc_command(service: str = "zapret") -> list:
+    """Команда, печатающая ответ ``sc query`` для запущенного сервиса."""
+    return [sys.executable, "-c", SC_SCRIPT, service]
+
+
+def make_strategies(directory: str, count: int) -> list:
+    """Создаёт ``count`` вариантов .bat в формате Flowseal и служебные скрипты."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(count)
+    paths = []
+    for name in SERVICE_SCRIPTS:
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write("@echo off\n")
+    for i in range(count):
+        if i == 0:
+            name = "general.bat"
+        elif i % 7 == 0:
+            name = f"general (МГТС {i}).bat"
+        else:
+            name = f"general (ALT{i}).bat"
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(STRATEGY_TEMPLATE.format(
+                tcp=rng.randint(1000, 9000), udp=rng.randint(1000, 9000), repeats=rng.randint(2, 11),
+                desync=rng.choice(["split2", "fake,split2", "fake,multidisorder", "multisplit"])))
+        paths.append(path)
+    return paths
+
+
+def make_archive(path: str, size_mb: int, strategies: int = 20) -> str:
+    """Собирает zip примерно на ``size_mb`` МиБ из несжимаемых файлов и вариантов .bat.
+
+    Готовый архив переиспользуется, пока его размер совпадает с запрошенным.
+    """
+    marker = path + ".size"
+    if os.path.exists(path) and os.path.exists(marker):
+        with open(marker) as f:
+            if f.read() == str(size_mb):
+                return path
+    rng = random.Random(size_mb)
+    scratch = os.path.join(os.path.dirname(path), "strategies")
+    bats = make_strategies(scratch, strategies) + [os.path.join(scratch, name) for name in SERVICE_SCRIPTS]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+        for bat in bats:
+            zf.write(bat, os.path.basename(bat))
+        for i in range(size_mb):
+            zf.writestr(f"bin/blob{i:04d}.bin", rng.randbytes(1024 * 1024))
+        zf.writestr("lists/list-general.txt", "\n".join(f"host{i}.example.com" for i in range(5000)))
+    with open(marker, "w") as f:
+        f.write(str(size_mb))
+    return path
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/release":
+            self._release()
+        elif self.path == "/archive.zip":
+            self._archive()
+        else:
+            self.send_error(404)
+
+    def _release(self):
+        stand_in = self.server.stand_in
+        stand_in.api_requests += 1
+        if stand_in.delay:
+            time.sleep(stand_in.delay)
+        if stand_in.retry_after is not None:
+            stand_in.statuses.append(403)
+            self.send_response(403)
+            self.send_header("Retry-After", str(stand_in.retry_after))
+            self.send_header("X-RateLimit-Remaining", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({
+            "tag_name": RELEASE_TAG,
+            "assets": [{"name": "zapret-discord-youtube.zip",
+                        "browser_download_url": stand_in.url + "/archive.zip",
+                        "digest": stand_in.digest}],
+        }).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            stand_in.statuses.append(304)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        stand_in.statuses.append(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _archive(self):
+        stand_in = self.server.stand_in
+        path = stand_in.archive
+        if path is None:
+            self.send_error(404)
+            return
+        with stand_in.lock:
+            stand_in.archive_requests += 1
+            drop = stand_in.drops > 0
+            if drop:
+                stand_in.drops -= 1
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        rng = self.headers.get("Range")
+        if (stand_in.ranges and rng and rng.startswith("bytes=")
+                and not (stand_in.probe_only and rng != "bytes=0-0")):
+            first, _, last = rng[len("bytes="):].partition("-")
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            if stand_in.empty_ranges and (start, end) != (0, 0):
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        else:
+            self.send_response(200)
+        if stand_in.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{size}"')
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        sent = 0
+        with open(path, "rb") as f:
+            f.seek(start)
+            left = end - start + 1
+            while left > 0:
+                if drop and sent >= stand_in.drop_after:
+                    self.close_connection = True
+                    return
+                data = f.read(min(CHUNK, left))
+                if not data:
+                    break
+                self.wfile.write(data)
+                sent += len(data)
+                left -= len(data)
+                if stand_in.throttle:
+                    time.sleep(stand_in.throttle)
+
+
+class GitHubStandIn:
+    """HTTP‑сервер на 127.0.0.1, отвечающий как API релизов GitHub.
+
+    ``/release`` отдаёт описание релиза с ETag и поддерживает
+    ``If-None-Match``, ``/archive.zip`` — архив с поддержкой Range;
+    SHA-256 архива публикуется в поле ``digest``, как у GitHub.
+    ``delay`` замедляет ответы API, чтобы изображать медленное зеркало.
+
+    ``statuses`` — коды ответов API по порядку.
+
+    Для проверки отказов: ``retry_after`` — API отвечает 403 с
+    ``Retry-After``; ``ranges=False`` — сервер без Range; ``probe_only`` — Range
+    соблюдается только для проверочного ``bytes=0-0``; ``empty_ranges``
+    — 206 без тела; ``drops`` ответов с архивом обрываются после
+    ``drop_after`` байт; ``throttle`` — пауза после каждого блока.
+    """
+
+    def __init__(self, archive: str = None, delay: float = 0.0):
+        self.archive = archive
+        self.delay = delay
+        self.api_requests = 0
+        self.statuses = []
+        self.archive_requests = 0
+        self.retry_after = None
+        self.ranges = True
+        self.empty_ranges = False
+        self.probe_only = False
+        self.drops = 0
+        self.drop_after = CHUNK
+        self.throttle = 0.0
+        self.lock = threading.Lock()
+        self.digest = None
+        if archive is not None:
+            self.digest = "sha256:" + file_sha256(archive)
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.stand_in = self
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.release_url = self.url + "/release"
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="GitHubStandIn", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _ProbeHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        mode = self.server.stand_in.mode
+        if mode == "blocked":
+            return
+        self.request.recv(1024)
+        if mode == "slow":
+            time.sleep(self.server.stand_in.slow_delay)
+        self.request.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+
+
+class ProbeStandIn:
+    """TCP‑сервер на 127.0.0.1 вместо проверяемого сайта (без TLS).
+
+    ``mode``: ``"ok"`` — отвечает сразу, ``"slow"`` — через ``slow_delay``
+    секунд, ``"blocked"`` — закрывает соединение без ответа, как при блокировке.
+    """
+
+    def __init__(self, mode: str = "ok", slow_delay: float = 0.2):
+        self.mode = mode
+        self.slow_delay = slow_delay
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _ProbeHandler)
+        self.server.daemon_threads = True
+        self.server.stand_in = self
+        self.target = ProbeTarget("127.0.0.1", self.server.server_address[1], tls=False)
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, name="ProbeStandIn", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,206 @@
+"""Набор замеров. Каждая функция возвращает словарь ``имя -> результат``."""
+import contextlib
+import json
+import os
+import shutil
+import statistics
+import threading
+import time
+
+from autozapret import core
+from autozapret.service_status import ScBackend, StatusWatcher, RUNNING
+from autozapret.strategy_index import StrategyIndex
+from benchmarks.standins import GitHubStandIn, make_archive, make_installer, make_strategies, sc_command
+
+
+def measure(fn, repeat: int, setup=None, **extra) -> dict:
+    """Запускает ``fn`` ``repeat`` раз; ``setup`` выполняется перед каждым запуском вне замера."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return {"median": statistics.median(times), "min": min(times), "max": max(times),
+            "runs": repeat, "unit": "s", **extra}
+
+
+@contextlib.contextmanager
+def patched(module, **values):
+    saved = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def bench_release(workdir: str, repeat: int) -> dict:
+    """``get_latest_release_zip_url``: без кэша, с проверкой ETag (304) и из свежего кэша."""
+    cache_path = os.path.join(workdir, "release_cache.json")
+    results = {}
+    with GitHubStandIn() as github, patched(core, GITHUB_API_RELEASE=github.release_url,
+                                            RELEASE_CACHE_PATH=cache_path, _release_fetcher=None,
+                                            **_sources_paths(workdir)):
+        def reset():
+            core._release_fetcher = None
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+
+        results["release.zip_url.cold"] = measure(core.get_latest_release_zip_url, repeat, setup=reset)
+        with patched(core, RELEASE_CACHE_TTL=0):
+            core._release_fetcher = None
+            results["release.zip_url.revalidate"] = measure(core.get_latest_release_zip_url, repeat)
+        core._release_fetcher = None
+        results["release.zip_url.cached"] = measure(core.get_latest_release_zip_url, repeat)
+    results.update(bench_release_race(workdir, repeat))
+    return results
+
+
+def bench_release_race(workdir: str, repeat: int) -> dict:
+    """Гонка трёх источников с задержкой 300, 150 и 20 мс; побеждать должен быстрый."""
+    config_path = os.path.join(workdir, "race_sources.json")
+    with GitHubStandIn(delay=0.3) as slow, GitHubStandIn(delay=0.15) as medium, \
+            GitHubStandIn(delay=0.02) as fast:
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump({"sources": [{"name": name, "url": stand_in.release_url} for name, stand_in in
+                                   (("slow", slow), ("medium", medium), ("fast", fast))]}, f)
+        with patched(core, RELEASE_SOURCES_PATH=config_path, RELEASE_CACHE_TTL=0, _release_fetcher=None,
+                     RELEASE_CACHE_PATH=os.path.join(workdir, "race_cache.json"),
+                     RELEASE_STATS_PATH=os.path.join(workdir, "race_stats.json")):
+            first = measure(core.get_latest_release_zip_url, 1)
+            warm = measure(core.get_latest_release_zip_url, repeat)
+            warm["source"] = core.get_release_fetcher().last_source
+    return {"release.race.first": first, "release.race.warm": warm}
+
+
+def _sources_paths(workdir: str) -> dict:
+    return {"RELEASE_SOURCES_PATH": os.path.join(workdir, "no_sources.json"),
+            "RELEASE_STATS_PATH": os.path.join(workdir, "release_stats.json")}
+
+
+def bench_update(workdir: str, sizes, repeat: int) -> dict:
+    """Скачивание и распаковка архива (то же, что выполняет ``DownloadThread``)."""
+    target = os.path.join(workdir, "ZAPRET")
+    results = {}
+    for size in sizes:
+        archive = make_archive(os.path.join(workdir, f"archive-{size}.zip"), size)
+        runs = repeat if size < 100 else min(repeat, 3)
+        with GitHubStandIn(archive) as github, patched(
+                core, GITHUB_API_RELEASE=github.release_url, _release_fetcher=None, **_sources_paths(workdir),
+                RELEASE_CACHE_PATH=os.path.join(workdir, "release_cache.json"),
+                ZIP_PATH=os.path.join(workdir, "download.zip"),
+                ARCHIVE_STORE_DIR=os.path.join(workdir, "archive_store"), _archive_store=None):
+            last = {}
+
+            def clean():
+                shutil.rmtree(target, ignore_errors=True)
+
+            def run(delta):
+                last.update(core.update(target, delta=delta))
+
+            full = measure(lambda: run(False), runs, setup=clean)
+            full["mb_per_s"] = size / full["median"]
+            full["hash_s"] = last["hash_seconds"]
+            full["hash_reread_mb"] = last["hash_reread"] / 1024 / 1024
+            results[f"update.full.{size}mb"] = full
+            delta = measure(lambda: run(True), runs)
+            delta["mb_per_s"] = size / delta["median"]
+            delta["verify_s"] = last["verify_seconds"]
+            results[f"update.delta.{size}mb"] = delta
+        shutil.rmtree(target, ignore_errors=True)
+    return results
+
+
+def bench_index(workdir: str, counts, repeat: int) -> dict:
+    """Разбор вариантов .bat: полный и по кэшу без изменений."""
+    results = {}
+    for count in counts:
+        directory = os.path.join(workdir, f"strategies-{count}")
+        make_strategies(directory, count)
+        cache_path = os.path.join(workdir, f"strategy_index-{count}.json")
+
+        def drop_cache():
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+
+        results[f"index.cold.{count}"] = measure(lambda: StrategyIndex(directory, cache_path).refresh(),
+                                                 repeat, setup=drop_cache)
+        StrategyIndex(directory, cache_path).refresh()
+        results[f"index.warm.{count}"] = measure(lambda: StrategyIndex(directory, cache_path).refresh(), repeat)
+    return results
+
+
+def bench_gui(workdir: str, counts, repeat: int) -> dict:
+    """``populate_file_panels``, отрисовка строк делегатом и фильтр МГТС.
+
+    Требует PySide6; без него замеры пропускаются.
+    """
+    try:
+        from PySide6.QtWidgets import QApplication
+    except ImportError:
+        return {}
+    import Main
+    app = QApplication.instance() or QApplication([])
+    app.setStyleSheet(Main.APP_THEME)
+    results = {}
+    for count in counts:
+        directory = os.path.join(workdir, f"strategies-{count}")
+        make_strategies(directory, count)
+        with patched(core, STATE_PATH=os.path.join(workdir, "app_state.json"), _app_state=None):
+            window = Main.AutoZapretGUI()
+        window.resize(800, 500)
+        window.strategy_view.resize(600, 480)
+        window.strategy_index = StrategyIndex(directory, None)
+        window.strategy_index.refresh()
+        results[f"gui.populate.{count}"] = measure(window.populate_file_panels, repeat)
+        results[f"gui.render.{count}"] = measure(window.strategy_view.grab, repeat)
+
+        def toggle_filter():
+            window.set_filter("mgts")
+            window.set_filter("all")
+
+        results[f"gui.filter.{count}"] = measure(toggle_filter, repeat)
+        window.app_state.flush()
+        window.deleteLater()
+    return results
+
+
+def bench_install(workdir: str, repeat: int) -> dict:
+    """Установка без участия пользователя через заменитель service_install.bat."""
+    directory = os.path.join(workdir, "install")
+    paths = make_strategies(directory, 20)
+    make_installer(directory)
+    variant = paths[7]
+
+    def install():
+        if core.install_service(directory, variant=variant) != 0:
+            raise RuntimeError("заменитель установщика завершился с ошибкой")
+
+    result = measure(install, repeat)
+    with open(os.path.join(directory, "installed.txt"), encoding="utf-8") as f:
+        if f.read() != os.path.basename(variant):
+            raise RuntimeError("установщику передан номер другого варианта")
+    return {"install.unattended": result}
+
+
+def bench_status(repeat: int) -> dict:
+    """Опрос ``sc query`` и задержка от ``refresh`` до ``on_checked`` у ``StatusWatcher``."""
+    backend = ScBackend(command=sc_command())
+    if backend.query() != RUNNING:
+        raise RuntimeError("заменитель sc вернул неожиданный ответ")
+    results = {"status.query": measure(backend.query, repeat)}
+    checked = threading.Event()
+    watcher = StatusWatcher(backend, on_checked=lambda state: checked.set(), slow_interval=3600)
+    watcher.start()
+
+    def refresh():
+        watcher.refresh()
+        checked.wait(30)
+
+    results["status.refresh"] = measure(refresh, repeat, setup=checked.clear)
+    watcher.stop()
+    return results
@@ -0,0 +1,90 @@
+import json
+import os
+import time
+
+from autozapret import app_state as app_state_module
+from autozapret.app_state import STATE_VERSION, AppState
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_updates_are_coalesced_into_one_save(tmp_path):
+    path = tmp_path / "app_state.json"
+    state = AppState(str(path), delay=0.2)
+    for i in range(20):
+        state.update(service_state="running", filter=f"alt{i}")
+    assert not path.exists()
+    wait_for(lambda: state.saves == 1)
+    time.sleep(0.3)
+    assert state.saves == 1
+    assert AppState(str(path)).get("filter") == "alt19"
+
+
+def test_unchanged_update_does_not_save(tmp_path):
+    path = tmp_path / "app_state.json"
+    state = AppState(str(path), delay=0.05)
+    state.update(release="1.9.2")
+    state.flush()
+    state.update(release="1.9.2")
+    time.sleep(0.2)
+    assert state.saves == 1
+
+
+def test_flush_writes_immediately(tmp_path):
+    path = tmp_path / "app_state.json"
+    state = AppState(str(path), delay=3600)
+    state.update(installed_variant="general.bat")
+    state.flush()
+    assert state.saves == 1
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["version"] == STATE_VERSION
+    assert data["state"] == {"installed_variant": "general.bat"}
+
+
+def test_write_goes_through_temp_file(tmp_path, monkeypatch):
+    path = tmp_path / "app_state.json"
+    state = AppState(str(path), delay=3600)
+    state.update(release="1.0")
+    state.flush()
+    replaced = []
+    real_replace = os.replace
+
+    def recording_replace(src, dst):
+        replaced.append((os.path.basename(src), os.path.basename(dst)))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(app_state_module.os, "replace", recording_replace)
+    state.update(release="2.0")
+    state.flush()
+    assert replaced == [("app_state.json.tmp", "app_state.json")]
+    assert not (tmp_path / "app_state.json.tmp").exists()
+
+
+def test_failed_write_keeps_previous_snapshot(tmp_path, monkeypatch):
+    path = tmp_path / "app_state.json"
+    state = AppState(str(path), delay=3600)
+    state.update(release="1.0")
+    state.flush()
+
+    def failing_replace(src, dst):
+        raise OSError("диск занят")
+
+    monkeypatch.setattr(app_state_module.os, "replace", failing_replace)
+    state.update(release="2.0")
+    state.flush()
+    assert state.saves == 1
+    assert AppState(str(path)).get("release") == "1.0"
+
+
+def test_unreadable_or_old_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "app_state.json"
+    path.write_text("{битый json", encoding="utf-8")
+    assert AppState(str(path)).data == {}
+    path.write_text(json.dumps({"version": STATE_VERSION + 1, "state": {"release": "1.0"}}), encoding="utf-8")
+    assert AppState(str(path)).get("release") is None
@@ -0,0 +1,51 @@
+import builtins
+import os
+import zipfile
+
+from autozapret import archive_store
+from autozapret.archive_store import ArchiveStore
+
+
+def make_release(path, general):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("general.bat", "winws.exe --hostlist=lists/list-general.txt\n" * 100)
+        zf.writestr("lists/list-general.txt", general)
+        zf.writestr("lists/copy-of-general.txt", general)
+    return str(path)
+
+
+def test_add_writes_only_new_blobs(tmp_path, monkeypatch):
+    store = ArchiveStore(str(tmp_path / "store"))
+    store.add(make_release(tmp_path / "v1.zip", "youtube.com\n"), release="1.0")
+
+    written = []
+
+    def tracking_open(path, mode="r", *args, **kwargs):
+        if "w" in mode:
+            written.append(os.path.basename(path))
+        return builtins.open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(archive_store, "open", tracking_open, raising=False)
+    general = "youtube.com\ndiscord.com\n"
+    sha = store.add(make_release(tmp_path / "v2.zip", general), release="2.0")
+
+    assert len([name for name in written if name.startswith(".tmp-")]) == 1
+    assert store.versions[sha]["written"] == len(general)
+
+    target = str(tmp_path / "ZAPRET")
+    store.activate(sha, target)
+    with open(os.path.join(target, "lists", "copy-of-general.txt"), encoding="utf-8") as f:
+        assert f.read() == general
+
+
+def test_size_and_crc_match_is_confirmed_by_hash(tmp_path):
+    store = ArchiveStore(str(tmp_path / "store"))
+    v1 = store.add(make_release(tmp_path / "v1.zip", "youtube.com\n"), release="1.0")
+    other = store.versions[v1]["files"]["general.bat"]["sha256"]
+    with zipfile.ZipFile(tmp_path / "v2.zip", "w") as zf:
+        zf.writestr("lists/list-general.txt", "discord.com\n")
+    with zipfile.ZipFile(tmp_path / "v2.zip") as zf:
+        info = zf.getinfo("lists/list-general.txt")
+        digest, size = store._store_member(zf, info, {(info.file_size, info.CRC): other})
+    assert digest != other and size == info.file_size
+    assert os.path.exists(store.blob_path(digest))
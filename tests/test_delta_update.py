@@ -0,0 +1,128 @@
+import os
+import zipfile
+
+import pytest
+
+from autozapret import delta_update
+from autozapret.delta_update import apply_update, installed_release, load_manifest, recover
+from autozapret.hostlists import HostlistIndex
+
+
+def make_release(path, general, user="# свои домены\n"):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("general.bat", "winws.exe --hostlist=lists/list-general.txt\n")
+        zf.writestr("lists/list-general.txt", general)
+        zf.writestr("lists/list-general-user.txt", user)
+    return str(path)
+
+
+@pytest.mark.parametrize("delta", [True, False])
+def test_update_keeps_edited_user_list(tmp_path, delta):
+    target = str(tmp_path / "ZAPRET")
+    apply_update(make_release(tmp_path / "v1.zip", "youtube.com\n"), target, release="1.0")
+    index = HostlistIndex(os.path.join(target, "lists"))
+    index.refresh()
+    assert index.add("example.org")["added"]
+
+    stats = apply_update(make_release(tmp_path / "v2.zip", "youtube.com\ndiscord.com\n"), target,
+                         delta=delta, release="2.0")
+
+    assert installed_release(target) == "2.0"
+    with open(os.path.join(target, "lists", "list-general-user.txt"), encoding="utf-8") as f:
+        assert "example.org" in f.read().split()
+    with open(os.path.join(target, "lists", "list-general.txt"), encoding="utf-8") as f:
+        assert "discord.com" in f.read()
+    assert stats["removed"] == 0
+
+
+def test_first_install_takes_user_list_from_release(tmp_path):
+    target = str(tmp_path / "ZAPRET")
+    apply_update(make_release(tmp_path / "v1.zip", "youtube.com\n", user="preset.org\n"), target)
+    with open(os.path.join(target, "lists", "list-general-user.txt"), encoding="utf-8") as f:
+        assert f.read() == "preset.org\n"
+
+
+def write_zip(path, files):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, text in files.items():
+            zf.writestr(name, text)
+    return str(path)
+
+
+def read_tree(directory):
+    tree = {}
+    for root, _dirs, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                tree[os.path.relpath(path, directory).replace(os.sep, "/")] = f.read()
+    return tree
+
+
+V1 = {"general.bat": "v1\n", "bin/winws.exe": "winws\n", "lists/old.txt": "old\n"}
+V2 = {"general.bat": "v2\n", "bin/winws.exe": "winws\n", "lists/new.txt": "new\n"}
+
+
+def test_delta_counts_and_removes_dropped_files(tmp_path):
+    target = str(tmp_path / "ZAPRET")
+    stats = apply_update(write_zip(tmp_path / "v1.zip", V1), target, release="1.0")
+    assert (stats["added"], stats["changed"], stats["unchanged"], stats["removed"]) == (3, 0, 0, 0)
+    with open(os.path.join(target, "mine.txt"), "w", encoding="utf-8") as f:
+        f.write("свой файл\n")
+
+    stats = apply_update(write_zip(tmp_path / "v2.zip", V2), target, release="2.0")
+
+    assert (stats["added"], stats["changed"], stats["unchanged"], stats["removed"]) == (1, 1, 1, 1)
+    assert stats["bytes_written"] == len("v2\n") + len("new\n")
+    tree = read_tree(target)
+    assert "lists/old.txt" not in tree
+    assert tree["general.bat"] == b"v2\n" and tree["lists/new.txt"] == b"new\n"
+    assert tree["mine.txt"] == "свой файл\n".encode()
+    assert set(load_manifest(target)) == set(V2)
+    assert not os.path.exists(target + ".staging") and not os.path.exists(target + ".old")
+
+
+def test_recover_after_interrupted_swap(tmp_path):
+    target = str(tmp_path / "ZAPRET")
+    apply_update(write_zip(tmp_path / "v1.zip", V1), target, release="1.0")
+    before = read_tree(target)
+    # Сбой между двумя переименованиями: старая папка уже отодвинута, новая не подставлена.
+    os.replace(target, target + ".old")
+    os.makedirs(target + ".staging")
+
+    recover(target)
+
+    assert read_tree(target) == before
+    assert not os.path.exists(target + ".staging") and not os.path.exists(target + ".old")
+    apply_update(write_zip(tmp_path / "v2.zip", V2), target, release="2.0")
+    assert installed_release(target) == "2.0"
+
+
+def test_recover_drops_backup_left_after_swap(tmp_path):
+    target = str(tmp_path / "ZAPRET")
+    apply_update(write_zip(tmp_path / "v1.zip", V1), target)
+    os.makedirs(target + ".old")
+    recover(target)
+    assert not os.path.exists(target + ".old")
+    assert os.path.isfile(os.path.join(target, "general.bat"))
+
+
+@pytest.mark.parametrize("delta", [True, False])
+def test_failed_extraction_leaves_target_untouched(tmp_path, monkeypatch, delta):
+    target = str(tmp_path / "ZAPRET")
+    apply_update(write_zip(tmp_path / "v1.zip", V1), target, release="1.0")
+    before = read_tree(target)
+    extract = delta_update._extract_member
+
+    def failing_extract(zf, info, dst):
+        if info.filename == "lists/new.txt":
+            raise OSError("нет места на диске")
+        return extract(zf, info, dst)
+
+    monkeypatch.setattr(delta_update, "_extract_member", failing_extract)
+    with pytest.raises(OSError):
+        apply_update(write_zip(tmp_path / "v2.zip", V2), target, delta=delta, release="2.0")
+
+    assert read_tree(target) == before
+    assert installed_release(target) == "1.0"
+    assert not os.path.exists(target + ".staging")
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+import requests
+
+from autozapret.downloader import DownloadCancelled, RangeDownloader
+from autozapret.integrity import IntegrityError, file_sha256
+from benchmarks.standins import GitHubStandIn, make_archive
+
+
+@pytest.fixture(scope="module")
+def archive(tmp_path_factory):
+    return make_archive(str(tmp_path_factory.mktemp("archive") / "release.zip"), 8)
+
+
+@pytest.fixture
+def server(archive):
+    with GitHubStandIn(archive) as stand_in:
+        yield stand_in
+
+
+def downloader(server, tmp_path, **kwargs):
+    return RangeDownloader(server.url + "/archive.zip", str(tmp_path / "download.zip"), **kwargs)
+
+
+def test_resume_after_cancel(server, archive, tmp_path):
+    server.throttle = 0.1
+    first = None
+
+    def cancel_midway(downloaded, total, speed):
+        if downloaded > total // 3:
+            first.cancel()
+
+    first = downloader(server, tmp_path, progress=cancel_midway)
+    with pytest.raises(DownloadCancelled):
+        first.download()
+    assert os.path.exists(first.part_path) and os.path.exists(first.state_path)
+    saved = sum(s["pos"] - s["start"] for s in first._state["segments"])
+    assert 0 < saved < os.path.getsize(archive)
+
+    server.throttle = 0.0
+    resumed = []
+    second = downloader(server, tmp_path, progress=lambda downloaded, total, speed: resumed.append(downloaded))
+    path = second.download()
+    assert resumed[0] >= saved
+    assert second.sha256 == file_sha256(path) == file_sha256(archive)
+    assert not os.path.exists(second.part_path) and not os.path.exists(second.state_path)
+
+
+def test_dropped_connections_are_retried(server, archive, tmp_path):
+    server.drops = 3
+    d = downloader(server, tmp_path, retries=5)
+    path = d.download()
+    assert server.drops == 0
+    assert file_sha256(path) == file_sha256(archive)
+
+
+def test_falls_back_to_single_stream_without_range(server, archive, tmp_path):
+    server.ranges = False
+    d = downloader(server, tmp_path)
+    path = d.download()
+    assert d._state is None
+    assert file_sha256(path) == d.sha256 == file_sha256(archive)
+
+
+def test_sha256_mismatch_discards_download(server, tmp_path):
+    d = downloader(server, tmp_path, expected_sha256="0" * 64)
+    with pytest.raises(IntegrityError):
+        d.download()
+    assert not os.path.exists(d.dest_path)
+    assert not os.path.exists(d.part_path) and not os.path.exists(d.state_path)
+
+
+def test_empty_range_responses_give_up(server, tmp_path):
+    server.empty_ranges = True
+    d = downloader(server, tmp_path, retries=1)
+    with pytest.raises(requests.ConnectionError):
+        d.download()
+    assert server.archive_requests < 20
+
+
+def test_falls_back_when_only_the_probe_gets_a_range(server, archive, tmp_path):
+    server.probe_only = True
+    d = downloader(server, tmp_path)
+    path = d.download()
+    assert file_sha256(path) == d.sha256 == file_sha256(archive)
+    assert not os.path.exists(d.part_path) and not os.path.exists(d.state_path)
@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+from autozapret import failover
+from autozapret.failover import CoreSwitcher, FailoverPolicy, FailoverScheduler
+
+VARIANTS = ["a.bat", "b.bat", "c.bat", "d.bat"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSwitcher:
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.calls = []
+
+    def switch(self, variant):
+        self.calls.append(variant)
+        return self.ok
+
+
+def make_scheduler(switcher=None, **policy):
+    policy = {"window": 60, "sustain": 30, "cooldown": 100, "max_switches": 2, "switch_period": 1000,
+              "min_samples": 4, **policy}
+    clock = FakeClock()
+    scheduler = FailoverScheduler(switcher or FakeSwitcher(), FailoverPolicy(**policy), clock=clock,
+                                  background=False)
+    scheduler.set_candidates(VARIANTS)
+    scheduler.set_current(VARIANTS[0])
+    return scheduler, clock
+
+
+def feed(scheduler, clock, pattern, step=5.0):
+    for ok in pattern:
+        clock.now += step
+        scheduler.observe([SimpleNamespace(ok=ok)])
+
+
+def actions(scheduler):
+    return [decision["action"] for decision in scheduler.log]
+
+
+def test_switches_only_after_sustained_degradation():
+    scheduler, clock = make_scheduler()
+    feed(scheduler, clock, [True, True, True, False] * 3)
+    assert actions(scheduler) == []
+    feed(scheduler, clock, [False] * 4)
+    assert actions(scheduler) == ["degraded"]
+    feed(scheduler, clock, [False] * 5)
+    assert actions(scheduler) == ["degraded"]
+    feed(scheduler, clock, [False] * 2)
+    assert actions(scheduler) == ["degraded", "switch", "switched"]
+    assert scheduler.switcher.calls == ["b.bat"]
+    assert scheduler.current == "b.bat"
+
+
+def test_hysteresis_between_thresholds():
+    scheduler, clock = make_scheduler(sustain=10_000)
+    feed(scheduler, clock, [False] * 4)
+    assert actions(scheduler) == ["degraded"]
+    feed(scheduler, clock, [True, True, False] * 4)
+    assert actions(scheduler) == ["degraded"]
+    feed(scheduler, clock, [True] * 12)
+    assert actions(scheduler) == ["degraded", "recovered"]
+
+
+def test_cooldown_delays_next_switch():
+    scheduler, clock = make_scheduler()
+    feed(scheduler, clock, [False] * 11)
+    assert scheduler.switcher.calls == ["b.bat"]
+    last_switch = scheduler.last_switch
+    feed(scheduler, clock, [False] * 18)
+    assert clock.now - last_switch < 100
+    assert scheduler.switcher.calls == ["b.bat"]
+    feed(scheduler, clock, [False])
+    assert scheduler.switcher.calls == ["b.bat", "c.bat"]
+    assert scheduler.last_switch - last_switch == 100
+
+
+def test_flapping_is_limited_per_period():
+    scheduler, clock = make_scheduler(cooldown=0)
+    feed(scheduler, clock, [False] * 200)
+    assert scheduler.switcher.calls == ["b.bat", "c.bat"]
+    clock.now += 1000
+    feed(scheduler, clock, [False] * 11)
+    assert len(scheduler.switcher.calls) == 3
+
+
+def test_failed_switch_keeps_current_when_service_was_not_removed(monkeypatch):
+    monkeypatch.setattr(failover.core, "remove_service", lambda directory: 1)
+    monkeypatch.setattr(failover.core, "install_service", lambda *args, **kwargs: 0)
+    scheduler, clock = make_scheduler(CoreSwitcher("ZAPRET"))
+    feed(scheduler, clock, [False] * 11)
+    assert actions(scheduler)[-1] == "switch_failed"
+    assert scheduler.current == "a.bat"
+
+
+def test_failed_reinstall_clears_current(monkeypatch):
+    installs = []
+    monkeypatch.setattr(failover.core, "remove_service", lambda directory: 0)
+    monkeypatch.setattr(failover.core, "install_service",
+                        lambda directory, variant=None: installs.append(variant) or 2)
+    scheduler, clock = make_scheduler(CoreSwitcher("ZAPRET"))
+    feed(scheduler, clock, [False] * 11)
+    assert installs == ["b.bat"]
+    assert actions(scheduler)[-1] == "switch_failed"
+    assert "сервис удалён" in scheduler.log[-1]["reason"]
+    assert scheduler.current is None
+    feed(scheduler, clock, [False] * 50)
+    assert installs == ["b.bat"]
@@ -0,0 +1,94 @@
+import asyncio
+import math
+import random
+import threading
+
+from autozapret.health_monitor import BUCKET_COUNT, HealthMonitor, HealthStats, LatencyHistogram
+from autozapret.strategy_bench import ProbeResult, ProbeTarget
+from benchmarks.standins import ProbeStandIn
+
+
+def exact_percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(p / 100 * len(ordered))) - 1]
+
+
+def test_percentiles_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(-3, 1.5) for _ in range(20000)] + [0.0005, 12.5]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    assert histogram.total == len(values)
+    for p in (1, 25, 50, 90, 95, 99, 99.9, 100):
+        exact = exact_percentile(values, p)
+        assert abs(histogram.percentile(p) - exact) <= exact / 32 + 1e-6, p
+
+
+def test_histogram_size_does_not_grow():
+    histogram = LatencyHistogram()
+    for i in range(100000):
+        histogram.record(i / 1000)
+    histogram.record(10 ** 6)
+    assert len(histogram.counts) == BUCKET_COUNT
+    assert abs(histogram.percentile(100) - 60.0) <= 60.0 / 32
+    assert LatencyHistogram().percentile(50) is None
+
+
+def result(ok, seconds=0.01, host="example.org"):
+    target = ProbeTarget(host)
+    if ok:
+        return ProbeResult(target, True, seconds, seconds, seconds)
+    return ProbeResult(target, False, error="timeout")
+
+
+def test_summary_covers_only_the_window():
+    stats = HealthStats(slot_seconds=60, slots=60)
+    for _ in range(10):
+        stats.record(result(True, 1.0), now=0)
+    for _ in range(3):
+        stats.record(result(True, 0.02), now=3000)
+    stats.record(result(False), now=3030)
+
+    summary = stats.summary(window=15 * 60, now=3060)
+    assert summary["samples"] == 4
+    assert summary["error_rate"] == 0.25
+    assert abs(summary["connect"]["p99"] - 0.02) <= 0.02 / 32
+
+    everything = stats.summary(window=3600, now=3060)
+    assert everything["samples"] == 14
+    assert abs(everything["ttfb"]["p50"] - 1.0) <= 1.0 / 32
+
+
+def test_stats_memory_is_bounded():
+    stats = HealthStats(slot_seconds=60, slots=5, recent=50)
+    for i in range(1000):
+        stats.record(result(i % 2 == 0), now=i * 30)
+    assert len(stats.slots) == 5
+    assert len(stats.recent) == 50
+    assert stats.recent[-1][0] == 999 * 30
+    assert stats.summary(window=10 ** 9, now=1000 * 30)["samples"] == 10
+
+
+def test_monitor_round_against_local_endpoints():
+    with ProbeStandIn("ok") as up, ProbeStandIn("blocked") as down:
+        rounds = []
+        monitor = HealthMonitor([up.target, down.target], timeout=2, on_results=rounds.append)
+        summary = asyncio.run(monitor.run_round())
+    assert summary["samples"] == 2 and summary["error_rate"] == 0.5
+    assert summary["connect"]["p50"] is not None and summary["tls"]["p50"] is None
+    assert {(r.target.port, r.ok) for r in rounds[0]} == {(up.target.port, True), (down.target.port, False)}
+
+
+def test_monitor_thread_reports_and_stops():
+    with ProbeStandIn("ok") as up:
+        updated = threading.Event()
+        monitor = HealthMonitor([up.target], interval=0.1, timeout=2, on_update=lambda summary: updated.set())
+        monitor.start()
+        try:
+            assert updated.wait(5)
+        finally:
+            monitor.stop()
+        monitor._thread.join(5)
+        assert not monitor._thread.is_alive()
+        assert monitor.stats.summary()["samples"] >= 1
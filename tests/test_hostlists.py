@@ -0,0 +1,18 @@
+from autozapret.hostlists import HostlistIndex, is_hostlist_file
+
+
+def test_exclude_lists_are_not_hostlists():
+    assert is_hostlist_file("list-general.txt")
+    assert is_hostlist_file("list-general-user.txt")
+    assert not is_hostlist_file("list-exclude.txt")
+    assert not is_hostlist_file("list-exclude-user.txt")
+    assert not is_hostlist_file("ipset-all.txt")
+
+
+def test_excluded_domain_is_not_covered(tmp_path):
+    (tmp_path / "list-general.txt").write_text("youtube.com\n", encoding="utf-8")
+    (tmp_path / "list-exclude.txt").write_text("skipped.org\n", encoding="utf-8")
+    index = HostlistIndex(str(tmp_path))
+    index.refresh()
+    assert index.lookup("m.youtube.com")["lists"] == ["list-general.txt"]
+    assert index.lookup("skipped.org") is None
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from autozapret import core
+from autozapret.installer import InstallerDriver, InstallerError
+
+MENU = ["1. general.bat", "2. general (ALT).bat", "3) General (МГТС).bat", "Input file index (number): "]
+
+STAND_IN_INSTALLER = """\
+if [ "$1" != "admin" ]; then
+    echo "Requesting admin rights..."
+    exit 0
+fi
+printf '1. general.bat\\n2. general (ALT).bat\\n'
+printf 'Input file index (number): '
+read idx
+echo "installed $idx"
+"""
+
+
+class FakeJob:
+    def __init__(self):
+        self.sent = []
+        self.stdin_closed = False
+        self.cancelled = False
+
+    def send(self, text):
+        self.sent.append(text)
+
+    def close_stdin(self):
+        self.stdin_closed = True
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def run_driver(driver, lines):
+    job = FakeJob()
+    driver.attach(job)
+    for line in lines:
+        driver.feed("stdout", line)
+    return job
+
+
+def test_number_is_taken_from_the_menu():
+    driver = InstallerDriver(os.path.join("ZAPRET", "general (мгтс).bat"), fallback_number=1)
+    job = run_driver(driver, MENU)
+    assert driver.menu == {"general.bat": 1, "general (alt).bat": 2, "general (мгтс).bat": 3}
+    assert job.sent == ["3"] and job.stdin_closed
+    assert driver.answered == 3 and driver.error is None
+
+
+def test_answer_waits_for_attach():
+    driver = InstallerDriver("general (ALT).bat")
+    for line in MENU:
+        driver.feed("stdout", line)
+    job = FakeJob()
+    driver.attach(job)
+    assert job.sent == ["2"]
+
+
+def test_fallback_number_without_a_menu():
+    driver = InstallerDriver("general (ALT).bat", fallback_number=5)
+    job = run_driver(driver, ["Выберите вариант", "Input file index (number): "])
+    assert job.sent == ["5"] and driver.answered == 5
+
+
+def test_variant_missing_from_menu_cancels():
+    driver = InstallerDriver("general (FAKE).bat", fallback_number=1)
+    job = run_driver(driver, MENU)
+    assert job.sent == [] and job.cancelled
+    assert isinstance(driver.error, InstallerError)
+
+
+def test_other_streams_are_ignored():
+    driver = InstallerDriver("general.bat")
+    driver.feed("stdin", "1. general.bat")
+    driver.feed("stderr", "Input file index (number): ")
+    assert driver.menu == {} and driver.answered is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="заглушка установщика написана на sh")
+def test_install_passes_admin_to_skip_relaunch(tmp_path):
+    (tmp_path / core.SERVICE_INSTALL).write_text(STAND_IN_INSTALLER, encoding="utf-8")
+    lines = []
+    code = core.install_service(str(tmp_path), variant="general (ALT).bat",
+                                on_line=lambda stream, text: lines.append(text))
+    assert code == 0
+    assert "installed 2" in lines
+
+
+@pytest.mark.skipif(os.name == "nt", reason="заглушка установщика написана на sh")
+def test_install_requires_elevation(tmp_path, monkeypatch):
+    (tmp_path / core.SERVICE_INSTALL).write_text(STAND_IN_INSTALLER, encoding="utf-8")
+    monkeypatch.setattr(core, "is_elevated", lambda: False)
+    with pytest.raises(PermissionError):
+        core.install_service(str(tmp_path), variant="general.bat")
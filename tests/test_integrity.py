@@ -0,0 +1,87 @@
+import hashlib
+import os
+import random
+import struct
+import zipfile
+
+import pytest
+
+from autozapret.delta_update import apply_update, installed_release
+from autozapret.integrity import IntegrityError, MemberVerifier, StreamHasher
+
+
+def test_out_of_order_feeds_beyond_memory_limit(tmp_path):
+    data = random.Random(3).randbytes(64 * 1024)
+    path = tmp_path / "download.part"
+    path.write_bytes(data)
+    parts = [(offset, data[offset:offset + 4096]) for offset in range(0, len(data), 4096)]
+    hasher = StreamHasher(limit=16 * 1024)
+    order = parts[1:]
+    random.Random(5).shuffle(order)
+    for offset, chunk in order + parts[:1]:
+        hasher.feed(offset, chunk)
+        assert hasher.pending_bytes <= hasher.limit
+
+    assert hasher.finish(str(path), len(data)) == hashlib.sha256(data).hexdigest()
+    assert 0 < hasher.reread < len(data)
+
+
+def test_in_order_feeds_need_no_reread(tmp_path):
+    data = b"zapret" * 10000
+    path = tmp_path / "download.part"
+    path.write_bytes(data)
+    hasher = StreamHasher(limit=0)
+    for offset in range(0, len(data), 1000):
+        hasher.feed(offset, data[offset:offset + 1000])
+    assert hasher.finish(str(path), len(data)) == hashlib.sha256(data).hexdigest()
+    assert hasher.reread == 0
+
+
+def corrupt_member(zip_path, name):
+    """Портит первый байт данных элемента, не трогая записанный в архиве CRC."""
+    with zipfile.ZipFile(zip_path) as zf:
+        info = zf.getinfo(name)
+    with open(zip_path, "r+b") as f:
+        f.seek(info.header_offset + 26)
+        name_len, extra_len = struct.unpack("<HH", f.read(4))
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def make_zip(path, files):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+        for name, text in files.items():
+            zf.writestr(name, text)
+    return str(path)
+
+
+def test_verifier_reports_bad_crc(tmp_path):
+    path = make_zip(tmp_path / "release.zip", {"a.txt": "a" * 1000, "b.txt": "b" * 1000})
+    corrupt_member(path, "b.txt")
+    with zipfile.ZipFile(path) as zf, MemberVerifier(path) as verifier:
+        for info in zf.infolist():
+            verifier.submit(info)
+        with pytest.raises(IntegrityError, match="b.txt"):
+            verifier.wait()
+
+
+@pytest.mark.parametrize("changed", [False, True])
+def test_bad_crc_aborts_update_before_swap(tmp_path, changed):
+    target = str(tmp_path / "ZAPRET")
+    v1 = {"general.bat": "v1\n", "bin/winws.exe": "winws" * 200}
+    apply_update(make_zip(tmp_path / "v1.zip", v1), target, release="1.0")
+    v2 = dict(v1, **{"general.bat": "v2\n"})
+    if changed:
+        v2["bin/winws.exe"] = "WINWS" * 200
+    path = make_zip(tmp_path / "v2.zip", v2)
+    corrupt_member(path, "bin/winws.exe")
+
+    with pytest.raises(IntegrityError):
+        apply_update(path, target, release="2.0")
+
+    assert installed_release(target) == "1.0"
+    with open(os.path.join(target, "general.bat"), encoding="utf-8") as f:
+        assert f.read() == "v1\n"
+    assert not os.path.exists(target + ".staging")
@@ -0,0 +1,32 @@
+from autozapret.ipsets import IpsetIndex
+
+
+def build(directory):
+    index = IpsetIndex(str(directory))
+    index.refresh()
+    return index
+
+
+def test_compact_keeps_comments_and_unparsed_lines(tmp_path):
+    path = tmp_path / "ipset-all.txt"
+    path.write_text("# Discord\n10.0.0.0/25\n10.0.0.128/25\n10.0.1.0\nnot-an-ip\n10.0.1.1\n", encoding="utf-8")
+    result = build(tmp_path).compact()
+    assert result == {"ipset-all.txt": (4, 2)}
+    assert path.read_text(encoding="utf-8").splitlines() == ["# Discord", "not-an-ip", "10.0.0.0/24", "10.0.1.0/31"]
+
+
+def test_compact_skips_lists_that_would_grow(tmp_path):
+    path = tmp_path / "ipset-ranges.txt"
+    text = "10.0.0.1-10.0.0.6\n192.168.0.0/24\n"
+    path.write_text(text, encoding="utf-8")
+    assert build(tmp_path).compact() == {}
+    assert path.read_text(encoding="utf-8") == text
+
+
+def test_more_than_64_lists(tmp_path):
+    for i in range(70):
+        (tmp_path / f"ipset-{i:02d}.txt").write_text(f"10.{i}.0.0/16\n10.255.0.1\n", encoding="utf-8")
+    index = build(tmp_path)
+    assert index.lookup("10.69.1.1")["lists"] == ["ipset-69.txt"]
+    assert len(index.lookup("10.255.0.1")["lists"]) == 70
+    assert index.lookup("11.0.0.1") is None
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+import requests
+
+from autozapret.release_cache import RateLimited, ReleaseCache
+from benchmarks.standins import RELEASE_TAG, GitHubStandIn
+
+
+@pytest.fixture
+def server():
+    with GitHubStandIn() as stand_in:
+        yield stand_in
+
+
+def make_cache(url, tmp_path, ttl=0):
+    return ReleaseCache(url, str(tmp_path / "release_cache.json"), ttl=ttl, session=requests.Session(), timeout=2)
+
+
+def test_fresh_entry_is_served_without_network(server, tmp_path):
+    make_cache(server.release_url, tmp_path).get()
+    cache = make_cache(server.release_url, tmp_path, ttl=60)
+    assert cache.get()["tag_name"] == RELEASE_TAG
+    assert not cache.from_network
+    assert server.statuses == [200]
+
+
+def test_revalidates_with_etag(server, tmp_path):
+    make_cache(server.release_url, tmp_path).get()
+    cache = make_cache(server.release_url, tmp_path)
+    assert cache.get()["tag_name"] == RELEASE_TAG
+    assert server.statuses == [200, 304]
+    assert cache.from_network and not cache.stale
+
+
+def test_rate_limit_serves_cache_and_backs_off(server, tmp_path):
+    cache = make_cache(server.release_url, tmp_path)
+    cache.get()
+    server.retry_after = 120
+    started = time.time()
+    assert cache.get()["tag_name"] == RELEASE_TAG
+    assert cache.stale
+    assert server.statuses == [200, 403]
+    assert 119 <= cache.entry["blocked_until"] - started <= 121
+    assert cache.get()["tag_name"] == RELEASE_TAG
+    assert cache.stale and not cache.from_network
+    assert server.api_requests == 2
+
+
+def test_rate_limit_without_cache_raises(server, tmp_path):
+    server.retry_after = 30
+    with pytest.raises(RateLimited):
+        make_cache(server.release_url, tmp_path).get()
+
+
+def test_network_error_serves_cached_entry(tmp_path):
+    with GitHubStandIn() as server:
+        url = server.release_url
+        make_cache(url, tmp_path).get()
+    cache = make_cache(url, tmp_path)
+    assert cache.get()["tag_name"] == RELEASE_TAG
+    assert cache.stale and not cache.from_network
+
+
+def test_network_error_without_cache_raises(tmp_path):
+    with GitHubStandIn() as server:
+        url = server.release_url
+    with pytest.raises(requests.ConnectionError):
+        make_cache(url, tmp_path).get()
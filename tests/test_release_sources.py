@@ -0,0 +1,83 @@
+import threading
+import time
+
+from autozapret.release_cache import ReleaseCache
+from autozapret.release_sources import ApiSource, LocalSource, ReleaseFetcher, ReleaseSource, make_session
+from benchmarks.standins import RELEASE_TAG, GitHubStandIn
+
+
+def api_source(name, server, tmp_path, session):
+    return ApiSource(name, ReleaseCache(server.release_url, str(tmp_path / f"{name}.json"), ttl=0,
+                                        session=session))
+
+
+def test_losing_source_is_cancelled(tmp_path):
+    session = make_session()
+    with GitHubStandIn() as fast, GitHubStandIn(delay=0.5) as slow:
+        slow_source = api_source("slow", slow, tmp_path, session)
+        fetcher = ReleaseFetcher([api_source("fast", fast, tmp_path, session), slow_source])
+        release = fetcher.fetch()
+        assert release["source"] == "fast" and release["tag"] == RELEASE_TAG
+        time.sleep(1.0)
+        assert slow.api_requests == 1
+    assert "slow" not in fetcher.stats
+    assert "data" not in slow_source.cache.entry
+    assert not (tmp_path / "slow.json").exists()
+
+
+def test_cache_is_shared_between_threads(tmp_path):
+    with GitHubStandIn(delay=0.05) as server:
+        cache = ReleaseCache(server.release_url, str(tmp_path / "cache.json"), ttl=60, session=make_session())
+        results, errors = [], []
+
+        def worker():
+            try:
+                results.append(ApiSource("github", cache).fetch())
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert not errors
+    assert server.api_requests == 1
+    assert sorted(r["cached"] for r in results) == [False] + [True] * 7
+
+
+class TimedSource(ReleaseSource):
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.started = None
+
+    def fetch(self, cancel=None):
+        self.started = time.monotonic()
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("нет ответа")
+        return {"tag": "1.0", "url": f"https://{self.name}/z.zip", "cached": False, "stale": False}
+
+
+def test_failure_starts_only_the_next_source():
+    sources = [TimedSource("a", fail=True), TimedSource("b", delay=2.0), TimedSource("c"), TimedSource("d")]
+    fetcher = ReleaseFetcher(sources, hedge_delay=0.5)
+    fetcher.stats = {s.name: {"latency": 0.1 * i, "samples": 1, "failures": 0, "streak": 0}
+                     for i, s in enumerate(sources, start=1)}
+    started = time.monotonic()
+    release = fetcher.fetch()
+    assert release["source"] == "c"
+    assert sources[1].started - started < 0.3
+    assert sources[2].started - started >= 0.9
+    assert sources[3].started is None
+
+
+def test_local_source_latency_is_ranked(tmp_path):
+    (tmp_path / "zapret-discord-youtube-1.9.2.zip").write_bytes(b"PK")
+    fetcher = ReleaseFetcher([LocalSource("nas", str(tmp_path))])
+    assert fetcher._rank(fetcher.sources[0])[0] == 1
+    assert fetcher.fetch()["tag"] == "1.9.2"
+    assert fetcher.stats["nas"]["latency"] is not None
+    assert fetcher._rank(fetcher.sources[0])[0] == 0
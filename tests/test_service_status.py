@@ -0,0 +1,64 @@
+import threading
+from types import SimpleNamespace
+
+from autozapret import service_status
+from autozapret.service_status import NOT_FOUND, RUNNING, STOPPED, FakeBackend, StatusWatcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_on_change_only_when_state_changes():
+    backend = FakeBackend(STOPPED)
+    changes = []
+    watcher = StatusWatcher(backend, on_change=changes.append)
+    for state in (STOPPED, STOPPED, RUNNING, RUNNING, NOT_FOUND):
+        backend.state = state
+        watcher.poll()
+    assert changes == [STOPPED, RUNNING, NOT_FOUND]
+    assert backend.queries == 5 and watcher.state == NOT_FOUND
+
+
+def test_boost_polls_fast_then_backs_off(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(service_status, "time", SimpleNamespace(monotonic=clock, time=clock))
+    watcher = StatusWatcher(FakeBackend(), fast_interval=1.0, slow_interval=30.0, fast_period=20.0)
+    assert [watcher._next_interval() for _ in range(6)] == [2.0, 4.0, 8.0, 16.0, 30.0, 30.0]
+
+    watcher.boost()
+    intervals = []
+    while clock.now < 1020.0:
+        intervals.append(watcher._next_interval())
+        clock.now += intervals[-1]
+    assert intervals == [1.0] * 20
+    assert [watcher._next_interval() for _ in range(6)] == [2.0, 4.0, 8.0, 16.0, 30.0, 30.0]
+
+
+def test_refresh_reports_on_checked():
+    backend = FakeBackend(RUNNING)
+    changed = threading.Event()
+    checked = []
+    done = threading.Event()
+
+    def on_checked(state):
+        checked.append(state)
+        done.set()
+
+    watcher = StatusWatcher(backend, on_change=lambda state: changed.set(), on_checked=on_checked,
+                            fast_interval=3600, slow_interval=3600)
+    watcher.start()
+    try:
+        assert changed.wait(5)
+        assert checked == []
+        backend.state = STOPPED
+        watcher.refresh()
+        assert done.wait(5)
+        assert checked == [STOPPED]
+        assert backend.queries == 2
+    finally:
+        watcher.stop()
@@ -0,0 +1,59 @@
+import pytest
+
+from autozapret.strategy_bench import StrategyBenchmark, StrategyLauncher
+from benchmarks.standins import ProbeStandIn
+
+
+class FakeLauncher(StrategyLauncher):
+    """«Запуск» варианта переключает поведение серверов; после остановки они снова заблокированы."""
+
+    def __init__(self, servers, modes):
+        self.servers = servers
+        self.modes = modes
+        self.events = []
+
+    def start(self, variant):
+        self.events.append(("start", variant))
+        for server in self.servers:
+            server.mode = self.modes[variant]
+
+    def stop(self, variant):
+        self.events.append(("stop", variant))
+        for server in self.servers:
+            server.mode = "blocked"
+
+
+@pytest.fixture
+def servers():
+    with ProbeStandIn("blocked") as first, ProbeStandIn("blocked") as second:
+        yield [first, second]
+
+
+MODES = {"broken.bat": "blocked", "slow.bat": "slow", "good.bat": "ok"}
+
+
+def test_ranks_variants_by_probe_results(servers):
+    launcher = FakeLauncher(servers, MODES)
+    bench = StrategyBenchmark(launcher, [s.target for s in servers], rounds=2, timeout=2, settle=0)
+    progress = []
+    scores = bench.run(list(MODES), progress=lambda index, total, score: progress.append((index, total)))
+
+    assert [s.variant for s in scores] == ["good.bat", "slow.bat", "broken.bat"]
+    good, slow, broken = scores
+    assert good.success_rate == slow.success_rate == 1.0 and good.total == 4
+    assert slow.ttfb > good.ttfb
+    assert broken.success_rate == 0.0 and broken.score == 0 and broken.errors
+    assert launcher.events == [(action, variant) for variant in MODES for action in ("start", "stop")]
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_cancel_stops_before_next_variant(servers):
+    launcher = FakeLauncher(servers, MODES)
+    bench = StrategyBenchmark(launcher, [servers[0].target], rounds=1, timeout=2, settle=0)
+
+    def cancel(index, total, score):
+        bench.cancelled = True
+
+    scores = bench.run(list(MODES), progress=cancel)
+    assert [s.variant for s in scores] == ["broken.bat"]
+    assert launcher.events == [("start", "broken.bat"), ("stop", "broken.bat")]
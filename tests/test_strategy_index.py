@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from autozapret import strategy_index
+from autozapret.strategy_index import StrategyIndex
+from benchmarks.standins import make_strategies
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    calls = []
+    parse_bat = strategy_index.parse_bat
+
+    def counting_parse(path):
+        calls.append(os.path.basename(path))
+        return parse_bat(path)
+
+    monkeypatch.setattr(strategy_index, "parse_bat", counting_parse)
+    return calls
+
+
+def test_refresh_rereads_only_changed_files(tmp_path, parsed):
+    directory = str(tmp_path / "ZAPRET")
+    paths = make_strategies(directory, 10)
+    index = StrategyIndex(directory, str(tmp_path / "strategy_index.json"))
+
+    assert index.refresh()
+    assert sorted(parsed) == sorted(os.path.basename(p) for p in paths)
+    assert all("service" not in name for name in parsed)
+
+    parsed.clear()
+    assert not index.refresh()
+    assert parsed == []
+
+    st = os.stat(paths[3])
+    os.utime(paths[3], ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert index.refresh()
+    assert parsed == [os.path.basename(paths[3])]
+
+    parsed.clear()
+    os.remove(paths[5])
+    assert index.refresh()
+    assert parsed == [] and paths[5] not in index.entries
+    assert len(index.all()) == 9
+
+
+def test_cached_index_is_reused(tmp_path, parsed):
+    directory = str(tmp_path / "ZAPRET")
+    make_strategies(directory, 10)
+    cache_path = str(tmp_path / "strategy_index.json")
+    StrategyIndex(directory, cache_path).refresh()
+
+    parsed.clear()
+    index = StrategyIndex(directory, cache_path)
+    assert len(index.entries) == 10
+    assert not index.refresh()
+    assert parsed == []
+    assert index.query("mgts") and all(info["mgts"] for info in index.query("mgts"))
+
+
+def test_cache_for_another_directory_is_ignored(tmp_path, parsed):
+    cache_path = str(tmp_path / "strategy_index.json")
+    first = str(tmp_path / "first")
+    make_strategies(first, 3)
+    StrategyIndex(first, cache_path).refresh()
+    second = str(tmp_path / "second")
+    make_strategies(second, 3)
+
+    parsed.clear()
+    index = StrategyIndex(second, cache_path)
+    assert index.entries == {}
+    assert index.refresh() and len(parsed) == 3
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from autozapret import supervisor
+from autozapret.installer import InstallerDriver
+from autozapret.supervisor import ProcessSupervisor, decode_line
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="заглушки установщика написаны на sh")
+
+PIECEWISE_MENU = """\
+printf '1. gen'
+sleep 0.3
+printf 'eral.bat\\n'
+printf '2. discord.bat\\n'
+printf 'Input file index (number): '
+read idx
+echo "chosen $idx"
+"""
+
+
+def write_script(tmp_path, text):
+    path = tmp_path / "service_install.sh"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_line_written_in_pieces_is_one_line(tmp_path):
+    path = write_script(tmp_path, PIECEWISE_MENU)
+    driver = InstallerDriver("general.bat")
+    job = ProcessSupervisor().submit(path, str(tmp_path), timeout=10, interactive=True, on_line=driver.feed)
+    driver.attach(job)
+    assert job.wait() == 0
+    assert driver.error is None
+    assert driver.menu == {"general.bat": 1, "discord.bat": 2}
+    assert driver.answered == 1
+    stdout = [text for stream, text in job.lines if stream == "stdout"]
+    assert stdout[:2] == ["1. general.bat", "2. discord.bat"]
+    assert "chosen 1" in stdout
+
+
+def test_prompt_without_newline_is_delivered(tmp_path):
+    path = write_script(tmp_path, "printf 'Input file index (number): '\nread idx\necho \"got $idx\"\n")
+    seen = []
+    job = None
+
+    def on_line(stream, text):
+        seen.append(text)
+        if text.startswith("Input"):
+            job.send("7")
+            job.close_stdin()
+
+    job = ProcessSupervisor().submit(path, str(tmp_path), timeout=10, interactive=True, on_line=on_line)
+    assert job.wait() == 0
+    assert seen == ["Input file index (number): ", "7", "got 7"]
+
+
+def test_trailing_fragment_is_flushed_on_exit(tmp_path):
+    path = write_script(tmp_path, "printf 'no newline'\n")
+    job = ProcessSupervisor().submit(path, str(tmp_path), timeout=10)
+    assert job.wait() == 0
+    assert job.output() == "no newline"
+
+
+def test_cyrillic_menu_after_chcp_65001(tmp_path):
+    path = write_script(tmp_path, "printf '1. general.bat\\n2. general (МГТС).bat\\n'\n"
+                                  "printf 'Input file index (number): '\nread idx\necho \"chosen $idx\"\n")
+    driver = InstallerDriver("general (МГТС).bat")
+    job = ProcessSupervisor().submit(path, str(tmp_path), timeout=10, interactive=True, on_line=driver.feed)
+    driver.attach(job)
+    assert job.wait() == 0
+    assert driver.error is None
+    assert driver.menu["general (мгтс).bat"] == 2
+    assert "chosen 2" in job.output()
+
+
+def test_output_without_chcp_falls_back_to_oem(monkeypatch):
+    monkeypatch.setattr(supervisor, "OEM_ENCODING", "cp866")
+    assert decode_line("general (МГТС).bat".encode("utf-8")) == "general (МГТС).bat"
+    assert decode_line("Ошибка".encode("cp866")) == "Ошибка"
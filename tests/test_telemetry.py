@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from autozapret import telemetry as telemetry_module
+from autozapret.telemetry import NO_SPAN, Telemetry
+
+
+def make_telemetry(tmp_path):
+    telemetry = Telemetry()
+    telemetry.configure(str(tmp_path / "trace.jsonl"), str(tmp_path / "metrics.prom"), enabled=True)
+    return telemetry
+
+
+def read_trace(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_disabled_records_nothing(tmp_path):
+    telemetry = Telemetry()
+    telemetry.configure(str(tmp_path / "trace.jsonl"))
+    assert telemetry.span("noop") is NO_SPAN
+    telemetry.count("autozapret_test_total")
+    telemetry.observe("autozapret_test_seconds", 1.0)
+    assert telemetry.counters == {} and telemetry.histograms == {}
+    assert not (tmp_path / "trace.jsonl").exists()
+
+
+def test_spans_are_nested_and_record_errors(tmp_path):
+    telemetry = make_telemetry(tmp_path)
+    with telemetry.span("update", delta=True) as outer:
+        with telemetry.span("download") as inner:
+            inner.set(bytes=10)
+        with pytest.raises(ValueError):
+            with telemetry.span("extract"):
+                raise ValueError("битый архив")
+    download, extract, update = read_trace(tmp_path / "trace.jsonl")
+    assert update["parent"] is None and update["attrs"] == {"delta": True}
+    assert download["parent"] == extract["parent"] == outer.id
+    assert download["attrs"] == {"bytes": 10} and download["status"] == "ok"
+    assert extract["status"] == "error" and extract["error"] == "ValueError: битый архив"
+
+
+def test_trace_file_rotates(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry_module, "TRACE_MAX_BYTES", 1000)
+    telemetry = make_telemetry(tmp_path)
+    for i in range(200):
+        with telemetry.span("step", index=i):
+            pass
+    trace = tmp_path / "trace.jsonl"
+    backups = [tmp_path / f"trace.jsonl.{i}" for i in range(1, telemetry_module.TRACE_BACKUPS + 1)]
+    assert all(path.exists() for path in backups)
+    assert not (tmp_path / f"trace.jsonl.{telemetry_module.TRACE_BACKUPS + 1}").exists()
+    for path in [trace] + backups:
+        assert path.stat().st_size < 1000 + 300
+    indexes = [record["attrs"]["index"] for path in reversed(backups) for record in read_trace(path)]
+    indexes += [record["attrs"]["index"] for record in read_trace(trace)]
+    assert indexes == list(range(indexes[0], 200))
+
+
+def test_prometheus_text(tmp_path):
+    telemetry = make_telemetry(tmp_path)
+    telemetry.count("autozapret_download_retries_total", error="Timeout")
+    telemetry.count("autozapret_download_retries_total", 2, error="Timeout")
+    telemetry.count("autozapret_download_retries_total", error='say "hi"\n')
+    for value in (0.003, 0.02, 0.02, 7, 500):
+        telemetry.observe("autozapret_span_seconds", value, span="install")
+    telemetry.write_metrics()
+
+    text = (tmp_path / "metrics.prom").read_text(encoding="utf-8")
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert lines.count("# TYPE autozapret_download_retries_total counter") == 1
+    assert 'autozapret_download_retries_total{error="Timeout"} 3' in lines
+    assert 'autozapret_download_retries_total{error="say \\"hi\\"\\n"} 1' in lines
+    assert "# TYPE autozapret_span_seconds histogram" in lines
+    buckets = [line for line in lines if line.startswith("autozapret_span_seconds_bucket")]
+    assert buckets[0] == 'autozapret_span_seconds_bucket{span="install",le="0.005"} 1'
+    assert 'autozapret_span_seconds_bucket{span="install",le="0.025"} 3' in buckets
+    assert 'autozapret_span_seconds_bucket{span="install",le="10"} 4' in buckets
+    assert buckets[-1] == 'autozapret_span_seconds_bucket{span="install",le="+Inf"} 5'
+    counts = [int(line.rpartition(" ")[2]) for line in buckets]
+    assert counts == sorted(counts)
+    assert 'autozapret_span_seconds_sum{span="install"} 507.043000' in lines
+    assert 'autozapret_span_seconds_count{span="install"} 5' in lines
+    assert not (tmp_path / "metrics.prom.tmp").exists()